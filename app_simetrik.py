@@ -1,953 +1,34 @@
 import streamlit as st
 import json
-import pandas as pd
-import io
 import os
-import re
-import base64
-import streamlit.components.v1 as components
 from datetime import datetime
-from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
-
-st.set_page_config(page_title="Simetrik Docs  | PeYa", page_icon="🛵📄", layout="wide")
-
-# ══════════════════════════════════════════════════════════════════════════════
-# CONSTANTES (Paleta Excel - Sobria, Profesional y Corporativa PeYa)
-# ══════════════════════════════════════════════════════════════════════════════
-C = {
-    # Paleta corporativa
-    "red":    "EA0050",  # Rojo PeYa oficial — headers principales
-    "red2":   "C0003A",  # Rojo PeYa oscuro — subsecciones
-    "white":  "FFFFFF",  # Blanco puro — filas impares
-    "grey":   "F2F2F2",  # Gris claro y 100% neutro — filas pares (zebra)
-    "grey2":  "E8E8E8",  # Gris un poco más oscuro
-    "dark":   "1A1A2E",  # Azul muy oscuro — header índice y pie
-    "border": "E5E7EB",  # Gris suave — bordes de celdas
-    "slate":  "6B7280",  # Gris medio — labels de metadatos
-    "blue":   "1D4ED8",  # Azul links
-}
-
-RT_LABEL = {
-    "native":                  "📥 Fuente",
-    "source_union":            "🔗 Unión de Fuentes",
-    "source_group":            "📊 Agrupación (Group By)",
-    "reconciliation":          "⚖️ Conciliación Estándar",
-    "advanced_reconciliation": "🔬 Conciliación Avanzada",
-    "consolidation":           "🗂️ Consolidación",
-    "resource_join":           "🔀 Join de Recursos",
-    "cumulative_balance":      "📈 Balance Acumulado",
-}
-
-# Paleta PeYa — un color dominante por tipo, tonos oscuros sobre blanco
-RT_COLOR = {
-    "native":                  "1D4ED8",  # Azul cobalto — Fuentes
-    "source_union":            "0F766E",  # Verde azulado — Uniones
-    "source_group":            "92400E",  # Ámbar oscuro — Agrupaciones
-    "reconciliation":          "EA0050",  # Rojo PeYa — Conciliación estándar
-    "advanced_reconciliation": "6D28D9",  # Violeta oscuro — Conciliación avanzada
-    "consolidation":           "374151",  # Gris pizarra — Consolidación
-    "resource_join":           "065F46",  # Verde esmeralda — Join
-    "cumulative_balance":      "065F46",  # Verde esmeralda — Balance
-}
-
-# Orden de tipos para sorting
-RT_ORDER = {
-    "native": 1, "source_union": 2, "source_group": 3,
-    "reconciliation": 4, "advanced_reconciliation": 5,
-    "consolidation": 6, "resource_join": 7, "cumulative_balance": 8,
-}
-
-# ══════════════════════════════════════════════════════════════════════════════
-# HELPERS OPENPYXL (Ajuste automático de celdas y bordes)
-# ══════════════════════════════════════════════════════════════════════════════
-def mk_border():
-    t = Side(border_style="thin", color=C["border"])
-    return Border(left=t, right=t, top=t, bottom=t)
-
-def sc(cell, bg=None, bold=False, color=C["dark"], size=10,
-       ha='left', va='top', wrap=True):
-    cell.border = mk_border()
-    cell.alignment = Alignment(horizontal=ha, vertical=va, wrap_text=wrap)
-    cell.font = Font(name='Calibri', bold=bold, size=size, color=color)
-    if bg:
-        cell.fill = PatternFill(start_color=bg, end_color=bg, fill_type="solid")
-
-def hdr(cell, text, bg=C["dark"]):
-    cell.value = text
-    sc(cell, bg=bg, bold=True, color=C["white"], size=10,
-       ha='center', va='center', wrap=False)
-
-def section_title(ws, row, text, bg=C["red"], cols=5):
-    # Sub-secciones (texto con sangría) usan red2 automáticamente
-    effective_bg = C["red2"] if bg == C["red"] and text.startswith("  ") else bg
-    for i in range(1, cols + 1):
-        c = ws.cell(row=row, column=i)
-        if i == 1: c.value = text
-        sc(c, bg=effective_bg, bold=True, color=C["white"], size=10,
-           ha='left', va='center', wrap=False)
-    ws.merge_cells(f'A{row}:{chr(64+cols)}{row}')
-    ws.row_dimensions[row].height = 20
-    return row + 1
-
-def meta_row(ws, row, label, value, cols=5, bg_val=None, bg_label=C["slate"]):
-    bg_val = bg_val or C["grey"]
-    c_l = ws.cell(row=row, column=1)
-    c_l.value = label
-    sc(c_l, bg=bg_label, bold=True, color=C["white"], size=9, ha='left', va='center', wrap=False)
-    
-    val_str = str(value) if value is not None else "—"
-    for i in range(2, cols + 1):
-        c = ws.cell(row=row, column=i)
-        if i == 2: c.value = val_str
-        sc(c, bg=bg_val, size=9, va='center', wrap=True)
-        
-    ws.merge_cells(f'B{row}:{chr(64+cols)}{row}')
-    
-    # Ajuste automático de altura para metadata
-    n_lines = val_str.count('\n') + 1 + (len(val_str) // 80)
-    ws.row_dimensions[row].height = max(14, n_lines * 13)
-    return row + 1
-
-def row_height(text, width=40, base=13):
-    """Calcula la altura de la fila basándose en saltos de línea y longitud del texto."""
-    if not text: return 14
-    text_str = str(text)
-    lines = text_str.split('\n')
-    total_lines = 0
-    for line in lines:
-        total_lines += max(1, len(line) // width + (1 if len(line) % width > 0 else 0))
-    return max(14, total_lines * base)
-
-# ══════════════════════════════════════════════════════════════════════════════
-# PARSERS
-# ══════════════════════════════════════════════════════════════════════════════
-def build_maps(data):
-    res_map   = {}   
-    col_map   = {}   
-    seg_map   = {}   
-    meta_map  = {}   
-    seg_usage = {}   
-
-    for r in data.get('resources', []):
-        eid  = r.get('export_id')
-        res_map[eid] = r.get('name', str(eid))
-
-        for c in (r.get('columns') or []):
-            cid = c.get('export_id')
-            col_map[cid] = c.get('label') or c.get('name') or str(cid)
-
-        sg = r.get('source_group') or {}
-        for c in sg.get('columns', []):
-            cid = c.get('column_id')
-            if cid and cid not in col_map:
-                col_map[cid] = f"col_{cid}"
-        for v in sg.get('values', []):
-            cid = v.get('column_id')
-            if cid and cid not in col_map:
-                col_map[cid] = f"col_{cid}"
-
-        adv = r.get('advanced_reconciliation') or {}
-        for rg in adv.get('reconcilable_groups', []):
-            for cs in rg.get('columns_selection', []):
-                cid = cs.get('column_id')
-                if cid and cid not in col_map:
-                    col_map[cid] = f"col_{cid}"
-            sc2 = rg.get('segmentation_config') or {}
-            for m in sc2.get('segmentation_metadata', []):
-                meta_map[m.get('export_id')] = m.get('value', '?')
-            ccid = sc2.get('criteria_column_id')
-            if ccid and ccid not in col_map:
-                col_map[ccid] = f"col_{ccid}"
-
-        for seg in (r.get('segments') or []):
-            rules = []
-            for fset in (seg.get('segment_filter_sets') or []):
-                for rule in (fset.get('segment_filter_rules') or []):
-                    rules.append(rule)
-            seg_map[seg.get('export_id')] = {
-                'name':        seg.get('name', ''),
-                'resource':    r.get('name', ''),
-                'resource_id': eid,
-                'default':     seg.get('default_segment', False),
-                'rules':       rules,
-            }
-
-    for r in data.get('resources', []):
-        rname = r.get('name', '')
-
-        recon = r.get('reconciliation') or {}
-        sa = recon.get('segment_a_id')
-        sb = recon.get('segment_b_id')
-        pa = recon.get('segment_a_prefix', 'A')
-        pb = recon.get('segment_b_prefix', 'B')
-        if sa:
-            seg_usage.setdefault(sa, []).append((rname, f"Conciliacion lado {pa}"))
-        if sb:
-            seg_usage.setdefault(sb, []).append((rname, f"Conciliacion lado {pb}"))
-
-        adv = r.get('advanced_reconciliation') or {}
-        for rg in adv.get('reconcilable_groups', []):
-            sgid = rg.get('segment_id')
-            if sgid:
-                seg_usage.setdefault(sgid, []).append(
-                    (rname, f"Conciliacion Avanzada lado {rg.get('prefix_side','?')}")
-                )
-
-        su = r.get('source_union') or {}
-        for us in su.get('union_segments', []):
-            sgid = us.get('segment_id')
-            if sgid:
-                seg_usage.setdefault(sgid, []).append((rname, "Union de Fuentes"))
-
-    return res_map, col_map, seg_map, meta_map, seg_usage
-
-def fmt_filter_rules(rules, col_map):
-    lines = []
-    for r in rules:
-        col_name = col_map.get(r.get('column_id'), f"ID:{r.get('column_id')}")
-        cond = r.get('condition', '')
-        op   = r.get('operator', '')
-        val  = r.get('value', '')
-        lines.append(f"{cond} [{col_name}] {op} {val}".strip())
-    return "\n".join(lines) if lines else "Sin filtros configurados"
-
-def parse_transformation_logic(col, res_map, col_map):
-    lines = []
-    uniq = col.get('uniqueness')
-    if uniq:
-        dtype      = col.get('data_format', '')
-        uniq_type  = uniq.get('type')
-        order_keys = uniq.get('order_keys', [])
-        part_keys  = uniq.get('partition_keys', [])
-
-        if dtype == 'boolean':
-            lines.append("TIPO: Booleano de duplicado")
-        elif dtype == 'integer':
-            lines.append("TIPO: Numeracion de duplicado")
-
-        if order_keys:
-            order_parts = []
-            for ok in sorted(order_keys, key=lambda x: x.get('position', 0)):
-                col_name  = col_map.get(ok.get('column_id'), f"ID:{ok.get('column_id')}")
-                direction = "ASC" if ok.get('order_by', 1) == 1 else "DESC"
-                order_parts.append(f"{col_name} {direction}")
-            lines.append("ORDER BY: " + ", ".join(order_parts))
-
-        if part_keys:
-            part_names = [col_map.get(pk.get('column_id'), f"ID:{pk.get('column_id')}")
-                          for pk in part_keys]
-            lines.append("PARTITION BY (clave de duplicado):\n  " + "\n  ".join(part_names))
-
-        return "\n".join(lines)
-
-    v = col.get('v_lookup')
-    if v:
-        vs = v.get('v_lookup_set') or {}
-        origin_id = vs.get('origin_source_id')
-        origin = res_map.get(origin_id, f"ID:{origin_id}")
-        rules = vs.get('rules', [])
-        keys = " & ".join(
-            "A." + col_map.get(r.get('column_a_id'), '?') +
-            " = B." + col_map.get(r.get('column_b_id'), '?')
-            for r in rules
-        )
-        lines.append("BUSCAR V EN: " + origin)
-        if keys:
-            lines.append("CLAVE MATCH: " + keys)
-
-    parents = [t for t in (col.get('transformations') or []) if t.get('is_parent')]
-    for t in parents:
-        q = (t.get('query') or '').strip()
-        if q and q.upper() != 'N/A':
-            lines.append("FÓRMULA: " + q)
-
-    return "\n".join(lines) if lines else "Campo directo / heredado"
-
-def parse_std_reconciliation(recon, res_map, col_map, seg_map):
-    if not recon:
-        return None
-
-    sa_id = recon.get('segment_a_id')
-    sb_id = recon.get('segment_b_id')
-    a_cfg = recon.get('a_source_settings') or {}
-    b_cfg = recon.get('b_source_settings') or {}
-
-    def resolve_side(cfg, seg_id, prefix):
-        resource_name = res_map.get(cfg.get('resource_id'), '—')
-        seg = seg_map.get(seg_id) or {}
-        seg_name = seg.get('name', f"ID:{seg_id}")
-        seg_rules = fmt_filter_rules(seg.get('rules', []), col_map)
-        return {
-            'prefix':        prefix,
-            'resource_name': resource_name,
-            'group_name':    seg_name,
-            'group_filters': seg_rules,
-            'is_trigger':    cfg.get('is_trigger', False),
-        }
-
-    sides = [
-        resolve_side(a_cfg, sa_id, recon.get('segment_a_prefix', 'A')),
-        resolve_side(b_cfg, sb_id, recon.get('segment_b_prefix', 'B')),
-    ]
-
-    rule_sets = []
-    for rs in sorted(recon.get('reconciliation_rule_sets', []),
-                     key=lambda x: x.get('position', 99)):
-        rules_desc = []
-        for rule in (rs.get('reconciliation_rules') or []):
-            col_a = col_map.get(rule.get('column_a_id'), f"ID:{rule.get('column_a_id')}")
-            col_b = col_map.get(rule.get('column_b_id'), f"ID:{rule.get('column_b_id')}")
-            op    = rule.get('operator', '=')
-            tol   = rule.get('tolerance', 0)
-            tol_u = rule.get('tolerance_unit') or ''
-            tol_s = f"  [tolerancia ±{tol} {tol_u}]" if tol else ""
-            rules_desc.append(f"A.{col_a}  {op}  B.{col_b}{tol_s}")
-        rule_sets.append({
-            'pos':   rs.get('position', 0),
-            'name':  rs.get('name', ''),
-            'rules': rules_desc,
-        })
-
-    return {
-        'sides':      sides,
-        'is_chained': recon.get('is_chained', False),
-        'rule_sets':  rule_sets,
-    }
-
-def parse_adv_reconciliation(adv, res_map, col_map, seg_map, meta_map):
-    if not adv:
-        return None
-
-    groups = []
-    for rg in (adv.get('reconcilable_groups') or []):
-        prefix   = rg.get('prefix_side', '?')
-        seg_id   = rg.get('segment_id')
-        seg      = seg_map.get(seg_id) or {}
-        seg_name = seg.get('name', f"ID:{seg_id}")
-        resource_name = seg.get('resource', res_map.get(rg.get('resource_id'), '—'))
-        seg_rules = fmt_filter_rules(seg.get('rules', []), col_map)
-
-        sc2      = rg.get('segmentation_config') or {}
-        crit_id  = sc2.get('criteria_column_id')
-        crit_col = col_map.get(crit_id, f"ID:{crit_id}") if crit_id else "—"
-        segments = [m.get('value', '') for m in sc2.get('segmentation_metadata', [])
-                    if m.get('value')]
-
-        groups.append({
-            'prefix':        prefix,
-            'resource_name': resource_name,
-            'group_name':    seg_name,
-            'group_filters': seg_rules,
-            'crit_col':      crit_col,
-            'segments':      segments,
-        })
-
-    rule_sets = []
-    for rs in sorted(adv.get('reconciliation_rule_sets', []),
-                     key=lambda x: x.get('position', 99)):
-        rules_desc = []
-        for rule in (rs.get('reconciliation_rules') or []):
-            col_a = col_map.get(rule.get('column_a_id'), f"ID:{rule.get('column_a_id')}")
-            col_b = col_map.get(rule.get('column_b_id'), f"ID:{rule.get('column_b_id')}")
-            op    = rule.get('operator', '=')
-            tol   = rule.get('tolerance', 0)
-            tol_u = rule.get('tolerance_unit') or ''
-            tol_s = f"  [tolerancia ±{tol} {tol_u}]" if tol else ""
-            rules_desc.append(f"A.{col_a}  {op}  B.{col_b}{tol_s}")
-
-        sweep = []
-        for sw in (rs.get('sweep_sides') or []):
-            p       = sw.get('prefix_side', '?')
-            isr     = sw.get('input_sweep_resource') or {}
-            meta_id = isr.get('segmentation_metadata_id')
-            if meta_id:
-                seg_val = meta_map.get(meta_id, f"ID:{meta_id}")
-            else:
-                seg_val = "(recurso completo sin segmentar)"
-            sweep.append(f"Lado {p}: {seg_val}")
-
-        rule_sets.append({
-            'pos':        rs.get('position', 0),
-            'name':       rs.get('name', ''),
-            'cross_type': rs.get('cross_type', ''),
-            'new_ver':    rs.get('is_new_version', False),
-            'rules':      rules_desc,
-            'sweep':      sweep,
-        })
-
-    return {'groups': groups, 'rule_sets': rule_sets}
-
-def parse_segment_filters(segs, col_map):
-    result = []
-    for seg in (segs or []):
-        rules = []
-        for fset in (seg.get('segment_filter_sets') or []):
-            for r in (fset.get('segment_filter_rules') or []):
-                col_name = col_map.get(r.get('column_id'), f"ID:{r.get('column_id')}")
-                rules.append(
-                    f"{r.get('condition','')} [{col_name}] {r.get('operator','')} {r.get('value','')}".strip()
-                )
-        if rules:
-            result.append({
-                'seg_id': seg.get('export_id'),
-                'name':   seg.get('name', ''),
-                'rules':  rules,
-            })
-    return result
-
-def parse_source_group(sg, col_map):
-    if not sg:
-        return [], []
-    group_cols = [col_map.get(c.get('column_id'), f"ID:{c.get('column_id')}")
-                  for c in sorted(sg.get('columns', []), key=lambda x: x.get('position', 0))]
-    agg_vals   = [(v.get('function', '?'),
-                   col_map.get(v.get('column_id'), f"ID:{v.get('column_id')}"))
-                  for v in sorted(sg.get('values', []), key=lambda x: x.get('position', 0))]
-    return group_cols, agg_vals
-
-def limpiar_hoja(nombre, eid):
-    clean = re.sub(r'[\\/*?:\[\]]', '', str(nombre))
-    return (clean[:18] + "_" + str(eid))[:31]
-
-def sort_key(r):
-    return (RT_ORDER.get(r.get('resource_type', ''), 99), r.get('export_id', 0))
-
-def build_relations(resources, nodes, res_map):
-    all_ids = {r.get('export_id') for r in resources}
-    rels = {r.get('export_id'): {"parents": [], "children": []} for r in resources}
-    for n in nodes:
-        t_id  = n.get('target')
-        s_val = n.get('source')
-        if not (t_id and s_val):
-            continue
-        s_list = s_val if isinstance(s_val, list) else [s_val]
-        for sid in s_list:
-            ext_a = "" if sid in all_ids else " ↗"
-            ext_b = "" if t_id in all_ids else " ↗"
-            if t_id in rels:
-                rels[t_id]["parents"].append(res_map.get(sid, str(sid)) + ext_a)
-            if sid in rels:
-                rels[sid]["children"].append(res_map.get(t_id, str(t_id)) + ext_b)
-    return rels
 
+from simetrik_docs import (RT_LABEL, RT_COLOR, RT_ORDER, build_maps, build_relations,
+                           recursos_unicos, ColaGeneracion, ColaLlena, MODOS_SPLIT, FORMATOS_SITIO,
+                           diff_exports, VersionStore, STORE_DIR, huella,
+                           ESTRATEGIAS, estimar, estimar_recurso, content_hash, vista_recurso,
+                           validar, resumen_integridad, TIPOS_INTEGRIDAD, FORMATOS_DIAGRAMA, layout_linaje,
+                           a_svg, exportar_linaje, PARSEO, contar_cache, iniciar_volcado,
+                           SesionesFlujo, hash_export, nuevo_token, EXPORTS_DIR, ExportMapeado,
+                           listar_exports, ruta_export)
 
-# ══════════════════════════════════════════════════════════════════════════════
-# GENERADOR EXCEL
-# ══════════════════════════════════════════════════════════════════════════════
-def generar_excel(data, selected_ids):
-    all_resources             = data.get('resources', [])
-    nodes                     = data.get('nodes', [])
-    res_map, col_map, seg_map, meta_map, seg_usage = build_maps(data)
-
-    seen, resources = set(), []
-    for r in all_resources:
-        eid = r.get('export_id')
-        if eid in selected_ids and eid not in seen:
-            seen.add(eid)
-            resources.append(r)
-    resources.sort(key=sort_key)
-
-    rels      = build_relations(resources, nodes, res_map)
-    map_hojas = {r.get('export_id'): limpiar_hoja(r.get('name', ''), r.get('export_id'))
-                 for r in resources}
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        wb = writer.book
-
-        # ── ÍNDICE ─────────────────────────────────────────────────────────────
-        ws = wb.create_sheet("📚 Índice", 0)
-        ws.sheet_view.showGridLines = False
-
-        for i in range(1, 8):
-            c = ws.cell(row=1, column=i)
-            if i == 1: c.value = "SIMETRIK DOCUMENTATION  ·  PeYa Finance Operations & Payments"
-            sc(c, bg=C["red"], bold=True, color=C["white"], size=13, ha='center', va='center', wrap=False)
-        ws.merge_cells('A1:G1')
-        ws.row_dimensions[1].height = 32
-
-        for i in range(1, 8):
-            c = ws.cell(row=2, column=i)
-            if i == 1: c.value = f"Generado: {datetime.now().strftime('%Y-%m-%d %H:%M')}   |   Recursos documentados: {len(resources)}"
-            sc(c, bg=C["dark"], color=C["white"], size=9, ha='center', va='center', wrap=False)
-        ws.merge_cells('A2:G2')
-        ws.row_dimensions[2].height = 15
-
-        idx_hdrs = ["#", "ID", "NOMBRE DEL RECURSO", "TIPO",
-                    "PROVIENE DE", "ALIMENTA A", "LINK 🔗"]
-        for i, h in enumerate(idx_hdrs, 1):
-            hdr(ws.cell(row=4, column=i), h, bg=C["dark"])
-        ws.row_dimensions[4].height = 20
-        
-        ws.freeze_panes = "A5"
-
-        for row_n, res in enumerate(resources, 5):
-            eid     = res.get('export_id')
-            rt      = res.get('resource_type', '')
-            bg      = C["grey"] if row_n % 2 == 0 else C["white"]
-
-            vals = [row_n - 4, eid, res.get('name', ''), RT_LABEL.get(rt, rt),
-                    ", ".join(rels[eid]["parents"]) or "— origen",
-                    ", ".join(rels[eid]["children"]) or "— fin de flujo"]
-            for col_n, val in enumerate(vals, 1):
-                c = ws.cell(row_n, col_n, val)
-                sc(c, bg=bg, size=9, va='center', wrap=False)
-                if col_n == 4:
-                    c.font = Font(name='Calibri', bold=True, size=9,
-                                  color=RT_COLOR.get(rt, C["dark"]))
-                c.border = mk_border()
-
-            # Link interno seguro a las pestañas del mismo excel
-            lnk = ws.cell(row_n, 7, "Ver →")
-            lnk.hyperlink = f"#'{map_hojas[eid]}'!A1"
-            lnk.font = Font(name='Calibri', color=C["blue"], underline="single", size=9)
-            lnk.border = mk_border()
-            ws.row_dimensions[row_n].height = 15
-
-        for col_n, w in enumerate([6, 11, 46, 26, 38, 38, 8], 1):
-            ws.column_dimensions[chr(64+col_n)].width = w
-
-        # ── HOJAS DE DETALLE ───────────────────────────────────────────────────
-        for res in resources:
-            eid  = res.get('export_id')
-            rt   = res.get('resource_type', '')
-            name = res.get('name', '')
-            tc   = RT_COLOR.get(rt, C["dark"])  # Color sobrio de la temática de ESTE recurso
-            COLS = 5
-
-            ws = wb.create_sheet(map_hojas[eid])
-            ws.sheet_view.showGridLines = False
-
-            row = 1
-            for i in range(1, 6):
-                c = ws.cell(row=row, column=i)
-                if i == 1: c.value = RT_LABEL.get(rt, '') + "  ·  " + name
-                sc(c, bg=tc, bold=True, color=C["white"], size=12, ha='left', va='center', wrap=False)
-            ws.merge_cells(f'A{row}:E{row}')
-            ws.row_dimensions[row].height = 30
-            row += 1
-            
-            ws.freeze_panes = "A2"
-
-            # Etiquetas también toman el color de la temática
-            row = meta_row(ws, row, "ID Recurso",  eid,  cols=COLS, bg_label=tc)
-            row = meta_row(ws, row, "Tipo",        RT_LABEL.get(rt, rt), cols=COLS, bg_label=tc)
-            row = meta_row(ws, row, "Proviene de",
-                           ", ".join(rels[eid]["parents"]) or "Origen", cols=COLS, bg_label=tc)
-            row = meta_row(ws, row, "Alimenta a",
-                           ", ".join(rels[eid]["children"]) or "Fin de flujo", cols=COLS, bg_label=tc)
-            row += 1
-
-            std = parse_std_reconciliation(res.get('reconciliation'), res_map, col_map, seg_map)
-            if std:
-                row = section_title(ws, row, "⚖️  REGLAS DE CONCILIACIÓN ESTÁNDAR", bg=tc, cols=COLS)
-                row = section_title(ws, row, "  GRUPOS CONCILIABLES ACTIVOS", bg=tc, cols=COLS)
-                
-                for col_n, h in enumerate(["LADO", "RECURSO", "GRUPO CONCILIABLE (ACTIVO)", "FILTROS DEL GRUPO"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                hdr(ws.cell(row=row, column=5), "", bg=tc)
-                ws.merge_cells(f'D{row}:E{row}')
-                ws.row_dimensions[row].height = 18
-                row += 1
-
-                for i, side in enumerate(std['sides']):
-                    bg = C["grey"] if i % 2 == 0 else C["white"]
-                    trig = "  [TRIGGER]" if side['is_trigger'] else ""
-                    c1 = ws.cell(row=row, column=1); c1.value = side['prefix'] + trig
-                    c2 = ws.cell(row=row, column=2); c2.value = side['resource_name']
-                    c3 = ws.cell(row=row, column=3); c3.value = side['group_name']
-                    c4 = ws.cell(row=row, column=4); c4.value = side['group_filters']
-                    c5 = ws.cell(row=row, column=5); c5.value = ""
-                    for c, al in [(c1,'center'),(c2,'left'),(c3,'left'),(c4,'left'),(c5,'left')]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-                    ws.merge_cells(f'D{row}:E{row}')
-                    ws.row_dimensions[row].height = row_height(side['group_filters'], width=50)
-                    row += 1
-                row += 1
-
-                row = meta_row(ws, row, "Conciliación encadenada", "Sí" if std['is_chained'] else "No", cols=COLS, bg_label=tc)
-                row += 1
-
-                row = section_title(ws, row, "  RULE SETS DE MATCHING", bg=tc, cols=COLS)
-                for col_n, h in enumerate(["POS.", "NOMBRE DEL RULE SET", "REGLAS  (A vs B)"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                hdr(ws.cell(row=row, column=4), "", bg=tc)
-                hdr(ws.cell(row=row, column=5), "", bg=tc)
-                ws.merge_cells(f'C{row}:E{row}')
-                ws.row_dimensions[row].height = 18
-                row += 1
-
-                for i, rs in enumerate(std['rule_sets']):
-                    bg = C["grey"] if i % 2 == 0 else C["white"]
-                    rules_txt = "\n".join(rs['rules'])
-                    c1 = ws.cell(row=row, column=1); c1.value = rs['pos']
-                    c2 = ws.cell(row=row, column=2); c2.value = rs['name']
-                    c3 = ws.cell(row=row, column=3); c3.value = rules_txt
-                    c4 = ws.cell(row=row, column=4); c4.value = ""
-                    c5 = ws.cell(row=row, column=5); c5.value = ""
-                    for c, al in [(c1,'center'),(c2,'left'),(c3,'left'),(c4,'left'),(c5,'left')]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-                    ws.merge_cells(f'C{row}:E{row}')
-                    ws.row_dimensions[row].height = row_height(rules_txt, width=50)
-                    row += 1
-                row += 1
-
-            adv_parsed = parse_adv_reconciliation(res.get('advanced_reconciliation'), res_map, col_map, seg_map, meta_map)
-            if adv_parsed:
-                row = section_title(ws, row, "🔬  REGLAS DE CONCILIACIÓN AVANZADA", bg=tc, cols=COLS)
-                row = section_title(ws, row, "  GRUPOS CONCILIABLES Y SEGMENTOS INTERNOS", bg=tc, cols=COLS)
-                for col_n, h in enumerate(["LADO", "RECURSO", "GRUPO CONCILIABLE", "FILTROS DEL GRUPO", "SEGMENTOS INTERNOS"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                ws.row_dimensions[row].height = 18
-                row += 1
-
-                for i, g in enumerate(adv_parsed['groups']):
-                    bg = C["grey"] if i % 2 == 0 else C["white"]
-                    segs_txt = "\n".join(g['segments']) if g['segments'] else "(sin segmentación interna)"
-                    
-                    c1 = ws.cell(row=row, column=1); c1.value = g['prefix']
-                    c2 = ws.cell(row=row, column=2); c2.value = g['resource_name']
-                    c3 = ws.cell(row=row, column=3); c3.value = g['group_name']
-                    c4 = ws.cell(row=row, column=4); c4.value = g['group_filters']
-                    c5 = ws.cell(row=row, column=5); c5.value = segs_txt
-                    for c, al in [(c1,'center'),(c2,'left'),(c3,'left'),(c4,'left'),(c5,'left')]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-                    
-                    h1 = row_height(g['group_filters'], width=22)
-                    h2 = row_height(segs_txt, width=36)
-                    ws.row_dimensions[row].height = max(h1, h2)
-                    row += 1
-                row += 1
-
-                row = section_title(ws, row, "  RULE SETS (SEGMENTO A vs SEGMENTO B)", bg=tc, cols=COLS)
-                for col_n, h in enumerate(["POS.", "NOMBRE / TIPO", "REGLAS  (A vs B)", "SEGMENTO LADO A", "SEGMENTO LADO B"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                ws.row_dimensions[row].height = 18
-                row += 1
-
-                for i, rs in enumerate(adv_parsed['rule_sets']):
-                    bg = C["grey"] if i % 2 == 0 else C["white"]
-                    name_txt = rs['name']
-                    if rs['cross_type']: name_txt += "\n[" + rs['cross_type'] + "]"
-                    if rs['new_ver']:    name_txt += "  ✦ new version"
-
-                    seg_a = next((s.replace("Lado A: ", "") for s in rs['sweep'] if s.startswith("Lado A")), "—")
-                    seg_b = next((s.replace("Lado B: ", "") for s in rs['sweep'] if s.startswith("Lado B")), "—")
-                    rules_txt = "\n".join(rs['rules'])
-
-                    c1 = ws.cell(row=row, column=1); c1.value = rs['pos']
-                    c2 = ws.cell(row=row, column=2); c2.value = name_txt
-                    c3 = ws.cell(row=row, column=3); c3.value = rules_txt
-                    c4 = ws.cell(row=row, column=4); c4.value = seg_a
-                    c5 = ws.cell(row=row, column=5); c5.value = seg_b
-                    for c, al in [(c1,'center'),(c2,'left'),(c3,'left'),(c4,'left'),(c5,'left')]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-                    
-                    ws.row_dimensions[row].height = max(row_height(rules_txt, width=22), row_height(name_txt, width=22))
-                    row += 1
-                row += 1
-
-            sg = res.get('source_group')
-            if sg:
-                row = section_title(ws, row, "📊  CONFIGURACIÓN DE AGRUPACIÓN (GROUP BY)", bg=tc, cols=COLS)
-                group_cols, agg_vals = parse_source_group(sg, col_map)
-                row = meta_row(ws, row, "GROUP BY (dimensiones)", " | ".join(group_cols) or "—", cols=COLS, bg_val=C["grey"], bg_label=tc)
-                agg_str = "  |  ".join(f"{fn}( {col} )" for fn, col in agg_vals)
-                row = meta_row(ws, row, "Agregaciones (métricas)", agg_str or "—", cols=COLS, bg_val=C["grey"], bg_label=tc)
-                row = meta_row(ws, row, "Acumulativo", "Sí" if sg.get('is_accumulative') else "No", cols=COLS, bg_label=tc)
-                row += 1
-
-            su = res.get('source_union')
-            if su:
-                row = section_title(ws, row, "🔗  CONFIGURACIÓN DE UNIÓN DE FUENTES", bg=tc, cols=COLS)
-                for col_n, h in enumerate(["FUENTE", "GRUPO CONCILIABLE", "ROL", "FILTROS DEL GRUPO"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                hdr(ws.cell(row=row, column=5), "", bg=tc)
-                ws.merge_cells(f'D{row}:E{row}')
-                ws.row_dimensions[row].height = 18
-                row += 1
-
-                for i, us in enumerate(su.get('union_segments') or []):
-                    seg_id   = us.get('segment_id')
-                    seg_info = seg_map.get(seg_id) or {}
-                    resource_name = seg_info.get('resource', seg_info.get('resource_name', f"ID:{seg_id}"))
-                    group_name    = seg_info.get('name', f"ID:{seg_id}")
-                    filters_text  = fmt_filter_rules(seg_info.get('rules', []), col_map)
-                    rol = "TRIGGER · " + (us.get('trigger_type') or '') if us.get('is_trigger') else "Fuente adicional"
-                    
-                    bg = C["grey"] if i % 2 == 0 else C["white"]
-                    c1 = ws.cell(row=row, column=1); c1.value = resource_name
-                    c2 = ws.cell(row=row, column=2); c2.value = group_name
-                    c3 = ws.cell(row=row, column=3); c3.value = rol
-                    c4 = ws.cell(row=row, column=4); c4.value = filters_text
-                    c5 = ws.cell(row=row, column=5); c5.value = ""
-                    for c, al in [(c1,'left'),(c2,'left'),(c3,'center'),(c4,'left'),(c5,'left')]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-                    ws.merge_cells(f'D{row}:E{row}')
-                    ws.row_dimensions[row].height = row_height(filters_text, width=50)
-                    row += 1
-                row += 1
-                
-                # MAPEO DE COLUMNAS DE UNIÓN
-                union_cols = su.get('union_columns', [])
-                union_cells = su.get('union_cells', [])
-                union_segments = su.get('union_segments', [])
-
-                if union_cols and union_cells:
-                    row = section_title(ws, row, "🔀  MAPEO DE COLUMNAS DE UNIÓN", bg=tc, cols=COLS)
-                    for col_n, h in enumerate(["COLUMNA DESTINO (UNIÓN)", "FUENTE (RECURSO)", "COLUMNA ORIGEN", "ESTADO"], 1):
-                        hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                    hdr(ws.cell(row=row, column=5), "", bg=tc)
-                    ws.merge_cells(f'D{row}:E{row}')
-                    ws.row_dimensions[row].height = 18
-                    row += 1
-
-                    seg_lookup = {}
-                    for us in union_segments:
-                        us_id = us.get('export_id')
-                        seg_id = us.get('segment_id')
-                        seg_info = seg_map.get(seg_id) or {}
-                        resource_name = seg_info.get('resource', seg_info.get('resource_name', f"ID:{seg_id}"))
-                        seg_lookup[us_id] = resource_name
-
-                    mapped_data = {}
-                    for uc in union_cols:
-                        dest_id = uc.get('destination_column_id')
-                        uc_id = uc.get('export_id')
-                        dest_name = col_map.get(dest_id, f"ID:{dest_id}")
-
-                        cells_for_col = [c for c in union_cells if c.get('union_column_id') == uc_id]
-                        for cell in cells_for_col:
-                            u_seg_id = cell.get('union_segment_id')
-                            origin_col_id = cell.get('origin_column_id')
-                            is_active = cell.get('is_active', False)
-
-                            source_name = seg_lookup.get(u_seg_id, f"Fuente:{u_seg_id}")
-                            orig_name = col_map.get(origin_col_id, f"ID:{origin_col_id}") if origin_col_id else "—"
-
-                            mapped_data.setdefault(dest_name, []).append({
-                                'source': source_name,
-                                'orig_col': orig_name,
-                                'active': "✅ Activa" if is_active else "❌ Inactiva"
-                            })
-
-                    for i, (dest_name, mappings) in enumerate(mapped_data.items()):
-                        bg = C["grey"] if i % 2 == 0 else C["white"]
-
-                        c1 = ws.cell(row=row, column=1); c1.value = dest_name
-                        sources = []
-                        origins = []
-                        actives = []
-                        for m in mappings:
-                            sources.append(m['source'])
-                            origins.append(m['orig_col'])
-                            actives.append(m['active'])
-
-                        c2 = ws.cell(row=row, column=2); c2.value = "\n".join(sources)
-                        c3 = ws.cell(row=row, column=3); c3.value = "\n".join(origins)
-                        c4 = ws.cell(row=row, column=4); c4.value = "\n".join(actives)
-                        c5 = ws.cell(row=row, column=5); c5.value = ""
-
-                        for c, al in [(c1,'left'),(c2,'left'),(c3,'left'),(c4,'left'),(c5,'left')]:
-                            sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-
-                        ws.merge_cells(f'D{row}:E{row}')
-                        ws.row_dimensions[row].height = row_height("\n".join(sources), width=22)
-                        row += 1
-                    row += 1
-
-            segs_all = parse_segment_filters(res.get('segments', []), col_map)
-            if segs_all:
-                row = section_title(ws, row, "🔍  GRUPOS CONCILIABLES DEL RECURSO", bg=tc, cols=COLS)
-                for col_n, h in enumerate(["NOMBRE DEL GRUPO", "FILTROS APLICADOS"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                hdr(ws.cell(row=row, column=3), "", bg=tc)
-                hdr(ws.cell(row=row, column=4), "", bg=tc)
-                hdr(ws.cell(row=row, column=5), "USADO EN", bg=tc)
-                ws.merge_cells(f'B{row}:D{row}')
-                ws.row_dimensions[row].height = 18
-                row += 1
-                for i, seg in enumerate(segs_all):
-                    bg = C["grey"] if i % 2 == 0 else C["white"]
-                    usages = seg_usage.get(seg['seg_id'], [])
-                    if usages:
-                        usage_lines = [u[0] + " (" + u[1] + ")" for u in usages]
-                        usage_text = "\n".join(usage_lines)
-                    else:
-                        usage_text = "Sin uso en flujo activo"
-                    
-                    rules_txt = "\n".join(seg['rules'])
-                    c1 = ws.cell(row=row, column=1); c1.value = seg['name']
-                    c2 = ws.cell(row=row, column=2); c2.value = rules_txt
-                    c3 = ws.cell(row=row, column=3); c3.value = ""
-                    c4 = ws.cell(row=row, column=4); c4.value = ""
-                    c5 = ws.cell(row=row, column=5); c5.value = usage_text
-                    
-                    for c in [c1, c2, c3, c4]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True)
-                    sc(c5, bg=bg, size=9, va='top', wrap=True, color="365C42" if usages else "4B5563")
-                    
-                    ws.merge_cells(f'B{row}:D{row}')
-                    ws.row_dimensions[row].height = max(row_height(rules_txt, width=60), row_height(usage_text, width=36))
-                    row += 1
-                row += 1
-
-            columns = sorted(res.get('columns') or [], key=lambda x: x.get('position', 0))
-            if columns:
-                row = section_title(ws, row, "📋  CONFIGURACIÓN DE COLUMNAS", bg=tc, cols=COLS)
-                for col_n, h in enumerate(["LABEL / NOMBRE", "TIPO DATO", "TIPO COL.", "LÓGICA · FÓRMULA · BUSCAR V"], 1):
-                    hdr(ws.cell(row=row, column=col_n), h, bg=tc)
-                hdr(ws.cell(row=row, column=5), "", bg=tc)
-                ws.merge_cells(f'D{row}:E{row}')
-                ws.row_dimensions[row].height = 18
-                row += 1
-                for i, col in enumerate(columns):
-                    label    = col.get('label') or col.get('name', '')
-                    dtype    = col.get('data_format', '')
-                    col_type = (col.get('column_type') or '').replace('_', ' ').upper()
-                    logic    = parse_transformation_logic(col, res_map, col_map)
-                    bg       = C["grey"] if i % 2 == 0 else C["white"]
-                    
-                    c1 = ws.cell(row=row, column=1); c1.value = label
-                    c2 = ws.cell(row=row, column=2); c2.value = dtype
-                    c3 = ws.cell(row=row, column=3); c3.value = col_type
-                    c4 = ws.cell(row=row, column=4); c4.value = logic
-                    c5 = ws.cell(row=row, column=5); c5.value = ""
-                    for c, al in [(c1,'left'),(c2,'center'),(c3,'center'),(c4,'left'),(c5,'left')]:
-                        sc(c, bg=bg, size=9, va='top', wrap=True, ha=al)
-                        
-                    ws.merge_cells(f'D{row}:E{row}')
-                    ws.row_dimensions[row].height = row_height(logic, width=50)
-                    row += 1
-
-            # Anchos de columna predeterminados optimizados para wrap_text
-            ws.column_dimensions['A'].width = 26
-            ws.column_dimensions['B'].width = 22
-            ws.column_dimensions['C'].width = 22
-            ws.column_dimensions['D'].width = 22
-            ws.column_dimensions['E'].width = 36
-
-        if "Sheet" in wb.sheetnames:
-            wb.remove(wb["Sheet"])
-
-    output.seek(0)
-    return output
-
+st.set_page_config(page_title="Simetrik Docs  | PeYa", page_icon="🛵📄", layout="wide")
 
 # ══════════════════════════════════════════════════════════════════════════════
 # STREAMLIT UI (CSS Premium Light Mode PeYa)
 # ══════════════════════════════════════════════════════════════════════════════
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
-
-/* ── LIGHT MODE PREMIUM PeYa ── */
-html, body, [data-testid="stAppViewContainer"], [data-testid="stApp"],
-.stApp, .main, section[data-testid="stSidebar"] {
-    background-color: #F4F5F7 !important; /* Gris ultra claro para descanso visual */
-    color: #1A1A1A !important;
-}
-[data-testid="stHeader"] { background-color: transparent !important; }
-.block-container { background-color: #F4F5F7 !important; padding-top: 1.5rem !important; }
-
-/* ── TIPOGRAFIA ── */
-html, body, [class*="css"], .stMarkdown, .stCaption,
-.stMetric, .stButton, .stDownloadButton,
-div[data-testid], p, span, label, h1, h2, h3, h4 {
-    font-family: 'Inter', sans-serif !important;
-    color: #1A1A1A !important;
-}
-code, .font-mono { font-family: 'JetBrains Mono', monospace !important; color: #EA0050 !important; background: #FEF2F2 !important; }
-
-/* ── CHECKBOXES ── */
-[data-testid="stCheckbox"] label { color: #1A1A1A !important; }
-[data-testid="stCheckbox"] > div { align-items: center; justify-content: center; height: 100%; margin-top: 25px;}
-
-/* ── FILE UPLOADER ── */
-div[data-testid="stFileUploader"] section {
-    border: 2px dashed #E5E7EB !important;
-    border-radius: 12px !important;
-    background: #FFFFFF !important;
-    transition: all 0.2s ease;
-}
-div[data-testid="stFileUploader"] section:hover {
-    border-color: #EA0050 !important;
-    background: #FFF1F2 !important;
-}
-div[data-testid="stFileUploader"] section button span { display: none !important; }
-div[data-testid="stFileUploader"] section button {
-    background: #FFFFFF !important;
-    color: #1A1A1A !important;
-    border: 1px solid #D1D5DB !important;
-    border-radius: 8px !important;
-    padding: 6px 16px !important;
-    font-weight: 600 !important;
-    box-shadow: 0 1px 2px rgba(0,0,0,0.05) !important;
-}
-div[data-testid="stFileUploader"] section button::after {
-    content: 'Examinar archivos';
-    font-family: 'Inter', sans-serif;
-    font-size: 0.875rem;
-    font-weight: 600;
-    color: #1A1A1A;
-}
-div[data-testid="stFileUploader"] small,
-div[data-testid="stFileUploader"] p { color: #6B7280 !important; }
-
-/* ── MULTISELECT ── */
-[data-testid="stMultiSelect"] > div > div {
-    background: #FFFFFF !important;
-    border: 1px solid #D1D5DB !important;
-    color: #1A1A1A !important;
-    border-radius: 8px !important;
-    box-shadow: 0 1px 2px rgba(0,0,0,0.05) !important;
-}
-span[data-baseweb="tag"] { background: #F3F4F6 !important; color: #1A1A1A !important; border-radius: 6px !important; border: 1px solid #E5E7EB !important;}
-
-/* ── PROGRESS BAR ── */
-.stProgress > div > div { background: #EA0050 !important; }
-.stProgress > div { background: #E5E7EB !important; }
-
-/* ── BOTÓN PRIMARY ── */
-div[data-testid="stButton"] button[kind="primary"] {
-    background: #EA0050 !important;
-    border: 1px solid #C0003A !important;
-    font-size: 1rem !important;
-    font-weight: 600 !important;
-    font-family: 'Inter', sans-serif !important;
-    color: #ffffff !important;
-    border-radius: 8px !important;
-    box-shadow: 0 4px 12px rgba(234, 0, 80, 0.2) !important;
-    transition: all 0.2s ease;
-}
-div[data-testid="stButton"] button[kind="primary"]:hover { 
-    background: #C0003A !important; 
-    transform: translateY(-1px);
-    box-shadow: 0 6px 16px rgba(234, 0, 80, 0.3) !important;
-}
-
-/* ── SCROLLBAR ── */
-::-webkit-scrollbar { width: 8px; height: 8px; }
-::-webkit-scrollbar-track { background: #F4F5F7; }
-::-webkit-scrollbar-thumb { background: #D1D5DB; border-radius: 4px; }
-::-webkit-scrollbar-thumb:hover { background: #9CA3AF; }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def _asset(nombre):
+    # CSS y HTML estáticos: se leen de disco una vez por proceso, no en cada rerun
+    with open(os.path.join(ASSETS_DIR, nombre), encoding="utf-8") as f:
+        return f.read()
+
+st.markdown("<style>" + _asset("estilos.css") + "</style>", unsafe_allow_html=True)
 
 # ── HEADER ────────────────────────────────────────────────────────────────────
-st.markdown("""
-<div style='background: linear-gradient(135deg, #EA0050 0%, #C0003A 100%); padding:28px 32px;border-radius:12px;
-    margin-bottom:32px; box-shadow: 0 8px 20px -5px rgba(234,0,80,0.3)'>
-    <div style='color:#FFFFFF;font-family:Inter,sans-serif;
-        font-size:1.75rem;font-weight:700;letter-spacing:-0.5px'>
-        Simetrik Documentation
-    </div>
-    <div style='color:rgba(255,255,255,0.9);font-family:Inter,sans-serif;
-        font-size:0.95rem;margin-top:6px; font-weight: 500;'>
-        PedidosYa Finance Operations &amp; Payments &nbsp;·&nbsp; v2.2 · Jef
-    </div>
-</div>""", unsafe_allow_html=True)
+st.markdown(_asset("header.html"), unsafe_allow_html=True)
 
 # ── UPLOAD ────────────────────────────────────────────────────────────────────
 up = st.file_uploader(
@@ -957,53 +38,19 @@ up = st.file_uploader(
     label_visibility="visible"
 )
 
-if not up:
-    st.markdown("""
-    <div style='background:#FFFFFF;border:1px solid #E5E7EB;border-radius:12px;
-        padding:48px 32px;text-align:center;margin-top:16px;box-shadow: 0 2px 4px rgba(0,0,0,0.02)'>
-        <div style='font-size:2.5rem;margin-bottom:12px'>📂</div>
-        <p style='color:#1A1A1A;font-size:1.1rem;font-weight:600;margin:0'>
-            Arrastra el JSON aquí o usa el botón para seleccionarlo
-        </p>
-        <p style='color:#6B7280;font-size:0.9rem;margin:8px 0 0'>
-            En Simetrik: Flujo → Configuracion → Exportar JSON
-        </p>
-    </div>""", unsafe_allow_html=True)
-    st.stop()
-
-try:
-    data = json.load(up)
-except Exception as e:
-    st.error(f"Error al leer el JSON: {e}")
-    st.stop()
-
-all_resources = data.get('resources', [])
-nodes         = data.get('nodes', [])
-
-seen_load, resources_unique = set(), []
-for r in all_resources:
-    eid = r.get('export_id')
-    if eid not in seen_load:
-        seen_load.add(eid)
-        resources_unique.append(r)
-
-res_map, col_map, seg_map, meta_map, seg_usage = build_maps(data)
-resources_unique.sort(key=sort_key)
-rels_all = build_relations(resources_unique, nodes, res_map)
-
-_type_counts = {}
-for r in resources_unique:
-    rt = r.get('resource_type', '')
-    _type_counts[rt] = _type_counts.get(rt, 0) + 1
-
-_total          = len(resources_unique)
-_fuentes        = _type_counts.get('native', 0)
-_uniones        = _type_counts.get('source_union', 0)
-_agrupaciones   = _type_counts.get('source_group', 0)
-_recons_std     = _type_counts.get('reconciliation', 0)
-_recons_adv     = _type_counts.get('advanced_reconciliation', 0)
-_recons_total   = _recons_std + _recons_adv
-_nombre_display = up.name if len(up.name) <= 30 else up.name[:27] + "…"
+# Con SIMETRIK_DOC_EXPORTS, también se puede abrir un export que ya está en el servidor (sin subirlo)
+local = None
+if EXPORTS_DIR:
+    _exports = {nombre: tamano for nombre, tamano, _ in listar_exports()}
+    _elegido = st.selectbox(
+        "**…o elige un export de la carpeta del servidor**",
+        [None] + list(_exports),
+        format_func=lambda n: "—" if n is None else f"{n}  ·  {_exports[n] / 1024 / 1024:,.1f} MB",
+        disabled=up is not None, key="export_local",
+        help="Quita el archivo subido para elegir uno de la carpeta" if up is not None else None,
+    )
+    if _elegido and up is None:
+        local = _elegido   # la ruta se resuelve en _cargar_flujo, donde un error se muestra como tal
 
 def _metric_card(label, value, color="#EA0050", bg_color="#FFFFFF"):
     return (
@@ -1015,277 +62,571 @@ def _metric_card(label, value, color="#EA0050", bg_color="#FFFFFF"):
         + str(value) + "</div></div>"
     )
 
-_cards_html = (
-    "<div style='display:grid;grid-template-columns:repeat(7,1fr);gap:12px;margin-bottom:8px'>"
-    + _metric_card("Total", _total, "#1A1A1A", "#F9FAFB")
-    + _metric_card("Fuentes", _fuentes, f"#{RT_COLOR['native']}")
-    + _metric_card("Uniones", _uniones, f"#{RT_COLOR['source_union']}")
-    + _metric_card("Agrupaciones", _agrupaciones, f"#{RT_COLOR['source_group']}")
-    + _metric_card("Conc. Std", _recons_std, f"#{RT_COLOR['reconciliation']}")
-    + _metric_card("Conc. Avz", _recons_adv, f"#{RT_COLOR['advanced_reconciliation']}")
-    + ("<div style='background:#FFFFFF;border:1px solid #E5E7EB;border-radius:12px;box-shadow:0 2px 4px rgba(0,0,0,0.04);"
-       "padding:16px;text-align:left;display:flex;flex-direction:column;justify-content:center'>"
-       "<div style='font-size:0.75rem;color:#6B7280;font-family:Inter,sans-serif;font-weight:600;"
-       "margin-bottom:6px;text-transform:uppercase;letter-spacing:0.5px'>JSON cargado</div>"
-       "<div style='font-size:0.85rem;font-weight:600;color:#1A1A1A;font-family:Inter,sans-serif;"
-       "word-break:break-all;line-height:1.4'>" + _nombre_display + "</div></div>")
-    + "</div>"
-)
-st.markdown(_cards_html, unsafe_allow_html=True)
+@st.cache_resource
+def _almacen():
+    # Un único store por proceso: su cache de blobs se comparte entre sesiones y versiones
+    return VersionStore()
+
+@st.cache_resource
+def _volcado_metricas():
+    # Con SIMETRIK_DOC_METRICAS definido, un hilo por proceso vuelca las métricas a ese archivo
+    return iniciar_volcado()
+
+_volcado_metricas()
+
+@st.cache_resource
+def _sesiones():
+    # Flujos parseados y selecciones por pestaña, compartidos por el proceso: sobreviven a recargar
+    return SesionesFlujo()
+
+def _flujo_id(nombre):
+    return os.path.splitext(nombre)[0]
+
+def _cargar_flujo(up, local=None):
+    """Flujo de la sesión: el del archivo subido o el elegido en la carpeta del servidor (local,
+    su nombre) o, sin ninguno, el de la URL (?flujo=<hash>).
+
+    Parsear y precalcular se hace una vez por export en el proceso (SesionesFlujo): recargar la
+    página, reconectarse o volver a subir el mismo archivo lo encuentra ya listo. None si no hay
+    archivo ni un flujo guardado para la URL.
+    """
+    flujo   = st.session_state.get('flujo')
+    origen  = up.file_id if up else st.query_params.get("flujo")
+    if local:
+        # El archivo pudo desaparecer o cambiar desde que se listó: si se reemplaza, cambia el origen
+        ruta   = ruta_export(local)
+        info   = os.stat(ruta)
+        origen = f"{ruta}:{info.st_mtime_ns}:{info.st_size}"
+    vigente = flujo is not None and st.session_state.get('flujo_origen') == origen
+    contar_cache("flujo_sesion", vigente)
+    if vigente:
+        return flujo
+
+    subido = up is not None or local is not None
+    if not subido:
+        if st.session_state.get('flujo_subido'):
+            # Se quitó el archivo (o la elección de la carpeta): la URL deja de apuntar al flujo
+            st.query_params.clear()
+            for k in ('flujo', 'flujo_origen', 'flujo_subido'):
+                st.session_state.pop(k, None)
+            return None
+        flujo = _sesiones().flujo(origen)
+        if flujo is None:
+            return None
+        # Se copia: la pestaña vieja (si sigue abierta) ya no escribe en la selección restaurada
+        sel = _sesiones().seleccion(st.query_params.get("sesion"), flujo['hash'])
+        if sel is not None:
+            st.session_state.sel = dict(sel)
+    elif local:
+        # mmap: ni copia en memoria del archivo entero ni viaje por el navegador
+        with ExportMapeado(ruta) as export:
+            h = hash_export(export.buffer)
+            flujo = _sesiones().flujo(h) or _parsear_flujo(export.cargar, export.nombre, export.tamano, h)
+    else:
+        with up.getbuffer() as buffer:
+            h, tamano = hash_export(buffer), len(buffer)
+        flujo = _sesiones().flujo(h) or _parsear_flujo(lambda: json.load(up), up.name, tamano, h)
+
+    st.session_state.flujo        = flujo
+    st.session_state.flujo_origen = origen
+    st.session_state.flujo_subido = subido
+    st.session_state.pop('filtro_tipo', None)   # las opciones cambian con el archivo
+    if 'sel' not in st.session_state:
+        st.session_state.sel = {eid: True for eid in flujo['recursos']}
+    token = st.session_state.setdefault('sesion', st.query_params.get("sesion") or nuevo_token())
+    _sesiones().recordar(token, flujo['hash'], st.session_state.sel)
+    st.query_params.update({"flujo": flujo['hash'], "sesion": token})
+    _recontar()
+    return flujo
+
+def _parsear_flujo(leer, nombre, tamano, h):
+    """Parsea el export (leer() devuelve el JSON) y precalcula lo que usa la página.
+
+    Una vez por export y proceso; nombre y tamano (bytes) son los del archivo.
+    """
+    with PARSEO.medir(origen="app"):
+        data = leer()
+    resources_unique = recursos_unicos(data.get('resources', []))
+    maps             = build_maps(data)
+    rels_all         = build_relations(resources_unique, data.get('nodes', []), maps[0])
+
+    _type_counts, por_tipo = {}, {}
+    for r in resources_unique:
+        rt = r.get('resource_type', '')
+        _type_counts[rt] = _type_counts.get(rt, 0) + 1
+        por_tipo.setdefault(rt, []).append(r.get('export_id'))
+
+    _total          = len(resources_unique)
+    _fuentes        = _type_counts.get('native', 0)
+    _uniones        = _type_counts.get('source_union', 0)
+    _agrupaciones   = _type_counts.get('source_group', 0)
+    _recons_std     = _type_counts.get('reconciliation', 0)
+    _recons_adv     = _type_counts.get('advanced_reconciliation', 0)
+    _nombre_display = nombre if len(nombre) <= 30 else nombre[:27] + "…"
+
+    _cards_html = (
+        "<div style='display:grid;grid-template-columns:repeat(7,1fr);gap:12px;margin-bottom:8px'>"
+        + _metric_card("Total", _total, "#1A1A1A", "#F9FAFB")
+        + _metric_card("Fuentes", _fuentes, f"#{RT_COLOR['native']}")
+        + _metric_card("Uniones", _uniones, f"#{RT_COLOR['source_union']}")
+        + _metric_card("Agrupaciones", _agrupaciones, f"#{RT_COLOR['source_group']}")
+        + _metric_card("Conc. Std", _recons_std, f"#{RT_COLOR['reconciliation']}")
+        + _metric_card("Conc. Avz", _recons_adv, f"#{RT_COLOR['advanced_reconciliation']}")
+        + ("<div style='background:#FFFFFF;border:1px solid #E5E7EB;border-radius:12px;box-shadow:0 2px 4px rgba(0,0,0,0.04);"
+           "padding:16px;text-align:left;display:flex;flex-direction:column;justify-content:center'>"
+           "<div style='font-size:0.75rem;color:#6B7280;font-family:Inter,sans-serif;font-weight:600;"
+           "margin-bottom:6px;text-transform:uppercase;letter-spacing:0.5px'>JSON cargado</div>"
+           "<div style='font-size:0.85rem;font-weight:600;color:#1A1A1A;font-family:Inter,sans-serif;"
+           "word-break:break-all;line-height:1.4'>" + _nombre_display + "</div></div>")
+        + "</div>"
+    )
+
+    # Con un almacén configurado cada export cargado queda como versión del flujo
+    version = _almacen().guardar(_flujo_id(nombre), data) if STORE_DIR else None
+
+    flujo = {
+        'hash':       h,
+        'bytes':      tamano,
+        'version':    version,
+        'nombre':     nombre,
+        'data':       data,
+        'recursos':   {r.get('export_id'): r for r in resources_unique},   # ya ordenados por sort_key
+        'maps':       maps,
+        'rels':       rels_all,
+        'tipos':      sorted(por_tipo, key=lambda x: RT_ORDER.get(x, 99)),
+        'por_tipo':   por_tipo,
+        'cards_html': _cards_html,
+        'html_filas': {},   # (eid, checked) → tarjeta, se llena a demanda
+        # (filas, merges, texto) por recurso: reestimar una selección es sólo sumar
+        'estimaciones': {r.get('export_id'): estimar_recurso(r) for r in resources_unique},
+        'integridad':   validar(data),
+    }
+    _sesiones().guardar(flujo)
+    return flujo
+
+def _recontar():
+    # tipos_sel: recursos tildados por tipo (sin aplicar el filtro), se mantiene incremental en _toggle
+    flujo, sel = st.session_state.flujo, st.session_state.sel
+    st.session_state.tipos_sel = {rt: sum(1 for eid in ids if sel.get(eid, True))
+                                  for rt, ids in flujo['por_tipo'].items()}
+
+def _toggle(eid):
+    checked = st.session_state[f"chk_{eid}"]
+    if st.session_state.sel.get(eid, True) != checked:
+        st.session_state.sel[eid] = checked
+        rt = st.session_state.flujo['recursos'][eid].get('resource_type', '')
+        st.session_state.tipos_sel[rt] += 1 if checked else -1
+    # Sólo se redibujan la tarjeta tocada y el resumen, no la lista entera
+    st.rerun([f"fila_{eid}", "resumen"])
+
+def _marcar_visibles(valor):
+    flujo = st.session_state.flujo
+    for rt in st.session_state.get('filtro_tipo', flujo['tipos']):
+        for eid in flujo['por_tipo'].get(rt, []):
+            st.session_state.sel[eid] = valor
+            st.session_state[f"chk_{eid}"] = valor
+    _recontar()
+    st.rerun(["seleccion", "resumen"])
+
+def _html_fila(flujo, eid, checked):
+    cache = flujo['html_filas']
+    if (eid, checked) in cache:
+        return cache[(eid, checked)]
+
+    name  = flujo['recursos'][eid].get('name', '')
+    pars  = ", ".join(flujo['rels'][eid]["parents"]) or "—"
+    chils = ", ".join(flujo['rels'][eid]["children"]) or "—"
+
+    opacity = "1" if checked else "0.55"
+    bg_color = "#FFFFFF" if checked else "#F9FAFB"
+    border_color = "#EA0050" if checked else "#E5E7EB"
+    border_width = "2px" if checked else "1px"
+    box_shadow = "0 4px 12px rgba(0,0,0,0.06)" if checked else "none"
+
+    html = (
+        f"<div style='opacity:{opacity};padding:14px 18px;background:{bg_color};border-radius:8px;margin-bottom:8px;border:{border_width} solid {border_color};box-shadow:{box_shadow};transition:all 0.2s;'>"
+        f"<div style='display:flex;justify-content:space-between;align-items:center;margin-bottom:6px'>"
+        f"<span style='font-weight:700;font-size:0.95rem;color:#1A1A1A'>{name}</span>"
+        f"<span style='font-size:0.75rem;color:#6B7280;font-family:JetBrains Mono,monospace;background:#F3F4F6;padding:4px 8px;border-radius:4px;border:1px solid #E5E7EB'>{eid}</span>"
+        f"</div>"
+        f"<div style='font-size:0.8rem;color:#6B7280;display:flex;gap:24px; font-weight: 500;'>"
+        f"<span><span style='color:#9CA3AF'>⬅️</span> &nbsp;<span style='color:#4B5563'>{pars[:75]}{'…' if len(pars)>75 else ''}</span></span>"
+        f"<span><span style='color:#9CA3AF'>➡️</span> &nbsp;<span style='color:#4B5563'>{chils[:75]}{'…' if len(chils)>75 else ''}</span></span>"
+        f"</div>"
+        f"</div>"
+    )
+    cache[(eid, checked)] = html
+    return html
+
+try:
+    flujo = _cargar_flujo(up, local)
+except Exception as e:
+    st.error(f"Error al leer el JSON: {e}")
+    st.stop()
+if flujo is None:
+    st.markdown(_asset("sin_archivo.html"), unsafe_allow_html=True)
+    st.stop()
+
+st.markdown(flujo['cards_html'], unsafe_allow_html=True)
+
+def _mostrar_integridad(flujo):
+    hallazgos = flujo['integridad']
+    n = resumen_integridad(hallazgos)
+    if not hallazgos:
+        st.caption("🩺 Integridad del export: sin referencias rotas, ids repetidos ni ciclos")
+        return
+    titulo = (f"🩺 Integridad del export · {n['error']} errores · {n['aviso']} avisos · "
+              f"{n['info']} grupos sin uso")
+    icono = {"error": "🔴 Error", "aviso": "🟠 Aviso", "info": "⚪ Info"}
+    with st.expander(titulo, expanded=bool(n['error'])):
+        st.dataframe([{'Nivel': icono[h['nivel']], 'Problema': TIPOS_INTEGRIDAD[h['tipo']][1], 'ID': str(h['id']),
+                       'Recurso': h['nombre'] or "—", 'Dónde': h['donde']} for h in hallazgos],
+                     hide_index=True, use_container_width=True)
+
+_mostrar_integridad(flujo)
+
+MIME_DIAGRAMA = {"svg": "image/svg+xml", "dot": "text/vnd.graphviz", "mmd": "text/plain"}
+
+def _mostrar_linaje(flujo):
+    # El layout se calcula recién al abrir el expander y queda cacheado por hash del flujo
+    vista = st.expander(f"🗺️  Diagrama de linaje · {len(flujo['recursos'])} recursos", key="linaje_vista",
+                        on_change="rerun")
+    if not vista.open:
+        return
+    d = layout_linaje(flujo['data'])
+    vista.caption(f"{len(d.niveles)} niveles · {d.cruces} cruces de aristas · orígenes a la izquierda, "
+                  "aristas punteadas: cierran un ciclo")
+    vista.markdown("<div style='overflow:auto;max-height:560px;border:1px solid #E5E7EB;border-radius:8px'>"
+                   + a_svg(d) + "</div>", unsafe_allow_html=True)
+    base = "linaje_" + os.path.splitext(flujo['nombre'])[0]
+    for col, (fmt, etiqueta) in zip(vista.columns(len(FORMATOS_DIAGRAMA)), FORMATOS_DIAGRAMA.items()):
+        col.download_button(f"⬇️  {etiqueta}", data=lambda fmt=fmt: exportar_linaje(d, fmt),
+                            file_name=f"{base}.{fmt}", mime=MIME_DIAGRAMA[fmt], key=f"dl_linaje_{fmt}",
+                            use_container_width=True)
+
+_mostrar_linaje(flujo)
 
 st.markdown("<hr style='margin:28px 0;border-color:#E5E7EB'>", unsafe_allow_html=True)
 
 # ── PASO 1: SELECCIÓN ─────────────────────────────────────────────────────────
 st.markdown("<h3 style='margin-bottom:16px; font-weight: 700; color: #1A1A1A;'>1️⃣ &nbsp; Selecciona los recursos a documentar</h3>", unsafe_allow_html=True)
 
-all_types = sorted({r.get('resource_type', '') for r in resources_unique},
-                   key=lambda x: RT_ORDER.get(x, 99))
-
-col_f1, col_f2 = st.columns([4, 1])
-with col_f1:
-    filtro_tipo = st.multiselect(
-        "Filtrar por tipo de recurso",
-        options=all_types,
-        format_func=lambda x: RT_LABEL.get(x, x),
-        default=all_types,
-        label_visibility="collapsed",
-        placeholder="Selecciona tipos de recurso a mostrar…"
-    )
+def _hashes(flujo):
+    # Hash de cada recurso y del flujo entero (recursos + nodes), recién al abrir la primera vista
+    if 'hashes' not in flujo:
+        flujo['hashes'] = {eid: content_hash(r) for eid, r in flujo['recursos'].items()}
+        flujo['huella'] = content_hash([sorted(map(str, flujo['hashes'].values())),
+                                        content_hash(flujo['data'].get('nodes', []))])
+    return flujo['hashes'], flujo['huella']
+
+@st.cache_data(max_entries=5000, show_spinner=False)
+def _vista_html(huella_flujo, hash_recurso, _flujo, _eid):
+    # Compartido entre sesiones: el mismo recurso en el mismo flujo se renderiza una sola vez
+    return vista_recurso(_flujo['recursos'][_eid], _flujo['maps'], _flujo['rels'])
+
+def _fila(eid):
+    key = f"chk_{eid}"
+    if key not in st.session_state:
+        st.session_state[key] = st.session_state.sel.get(eid, True)
+    ca, cb = st.columns([0.3, 9.7])
+    checked = ca.checkbox("", key=key, on_change=_toggle, args=(eid,))
+    cb.markdown(_html_fila(st.session_state.flujo, eid, checked), unsafe_allow_html=True)
+    # La vista previa se arma sólo con el expander abierto; abrirlo redibuja únicamente esta tarjeta
+    vista = cb.expander("👁️  Vista previa", key=f"vista_{eid}", on_change="rerun")
+    if vista.open:
+        flujo = st.session_state.flujo
+        hashes, huella_flujo = _hashes(flujo)
+        vista.markdown(_vista_html(huella_flujo, hashes[eid], flujo, eid), unsafe_allow_html=True)
+
+@st.fragment(key="seleccion")
+def _seleccion():
+    flujo = st.session_state.flujo
+
+    col_f1, col_f2 = st.columns([4, 1])
+    with col_f1:
+        filtro_tipo = st.multiselect(
+            "Filtrar por tipo de recurso",
+            options=flujo['tipos'],
+            format_func=lambda x: RT_LABEL.get(x, x),
+            default=flujo['tipos'],
+            key="filtro_tipo",
+            on_change=lambda: st.rerun(["seleccion", "resumen"]),
+            label_visibility="collapsed",
+            placeholder="Selecciona tipos de recurso a mostrar…"
+        )
 
-resources_visible = [r for r in resources_unique
-                     if r.get('resource_type', '') in filtro_tipo]
-
-bc1, bc2, bc3 = st.columns([1, 1, 6])
-select_all   = bc1.button("✅ Todos", use_container_width=True)
-deselect_all = bc2.button("☐ Ninguno", use_container_width=True)
-
-if 'sel' not in st.session_state:
-    st.session_state.sel = {r.get('export_id'): True for r in resources_unique}
-if select_all:
-    for r in resources_visible:
-        st.session_state.sel[r.get('export_id')] = True
-if deselect_all:
-    for r in resources_visible:
-        st.session_state.sel[r.get('export_id')] = False
-
-st.write("")
-
-tipo_groups: dict = {}
-for r in resources_visible:
-    tipo_groups.setdefault(r.get('resource_type', ''), []).append(r)
-
-selected_ids = set()
-for rt in sorted(tipo_groups.keys(), key=lambda x: RT_ORDER.get(x, 99)):
-    group = tipo_groups[rt]
-    color_hex  = RT_COLOR.get(rt, "475569")
-    label  = RT_LABEL.get(rt, rt)
-
-    st.markdown(
-        f"<div style='display:flex;align-items:center;gap:12px;margin:36px 0 16px'>"
-        f"<span style='background:#{color_hex}15;color:#{color_hex};border: 1px solid #{color_hex}40;padding:6px 14px;"
-        f"border-radius:20px;font-size:0.85rem;font-weight:700;white-space:nowrap;'>"
-        f"{label}</span>"
-        f"<span style='color:#6B7280;font-size:0.85rem;font-weight:600'>{len(group)} recursos</span>"
-        f"</div>",
-        unsafe_allow_html=True
-    )
+    bc1, bc2, bc3 = st.columns([1, 1, 6])
+    bc1.button("✅ Todos", use_container_width=True, on_click=_marcar_visibles, args=(True,))
+    bc2.button("☐ Ninguno", use_container_width=True, on_click=_marcar_visibles, args=(False,))
 
-    for r in group:
-        eid   = r.get('export_id')
-        name  = r.get('name', '')
-        pars  = ", ".join(rels_all[eid]["parents"]) or "—"
-        chils = ", ".join(rels_all[eid]["children"]) or "—"
+    st.write("")
 
-        ca, cb = st.columns([0.3, 9.7])
-        checked = ca.checkbox("", value=st.session_state.sel.get(eid, True), key=f"chk_{eid}")
-        st.session_state.sel[eid] = checked
-        
-        opacity = "1" if checked else "0.55"
-        bg_color = "#FFFFFF" if checked else "#F9FAFB"
-        border_color = "#EA0050" if checked else "#E5E7EB"
-        border_width = "2px" if checked else "1px"
-        box_shadow = "0 4px 12px rgba(0,0,0,0.06)" if checked else "none"
-
-        cb.markdown(
-            f"<div style='opacity:{opacity};padding:14px 18px;background:{bg_color};border-radius:8px;margin-bottom:8px;border:{border_width} solid {border_color};box-shadow:{box_shadow};transition:all 0.2s;'>"
-            f"<div style='display:flex;justify-content:space-between;align-items:center;margin-bottom:6px'>"
-            f"<span style='font-weight:700;font-size:0.95rem;color:#1A1A1A'>{name}</span>"
-            f"<span style='font-size:0.75rem;color:#6B7280;font-family:JetBrains Mono,monospace;background:#F3F4F6;padding:4px 8px;border-radius:4px;border:1px solid #E5E7EB'>{eid}</span>"
-            f"</div>"
-            f"<div style='font-size:0.8rem;color:#6B7280;display:flex;gap:24px; font-weight: 500;'>"
-            f"<span><span style='color:#9CA3AF'>⬅️</span> &nbsp;<span style='color:#4B5563'>{pars[:75]}{'…' if len(pars)>75 else ''}</span></span>"
-            f"<span><span style='color:#9CA3AF'>➡️</span> &nbsp;<span style='color:#4B5563'>{chils[:75]}{'…' if len(chils)>75 else ''}</span></span>"
-            f"</div>"
+    for rt in flujo['tipos']:
+        if rt not in filtro_tipo:
+            continue
+        group = flujo['por_tipo'][rt]
+        color_hex  = RT_COLOR.get(rt, "475569")
+        label  = RT_LABEL.get(rt, rt)
+
+        st.markdown(
+            f"<div style='display:flex;align-items:center;gap:12px;margin:36px 0 16px'>"
+            f"<span style='background:#{color_hex}15;color:#{color_hex};border: 1px solid #{color_hex}40;padding:6px 14px;"
+            f"border-radius:20px;font-size:0.85rem;font-weight:700;white-space:nowrap;'>"
+            f"{label}</span>"
+            f"<span style='color:#6B7280;font-size:0.85rem;font-weight:600'>{len(group)} recursos</span>"
             f"</div>",
             unsafe_allow_html=True
         )
-        if checked:
-            selected_ids.add(eid)
+        # Cada tarjeta es su propio fragmento: tildar un recurso sólo la redibuja a ella
+        for eid in group:
+            st.fragment(_fila, key=f"fila_{eid}")(eid)
+
+_seleccion()
 
 # ── PASO 2: GENERAR ───────────────────────────────────────────────────────────
 st.markdown("<hr style='margin:48px 0 24px;border-color:#E5E7EB'>", unsafe_allow_html=True)
 
-n_sel = len(selected_ids)
+@st.cache_resource
+def _cola_compartida():
+    # Un único pool por proceso del servidor, compartido por todas las sesiones
+    return ColaGeneracion()
+
+def _entregar_descarga(archivo, n_recursos, nombre):
+    st.success("✅ Documentación generada con **" + str(n_recursos) + "** recursos.")
+
+    # El archivo queda en el temporal (en disco si superó el umbral) y se lee recién
+    # cuando se pide la descarga, sin copiarlo en base64 dentro del HTML de la página.
+    # Streamlit necesita los bytes: al descargar, getvalue() arma una copia entera que sirve
+    # desde memoria. Lo que se evita es tenerla antes de pedirla y entre reruns; sin copia
+    # completa sólo descarga el servicio HTTP, que lo envía por bloques.
+    mime = "application/zip" if nombre.endswith(".zip") else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    st.download_button("⬇️  Descargar " + nombre, data=archivo.getvalue, file_name=nombre, mime=mime,
+                       key="descarga", on_click="ignore", use_container_width=True)
+
+    st.markdown(_asset("animacion_entrega.html"), unsafe_allow_html=True)
+
+    import streamlit.components.v1 as components
+
+    # Dispara el botón de descarga después de 1.2s para sincronizar con la animación
+    components.html(
+        """
+        <script>
+            setTimeout(function() {
+                var btn = window.parent.document.querySelector('.st-key-descarga button');
+                if (btn) btn.click();
+            }, 1200);
+        </script>
+        """,
+        height=0
+    )
 
-if n_sel > 0:
-    tipos_sel = {}
-    for r in resources_unique:
-        if r.get('export_id') in selected_ids:
-            rt = r.get('resource_type', '')
-            tipos_sel[rt] = tipos_sel.get(rt, 0) + 1
-
-    badges_html = ""
-    for rt, cnt in sorted(tipos_sel.items(), key=lambda x: RT_ORDER.get(x[0], 99)):
-        color_hex = RT_COLOR.get(rt, "6B7280")
-        label = RT_LABEL.get(rt, rt)
-        badges_html += (
-            "<span style='background:#" + color_hex + "15;color:#" + color_hex + ";border:1px solid #" + color_hex + "30;"
-            "padding:4px 12px;border-radius:12px;font-size:0.8rem;"
-            "font-weight:700;white-space:nowrap'>"
-            + label + " (" + str(cnt) + ")"
-            "</span> "
+def _mostrar_perfil(perfil, nombre):
+    # Queda a la vista hasta la próxima generación para poder descargarlo y adjuntarlo a un ticket
+    with st.expander("⏱️  Perfil de la generación", expanded=True):
+        st.dataframe(perfil.resumen(), hide_index=True, use_container_width=True)
+        if perfil.asignaciones():
+            st.caption("Asignaciones que quedaron vivas al cerrar cada fase (tracemalloc)")
+            st.dataframe(perfil.asignaciones(), hide_index=True, use_container_width=True)
+        base = os.path.splitext(nombre)[0]
+        c1, c2 = st.columns(2)
+        c1.download_button("⬇️  Stats de cProfile (.prof)", data=perfil.prof_bytes, file_name=base + ".prof",
+                           mime="application/octet-stream", key="descarga_prof", on_click="ignore",
+                           use_container_width=True)
+        c2.download_button("⬇️  Resumen (.txt)", data=perfil.informe, file_name=base + "_perfil.txt",
+                           mime="text/plain", key="descarga_perfil", on_click="ignore",
+                           use_container_width=True)
+
+
+@st.fragment(key="resumen")
+def _resumen():
+    flujo  = st.session_state.flujo
+    filtro = st.session_state.get('filtro_tipo', flujo['tipos'])
+
+    tipos_sel = {rt: n for rt, n in st.session_state.tipos_sel.items() if rt in filtro and n}
+    n_sel     = sum(tipos_sel.values())
+
+    if n_sel > 0:
+        badges_html = ""
+        for rt, cnt in sorted(tipos_sel.items(), key=lambda x: RT_ORDER.get(x[0], 99)):
+            color_hex = RT_COLOR.get(rt, "6B7280")
+            label = RT_LABEL.get(rt, rt)
+            badges_html += (
+                "<span style='background:#" + color_hex + "15;color:#" + color_hex + ";border:1px solid #" + color_hex + "30;"
+                "padding:4px 12px;border-radius:12px;font-size:0.8rem;"
+                "font-weight:700;white-space:nowrap'>"
+                + label + " (" + str(cnt) + ")"
+                "</span> "
+            )
+
+        sel_label = "seleccionados" if n_sel != 1 else "seleccionado"
+        resumen_html = (
+            "<div style='background:#FFFFFF;border:1px solid #E5E7EB;border-radius:12px;padding:16px 20px;"
+            "margin-bottom:20px;display:flex;align-items:center;gap:12px;flex-wrap:wrap;box-shadow:0 2px 8px rgba(0,0,0,0.04)'>"
+            "<span style='font-weight:700;color:#1A1A1A;white-space:nowrap;font-size:1.05rem'>📋 "
+            + str(n_sel) + " " + sel_label + ":</span>"
+            + badges_html
+            + "</div>"
         )
-
-    sel_label = "seleccionados" if n_sel != 1 else "seleccionado"
-    resumen_html = (
-        "<div style='background:#FFFFFF;border:1px solid #E5E7EB;border-radius:12px;padding:16px 20px;"
-        "margin-bottom:20px;display:flex;align-items:center;gap:12px;flex-wrap:wrap;box-shadow:0 2px 8px rgba(0,0,0,0.04)'>"
-        "<span style='font-weight:700;color:#1A1A1A;white-space:nowrap;font-size:1.05rem'>📋 "
-        + str(n_sel) + " " + sel_label + ":</span>"
-        + badges_html
-        + "</div>"
+        st.markdown(resumen_html, unsafe_allow_html=True)
+    else:
+        st.warning("Selecciona al menos un recurso para continuar.")
+        return
+
+    modo_salida = st.radio(
+        "Formato de salida",
+        options=["unico", *MODOS_SPLIT, *FORMATOS_SITIO],
+        format_func=lambda m: "Un solo Excel" if m == "unico" else {**MODOS_SPLIT, **FORMATOS_SITIO}[m] + " (zip)",
+        horizontal=True,
+        help="Para flujos grandes conviene dividir: cada Excel abre más rápido y se generan en paralelo. "
+             "El sitio HTML o Markdown trae una página por recurso y se genera en una fracción del tiempo",
     )
-    st.markdown(resumen_html, unsafe_allow_html=True)
-else:
-    st.warning("Selecciona al menos un recurso para continuar.")
-    st.stop()
 
-nombre_dl = "skt_doc_" + os.path.splitext(up.name)[0] + "_" + datetime.now().strftime('%Y-%m-%d_%H%M') + ".xlsx"
-
-if st.button("🚀  Generar documentación", type="primary", use_container_width=True):
-    prog = st.progress(0, text="Iniciando...")
-    try:
-        prog.progress(15, text="Procesando recursos...")
-        prog.progress(40, text="Resolviendo grupos conciliables...")
-        prog.progress(65, text="Construyendo reglas de conciliacion...")
-        excel_bytes = generar_excel(data, selected_ids)
-        prog.progress(90, text="Aplicando estilos...")
-        prog.progress(100, text="Listo.")
-        st.success("✅ Documentación generada con **" + str(n_sel) + "** recursos.")
-        
-        # Codificamos el Excel a base64 para inyectarlo en el HTML
-        b64 = base64.b64encode(excel_bytes.getvalue()).decode()
-        dl_link = f"data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}"
-
-        st.markdown("""
-<style>
-@keyframes ride1{0%{left:-180px;opacity:0}6%{opacity:1}85%{opacity:1}100%{left:110vw;opacity:0}}
-@keyframes ride2{0%{left:-180px;opacity:0}6%{opacity:1}85%{opacity:1}100%{left:110vw;opacity:0}}
-@keyframes ride3{0%{left:-180px;opacity:0}6%{opacity:1}85%{opacity:1}100%{left:110vw;opacity:0}}
-@keyframes wspin{from{transform:rotate(0)}to{transform:rotate(360deg)}}
-@keyframes road-anim{from{stroke-dashoffset:0}to{stroke-dashoffset:-60}}
-@keyframes popin2{0%{transform:translate(-50%,-50%) scale(0);opacity:0}65%{transform:translate(-50%,-50%) scale(1.1);opacity:1}100%{transform:translate(-50%,-50%) scale(1);opacity:1}}
-@keyframes fadein2{0%{opacity:0;transform:translateX(-50%) translateY(8px)}100%{opacity:1;transform:translateX(-50%) translateY(0)}}
-@keyframes overlay-fade{0%{opacity:1}78%{opacity:1}100%{opacity:0;pointer-events:none}}
-.py-overlay{position:fixed;top:0;left:0;width:100vw;height:100vh;z-index:99999;background:rgba(15,15,20,0.88);animation:overlay-fade 4.4s ease .1s both;pointer-events:none;backdrop-filter:blur(4px)}
-.py-road-svg{position:absolute;bottom:0;left:0;width:100%;height:32px}
-.py-road-line{animation:road-anim .35s linear infinite}
-.py-m1{position:absolute;bottom:32px;animation:ride1 3.4s cubic-bezier(.2,.8,.4,1) 0.0s both}
-.py-m2{position:absolute;bottom:44px;animation:ride2 3.4s cubic-bezier(.2,.8,.4,1) 0.5s both}
-.py-m3{position:absolute;bottom:24px;animation:ride3 3.4s cubic-bezier(.2,.8,.4,1) 1.0s both}
-.py-w{transform-origin:50% 50%;animation:wspin .22s linear infinite}
-.py-trail{position:absolute;right:100%;top:50%;transform:translateY(-50%);width:70px;height:4px;background:linear-gradient(90deg,transparent,#EA005044);border-radius:2px}
-.py-check2{position:absolute;top:50%;left:50%;width:110px;height:110px;background:#EA0050;border-radius:50%;display:flex;align-items:center;justify-content:center;animation:popin2 .6s cubic-bezier(.175,.885,.32,1.275) .3s both;box-shadow:0 12px 40px rgba(234,0,80,0.6)}
-.py-msg2{position:absolute;top:calc(50% + 85px);left:50%;font-family:Inter,system-ui,sans-serif;font-size:1.2rem;font-weight:700;color:#FFFFFF;background:#EA0050;padding:12px 36px;border-radius:30px;border:none;white-space:nowrap;animation:fadein2 .4s ease .8s both;letter-spacing:.3px;box-shadow:0 8px 32px rgba(234,0,80,0.4)}
-</style>
-<div class="py-overlay">
-  <svg class="py-road-svg">
-    <rect width="100%" height="32" fill="#111118"/>
-    <line x1="0" y1="8" x2="100%" y2="8" stroke="#2A2A35" stroke-width="1"/>
-    <line class="py-road-line" x1="0" y1="16" x2="100%" y2="16" stroke="#EA0050" stroke-width="2.5" stroke-dasharray="36 24" opacity=".6"/>
-    <line x1="0" y1="31" x2="100%" y2="31" stroke="#2A2A35" stroke-width="1"/>
-  </svg>
-  <div class="py-m1"><div style="position:relative"><div class="py-trail"></div>
-    <svg width="130" height="68" viewBox="0 0 110 58">
-      <rect x="20" y="14" width="56" height="18" rx="7" fill="#EA0050"/>
-      <polygon points="76,14 90,20 90,28 76,32" fill="#C0003A"/>
-      <polygon points="76,14 84,10 90,14 88,14 78,14" fill="#cceeff" opacity=".75"/>
-      <rect x="86" y="11" width="3" height="11" rx="1.5" fill="#1A1A1A"/>
-      <ellipse cx="36" cy="13" rx="10" ry="7" fill="#111"/>
-      <ellipse cx="39" cy="14" rx="4" ry="3" fill="#EA0050"/>
-      <rect x="30" y="19" width="16" height="9" rx="3" fill="#111"/>
-      <rect x="22" y="18" width="16" height="14" rx="2" fill="#EA0050" stroke="#fff" stroke-width="1.2"/>
-      <text x="30" y="28.5" font-size="6.5" fill="white" text-anchor="middle" font-weight="800" font-family="Arial Black,Arial">PeYa</text>
-      <rect x="16" y="26" width="10" height="3" rx="1.5" fill="#6B7280"/>
-      <line x1="76" y1="29" x2="85" y2="42" stroke="#9CA3AF" stroke-width="2"/>
-      <line x1="29" y1="30" x2="20" y2="42" stroke="#9CA3AF" stroke-width="2"/>
-      <g transform="translate(85,43)"><circle r="11" fill="#F4F5F7"/><circle r="8" fill="#1A1A1A"/><g class="py-w"><line x1="0" y1="-6.5" x2="0" y2="6.5" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-6.5" y1="0" x2="6.5" y2="0" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-4.6" y1="-4.6" x2="4.6" y2="4.6" stroke="#9CA3AF" stroke-width="1"/><line x1="4.6" y1="-4.6" x2="-4.6" y2="4.6" stroke="#9CA3AF" stroke-width="1"/></g><circle r="3" fill="#EA0050"/></g>
-      <g transform="translate(20,43)"><circle r="12" fill="#F4F5F7"/><circle r="9" fill="#1A1A1A"/><g class="py-w"><line x1="0" y1="-7" x2="0" y2="7" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-7" y1="0" x2="7" y2="0" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-5" y1="-5" x2="5" y2="5" stroke="#9CA3AF" stroke-width="1"/><line x1="5" y1="-5" x2="-5" y2="5" stroke="#9CA3AF" stroke-width="1"/></g><circle r="3.5" fill="#EA0050"/></g>
-    </svg>
-  </div></div>
-  <div class="py-m2"><div style="position:relative"><div class="py-trail"></div>
-    <svg width="108" height="56" viewBox="0 0 110 58">
-      <rect x="20" y="14" width="56" height="18" rx="7" fill="#C0003A"/>
-      <polygon points="76,14 90,20 90,28 76,32" fill="#A00030"/>
-      <polygon points="76,14 84,10 90,14 88,14 78,14" fill="#cceeff" opacity=".7"/>
-      <rect x="86" y="11" width="3" height="11" rx="1.5" fill="#1A1A1A"/>
-      <ellipse cx="36" cy="13" rx="10" ry="7" fill="#EA0050"/>
-      <ellipse cx="39" cy="14" rx="4" ry="3" fill="#fff" opacity=".6"/>
-      <rect x="30" y="19" width="16" height="9" rx="3" fill="#EA0050"/>
-      <rect x="22" y="18" width="16" height="14" rx="2" fill="#C0003A" stroke="#fff" stroke-width="1.2"/>
-      <text x="30" y="28.5" font-size="6.5" fill="white" text-anchor="middle" font-weight="800" font-family="Arial Black,Arial">PeYa</text>
-      <rect x="16" y="26" width="10" height="3" rx="1.5" fill="#6B7280"/>
-      <line x1="76" y1="29" x2="85" y2="42" stroke="#9CA3AF" stroke-width="2"/>
-      <line x1="29" y1="30" x2="20" y2="42" stroke="#9CA3AF" stroke-width="2"/>
-      <g transform="translate(85,43)"><circle r="11" fill="#F4F5F7"/><circle r="8" fill="#1A1A1A"/><g class="py-w"><line x1="0" y1="-6.5" x2="0" y2="6.5" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-6.5" y1="0" x2="6.5" y2="0" stroke="#D1D5DB" stroke-width="1.5"/></g><circle r="3" fill="#C0003A"/></g>
-      <g transform="translate(20,43)"><circle r="12" fill="#F4F5F7"/><circle r="9" fill="#1A1A1A"/><g class="py-w"><line x1="0" y1="-7" x2="0" y2="7" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-7" y1="0" x2="7" y2="0" stroke="#D1D5DB" stroke-width="1.5"/></g><circle r="3.5" fill="#C0003A"/></g>
-    </svg>
-  </div></div>
-  <div class="py-m3"><div style="position:relative"><div class="py-trail"></div>
-    <svg width="90" height="48" viewBox="0 0 110 58">
-      <rect x="20" y="14" width="56" height="18" rx="7" fill="#EA0050"/>
-      <polygon points="76,14 90,20 90,28 76,32" fill="#C0003A"/>
-      <polygon points="76,14 84,10 90,14 88,14 78,14" fill="#cceeff" opacity=".7"/>
-      <rect x="86" y="11" width="3" height="11" rx="1.5" fill="#1A1A1A"/>
-      <ellipse cx="36" cy="13" rx="10" ry="7" fill="#222"/>
-      <ellipse cx="39" cy="14" rx="4" ry="3" fill="#EA0050"/>
-      <rect x="30" y="19" width="16" height="9" rx="3" fill="#222"/>
-      <rect x="22" y="18" width="16" height="14" rx="2" fill="#EA0050" stroke="#fff" stroke-width="1.2"/>
-      <text x="30" y="28.5" font-size="6.5" fill="white" text-anchor="middle" font-weight="800" font-family="Arial Black,Arial">PeYa</text>
-      <rect x="16" y="26" width="10" height="3" rx="1.5" fill="#6B7280"/>
-      <line x1="76" y1="29" x2="85" y2="42" stroke="#9CA3AF" stroke-width="2"/>
-      <line x1="29" y1="30" x2="20" y2="42" stroke="#9CA3AF" stroke-width="2"/>
-      <g transform="translate(85,43)"><circle r="11" fill="#F4F5F7"/><circle r="8" fill="#1A1A1A"/><g class="py-w"><line x1="0" y1="-6.5" x2="0" y2="6.5" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-6.5" y1="0" x2="6.5" y2="0" stroke="#D1D5DB" stroke-width="1.5"/></g><circle r="3" fill="#EA0050"/></g>
-      <g transform="translate(20,43)"><circle r="12" fill="#F4F5F7"/><circle r="9" fill="#1A1A1A"/><g class="py-w"><line x1="0" y1="-7" x2="0" y2="7" stroke="#D1D5DB" stroke-width="1.5"/><line x1="-7" y1="0" x2="7" y2="0" stroke="#D1D5DB" stroke-width="1.5"/></g><circle r="3.5" fill="#EA0050"/></g>
-    </svg>
-  </div></div>
-  <div class="py-check2">
-    <svg width="56" height="56" viewBox="0 0 36 36" fill="none">
-      <polyline points="5,18 13,27 31,9" stroke="white" stroke-width="4" stroke-linecap="round" stroke-linejoin="round"/>
-    </svg>
-  </div>
-  <div class="py-msg2">Pedido listo, la documentación se descargará automáticamente</div>
-</div>
-""", unsafe_allow_html=True)
-        
-        # Componente que dispara la descarga automáticamente después de 1.2s para sincronizar con la animación
-        components.html(
-            f"""
-            <a id="auto_dl" href="{dl_link}" download="{nombre_dl}"></a>
-            <script>
-                setTimeout(function() {{
-                    document.getElementById('auto_dl').click();
-                }}, 1200);
-            </script>
-            """,
-            height=0
-        )
-        
-    except Exception as e:
-        prog.empty()
-        st.error(f"Error al generar el Excel: {e}")
-        import traceback
-        st.code(traceback.format_exc())
+    reproducible = st.toggle(
+        "Salida reproducible", key="reproducible",
+        help="Mismo export y misma selección → exactamente los mismos bytes (sin hora de generación)",
+    )
+    perfilar = st.toggle(
+        "Perfilar generación", key="perfilar", disabled=modo_salida != "unico",
+        help="Mide tiempo y memoria por fase (cProfile + tracemalloc). La generación tarda varias veces más; "
+             "sólo disponible para un solo Excel",
+    )
+    linaje = st.toggle(
+        "Hoja de linaje", key="linaje", disabled=modo_salida != "unico",
+        help="Agrega al Excel la hoja 🗺️ Linaje: el diagrama por niveles con un link a cada recurso. "
+             "El sitio HTML o Markdown siempre trae diagrama.svg",
+    )
+    sin_combinar = st.toggle(
+        "Sin celdas combinadas", key="sin_combinar", disabled=modo_salida in FORMATOS_SITIO,
+        help="Títulos centrados en la selección y columnas anchas en lugar de rangos combinados: "
+             "en flujos grandes genera varias veces más rápido y el Excel pesa menos",
+    )
+    layout = "sin_combinar" if sin_combinar else "combinado"
+    errores = resumen_integridad(flujo['integridad'])['error']
+    bloquear = st.toggle(
+        "Bloquear si hay errores de integridad", key="bloquear",
+        help="No genera mientras el export tenga referencias rotas, ids repetidos o ciclos en nodes",
+    )
+    if bloquear and errores:
+        st.error(f"El export tiene {errores} errores de integridad (ver 🩺 Integridad del export).")
+    ext = ".xlsx" if modo_salida == "unico" else ".zip"
+    nombre_dl = "skt_doc_" + os.path.splitext(flujo['nombre'])[0] + "_" + datetime.now().strftime('%Y-%m-%d_%H%M') + ext
+
+    selected_ids = {eid for rt in filtro for eid in flujo['por_tipo'].get(rt, [])
+                    if st.session_state.sel.get(eid, True)}
+    est = estimar(flujo['data'], selected_ids, por_recurso=flujo['estimaciones'], layout=layout)
+    motor = (ESTRATEGIAS[est['estrategia']] if modo_salida == "unico"
+             else "sin Excel" if modo_salida in FORMATOS_SITIO else "se elige por archivo")
+    st.caption(f"📐 Estimación: {est['hojas']:,} hojas · {est['filas']:,} filas · {est['celdas']:,} celdas · "
+               f"{est['merges']:,} rangos combinados · {est['texto_kb']:,.0f} KB de texto  →  "
+               f"**{motor}**".replace(",", "."))
+
+    cola = _cola_compartida()
+    job  = st.session_state.get('job')
+
+    if st.button("🚀  Generar documentación", type="primary", use_container_width=True,
+                 disabled=bool(job and job.activo) or bool(bloquear and errores)) and not (job and job.activo):
+        if reproducible:
+            nombre_dl = "skt_doc_" + os.path.splitext(flujo['nombre'])[0] + "_" + huella(flujo['data'], selected_ids) + ext
+        try:
+            job = st.session_state.job = cola.enviar(flujo['data'], selected_ids, modo_salida,
+                                                     determinista=reproducible, perfilar=perfilar,
+                                                     bloquear=bloquear, linaje=linaje, layout=layout)
+            st.session_state.job_nombre = nombre_dl
+            st.session_state.pop('perfil', None)
+        except ColaLlena as e:
+            st.warning(str(e))
+
+    # Trabajo terminado: se entrega una única vez y se libera de la sesión
+    if job is not None and not job.activo:
+        del st.session_state['job']
+        if job.estado == "listo":
+            _entregar_descarga(job.resultado, job.n_recursos, st.session_state.get('job_nombre', nombre_dl))
+            if job.perfil is not None:
+                st.session_state.perfil = (job.perfil, st.session_state.get('job_nombre', nombre_dl))
+        elif job.estado == "error":
+            st.error("Error al generar el Excel.")
+            st.code(job.error)
+        else:
+            st.info("Generación cancelada.")
+        job = None
+
+    if st.session_state.get('perfil'):
+        _mostrar_perfil(*st.session_state.perfil)
+
+    @st.fragment(run_every=1 if job and job.activo else None)
+    def _estado_trabajo():
+        # Sólo este bloque se refresca mientras el trabajo corre; el resto de la página queda usable
+        job = st.session_state.get('job')
+        if job is None:
+            return
+        if not job.activo:
+            st.rerun()
+        if job.estado == "en_cola":
+            st.progress(0, text=f"⏳ En cola · posición {cola.posicion(job)} de {cola.en_espera()} "
+                                f"(máx. {cola.max_workers} generaciones simultáneas)")
+        else:
+            pct = int(100 * job.hechos / job.total) if job.total else 0
+            unidad = {"unico": "hoja", **dict.fromkeys(FORMATOS_SITIO, "página")}.get(job.modo, "archivo")
+            st.progress(pct, text=f"Generando {unidad} {job.hechos} de {job.total}...")
+        if st.button("✖ Cancelar", key="cancelar_job"):
+            cola.cancelar(job)
+            st.rerun()
+
+    _estado_trabajo()
+
+_resumen()
+
+# ── COMPARAR CON OTRO EXPORT ──────────────────────────────────────────────────
+@st.fragment(key="comparar")
+def _comparar():
+    flujo = st.session_state.flujo
+    with st.expander("🔀  Comparar con otro export del flujo"):
+        versiones = []
+        if STORE_DIR:
+            versiones = [v for v in _almacen().versiones(_flujo_id(flujo['nombre']))
+                         if v['version'] != flujo['version']]
+        guardada = None
+        if versiones:
+            guardada = st.selectbox(
+                "Versión guardada", options=[None, *versiones],
+                format_func=lambda v: "— subir un archivo —" if v is None else
+                    datetime.fromtimestamp(v['guardado']).strftime('%Y-%m-%d %H:%M') + f"  ·  {v['recursos']} recursos",
+                key="version_anterior")
+        otro = None if guardada else st.file_uploader("Export anterior (se compara contra el cargado arriba)",
+                                                      type=['json'], key="up_anterior")
+        if not (otro or guardada):
+            return
+        # El diff sólo se recalcula si cambia alguno de los dos lados
+        clave = (guardada['version'] if guardada else otro.file_id, flujo['hash'])
+        cache = st.session_state.get('diff')
+        if cache is None or cache[0] != clave:
+            antes = (_almacen().cargar(_flujo_id(flujo['nombre']), guardada['version']) if guardada
+                     else json.load(otro))
+            cache = st.session_state.diff = (clave, diff_exports(antes, flujo['data']))
+        diff = cache[1]
+
+        res = diff['resumen']
+        cols = st.columns(4)
+        for col, (label, valor, color) in zip(cols, [
+                ("Agregados", res['agregados'], "#16A34A"), ("Eliminados", res['eliminados'], "#EA0050"),
+                ("Modificados", res['modificados'], "#D97706"), ("Sin cambios", res['sin_cambios'], "#6B7280")]):
+            col.markdown(_metric_card(label, valor, color), unsafe_allow_html=True)
+
+        if not diff['cambios']:
+            st.info("Los dos exports son idénticos.")
+            return
+        st.dataframe(diff['cambios'], use_container_width=True, hide_index=True)
+
+        from simetrik_docs import generar_excel_cambios
+        base = "skt_cambios_" + os.path.splitext(flujo['nombre'])[0]
+        c1, c2 = st.columns(2)
+        c1.download_button("⬇️  Hoja de cambios (Excel)", data=lambda: generar_excel_cambios(diff).getvalue(),
+                           file_name=base + ".xlsx", use_container_width=True,
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        c2.download_button("⬇️  Cambios (JSON)", file_name=base + ".json", mime="application/json",
+                           data=json.dumps(diff, ensure_ascii=False, indent=2), use_container_width=True)
+
+_comparar()
 
 st.markdown("<hr style='margin:32px 0;border-color:#E5E7EB'>", unsafe_allow_html=True)
 st.caption("Simetrik Documentation · PeYa Finance Operations & Payments · v2.2 · Jef")
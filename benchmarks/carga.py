@@ -0,0 +1,248 @@
+"""Prueba de carga de la página Streamlit: N sesiones concurrentes con AppTest.
+
+    python benchmarks/carga.py --sesiones 12 --recursos 120
+    python benchmarks/carga.py --sesiones 30 --rondas 2 --modo tipo --json carga.json
+    python benchmarks/carga.py --sesiones 8 --max-p95-ms 1500      # gate para CI
+
+Cada sesión es un AppTest en su propio hilo contra app_simetrik.py, todas en este mismo
+proceso como en un servidor Streamlit (cache_resource y la cola de generación se
+comparten). Cada una sube su propio export sintético, tilda y destilda recursos, filtra
+por tipo y genera, midiendo cada interacción:
+
+    carga      primer run con el archivo subido (parseo y precálculo de la página)
+    tildar     cambiar el checkbox de un recurso (rerun de su tarjeta y del resumen)
+    filtrar    cambiar el filtro de tipos (rerun de la lista y del resumen)
+    rerun      rerun completo del script: lo que cuesta cualquier widget fuera de un
+               fragmento o volver a cargar la página
+    generar    click en Generar hasta que la descarga está lista (incluye la espera en cola)
+    sondeo     cada rerun mientras la generación corre
+
+Los callbacks que piden st.rerun(fragmentos) corren como en el navegador, sólo esos
+fragmentos; como después el árbol de AppTest tiene sólo lo redibujado, antes de buscar
+el próximo widget se hace un rerun completo (que se mide como "rerun"). El RSS se
+muestrea en un hilo aparte y el pico es el del proceso entero; en los modos divididos
+se informa aparte el pico del mayor proceso hijo. Sale con código 1 si alguna sesión
+falla o si el p95 de tildar/filtrar/rerun supera --max-p95-ms.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP  = os.path.join(ROOT, "app_simetrik.py")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sintetico import export_sintetico  # noqa: E402
+
+INTERACCIONES = ("carga", "tildar", "filtrar", "rerun", "generar", "sondeo")
+RERUNS        = ("tildar", "filtrar", "rerun")   # las que cubre el presupuesto de --max-p95-ms
+
+
+class _Subida(io.BytesIO):
+    """Lo que devuelve st.file_uploader: bytes con name y file_id."""
+
+    def __init__(self, raw, name, file_id):
+        super().__init__(raw)
+        self.name, self.file_id = name, file_id
+
+
+def _uploader_falso(exports):
+    import streamlit as st
+
+    def file_uploader(*args, key=None, **kwargs):
+        # Sólo el uploader principal; el de "Comparar" (con key) queda vacío
+        n = st.session_state.get("_carga_export")
+        if key is not None or n is None:
+            return None
+        raw = exports[n]
+        return _Subida(raw, f"sintetico_{n}.json", f"carga-{n}")
+    return file_uploader
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (sin interpolar) de una lista no vacía."""
+    orden = sorted(valores)
+    return orden[max(0, math.ceil(p / 100 * len(orden)) - 1)]
+
+
+class MuestreoRSS(threading.Thread):
+    def __init__(self, intervalo=0.1):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico      = self.actual()
+        self.inicial   = self.pico
+        self._fin      = threading.Event()
+
+    @staticmethod
+    def actual():
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def run(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, self.actual())
+
+    def detener(self):
+        self._fin.set()
+        self.join()
+        # ru_maxrss (KB en Linux) no se pierde picos entre muestras
+        self.pico = max(self.pico, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+class Sesion(threading.Thread):
+    def __init__(self, n, args, ids, tipos, largada, medidas):
+        super().__init__(name=f"sesion-{n}", daemon=True)
+        self.n, self.args, self.ids, self.tipos = n, args, ids, tipos
+        self.largada = largada
+        self.medidas = medidas
+        self.errores = []
+        self.rnd     = random.Random(n)
+
+    def _medir(self, nombre, fn):
+        t0 = time.perf_counter()
+        at = fn()
+        self.medidas[nombre].append((time.perf_counter() - t0) * 1000)
+        if at is not None and at.exception:
+            self.errores.append(f"{nombre}: {at.exception[0].value}")
+        return at
+
+    def _widget(self, at, buscar):
+        # Tras un rerun parcial el árbol sólo tiene los fragmentos redibujados
+        try:
+            return buscar()
+        except (KeyError, StopIteration):
+            self._medir("rerun", at.run)
+            return buscar()
+
+    def run(self):
+        try:
+            self._sesion()
+        except Exception as e:   # una sesión caída se informa, no corta la prueba
+            self.errores.append(f"{type(e).__name__}: {e}")
+
+    def _sesion(self):
+        from streamlit.testing.v1 import AppTest
+        args = self.args
+        at = AppTest.from_file(APP, default_timeout=args.timeout)
+        at.session_state["_carga_export"] = 0 if args.mismo_export else self.n
+        self.largada.wait()
+        self._medir("carga", at.run)
+
+        for _ in range(args.rondas):
+            for eid in self.rnd.sample(self.ids, min(args.tildes, len(self.ids))):
+                cb = self._widget(at, lambda: at.checkbox(key=f"chk_{eid}"))
+                self._medir("tildar", cb.set_value(not cb.value).run)
+            if len(self.tipos) > 1:
+                for tipos in (self.tipos[:-1], self.tipos):
+                    ms = self._widget(at, lambda: at.multiselect(key="filtro_tipo"))
+                    self._medir("filtrar", ms.set_value(tipos).run)
+            if args.modo != "unico":
+                radio = self._widget(at, lambda: next(r for r in at.radio if r.label == "Formato de salida"))
+                radio.set_value(args.modo).run()
+            self._generar(at)
+
+    def _generar(self, at):
+        boton = self._widget(at, lambda: next(b for b in at.button if "Generar" in b.label))
+        t0 = time.perf_counter()
+        self._medir("sondeo", boton.click().run)
+        limite = t0 + self.args.timeout
+        while time.perf_counter() < limite:
+            if at.success or at.error:
+                break
+            time.sleep(self.args.sondeo)
+            self._medir("sondeo", at.run)
+        self.medidas["generar"].append((time.perf_counter() - t0) * 1000)
+        if at.error:
+            self.errores.append("generar: " + at.error[0].value)
+        elif not at.success:
+            self.errores.append(f"generar: sin resultado en {self.args.timeout}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sesiones", type=int, default=8)
+    parser.add_argument("--recursos", type=int, default=80, help="Recursos del export sintético")
+    parser.add_argument("--rondas", type=int, default=1, help="Ciclos tildar/filtrar/generar por sesión")
+    parser.add_argument("--tildes", type=int, default=5, help="Checkboxes que cambia cada ronda")
+    parser.add_argument("--modo", default="unico", choices=["unico", "tipo", "cadena", "html", "md"])
+    parser.add_argument("--mismo-export", action="store_true",
+                        help="Todas las sesiones suben el mismo archivo (por defecto uno distinto cada una)")
+    parser.add_argument("--timeout", type=float, default=600, help="Segundos máximos por generación")
+    parser.add_argument("--sondeo", type=float, default=0.5, help="Segundos entre reruns mientras genera")
+    parser.add_argument("--max-p95-ms", type=float, help="Presupuesto del p95 de tildar/filtrar")
+    parser.add_argument("--json", dest="json_out", help="Resultados en JSON")
+    args = parser.parse_args(argv)
+
+    from simetrik_docs import RT_ORDER
+    n_exports = 1 if args.mismo_export else args.sesiones
+    datos     = [export_sintetico(args.recursos, seed=n + 1) for n in range(n_exports)]
+    exports   = [json.dumps(d).encode() for d in datos]
+
+    def ids_y_tipos(n):
+        recursos = datos[0 if args.mismo_export else n]["resources"]
+        tipos = sorted({r["resource_type"] for r in recursos}, key=lambda t: RT_ORDER.get(t, 99))
+        return [r["export_id"] for r in recursos], tipos
+
+    medidas = {k: [] for k in INTERACCIONES}
+    rss     = MuestreoRSS()
+    largada = threading.Barrier(args.sesiones)
+    with mock.patch("streamlit.file_uploader", _uploader_falso(exports)):
+        sesiones = [Sesion(n, args, *ids_y_tipos(n), largada, {k: [] for k in INTERACCIONES})
+                    for n in range(args.sesiones)]
+        rss.start()
+        t0 = time.perf_counter()
+        for s in sesiones:
+            s.start()
+        for s in sesiones:
+            s.join()
+        total = time.perf_counter() - t0
+        rss.detener()
+    for s in sesiones:
+        for k, v in s.medidas.items():
+            medidas[k] += v
+
+    filas = {}
+    print(f"{args.sesiones} sesiones · {args.recursos} recursos · modo {args.modo} · {total:.1f} s\n")
+    print(f"{'INTERACCIÓN':<12}{'N':>6}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'máx':>10}   (ms)")
+    for k in INTERACCIONES:
+        v = medidas[k]
+        if not v:
+            continue
+        filas[k] = {'n': len(v), **{f'p{p}': round(percentil(v, p), 1) for p in (50, 90, 95, 99)},
+                    'max': round(max(v), 1)}
+        f = filas[k]
+        print(f"{k:<12}{f['n']:>6}{f['p50']:>10.0f}{f['p90']:>10.0f}{f['p95']:>10.0f}{f['p99']:>10.0f}{f['max']:>10.0f}")
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    print(f"\nRSS inicial {rss.inicial / 2**20:.0f} MB · pico {rss.pico / 2**20:.0f} MB "
+          f"(+{(rss.pico - rss.inicial) / 2**20:.0f} MB)"
+          + (f" · mayor proceso hijo {hijos / 2**20:.0f} MB" if hijos else ""))
+
+    errores = [(s.name, e) for s in sesiones for e in s.errores]
+    for nombre, e in errores[:20]:
+        print(f"ERROR {nombre}: {e}")
+    p95 = max((filas[k]['p95'] for k in RERUNS if k in filas), default=0)
+    excedido = args.max_p95_ms is not None and p95 > args.max_p95_ms
+    if excedido:
+        print(f"FAIL p95 de reruns {p95:.0f} ms > presupuesto {args.max_p95_ms:.0f} ms")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({'sesiones': args.sesiones, 'recursos': args.recursos, 'modo': args.modo,
+                       'segundos': round(total, 2), 'interacciones': filas,
+                       'rss_inicial_mb': round(rss.inicial / 2**20, 1), 'rss_pico_mb': round(rss.pico / 2**20, 1),
+                       'rss_hijo_mb': round(hijos / 2**20, 1),
+                       'errores': [f"{n}: {e}" for n, e in errores]}, f, ensure_ascii=False, indent=2)
+    return 1 if errores or excedido else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Benchmark de import en frío con `python -X importtime`, con presupuesto por módulo.
+
+    python benchmarks/importtime.py            # todos los módulos de BUDGETS_MS
+    python benchmarks/importtime.py --runs 10 --module simetrik_docs
+
+Cada medición corre en un intérprete nuevo y se toma la mediana del tiempo acumulado
+del módulo. Sale con código 1 si algún módulo supera su presupuesto o si arrastra
+alguna dependencia pesada de HEAVY, así se puede usar como gate en CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto (ms) del tiempo acumulado de import en frío
+BUDGETS_MS = {
+    "simetrik_docs":        60,
+    "simetrik_docs.server": 150,
+}
+
+# Dependencias que la librería sólo debe cargar al renderizar
+HEAVY = ("pandas", "openpyxl", "streamlit")
+
+
+def medir(modulo):
+    """Tiempo acumulado (ms) de `import modulo` en un proceso nuevo."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == modulo and not parts[2].startswith("  "):
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No se encontró {modulo} en la salida de -X importtime")
+
+def pesados(modulo):
+    """Dependencias de HEAVY que quedan en sys.modules tras importar el módulo."""
+    code = f"import sys, {modulo}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout.strip()
+    return [m for m in out.split(",") if m]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", action="append", help="Módulo a medir (repetible)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    fallas = 0
+    for modulo in args.module or list(BUDGETS_MS):
+        tiempos = [medir(modulo) for _ in range(args.runs)]
+        mediana = statistics.median(tiempos)
+        budget  = BUDGETS_MS.get(modulo)
+        extra   = pesados(modulo)
+        ok      = (budget is None or mediana <= budget) and not extra
+        fallas += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {modulo:<24} mediana {mediana:7.1f} ms"
+              f"  (min {min(tiempos):.1f}, máx {max(tiempos):.1f}, presupuesto {budget or '—'} ms)"
+              + (f"  importa {', '.join(extra)}" if extra else ""))
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
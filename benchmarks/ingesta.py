@@ -0,0 +1,81 @@
+"""Benchmark de la ingesta del export: copia en memoria (como UploadedFile) vs mmap.
+
+    python benchmarks/ingesta.py                      # export sintético de 2000 recursos
+    python benchmarks/ingesta.py --export flujo.json --runs 5
+
+"subido" reproduce lo que hace la página con un archivo del navegador: los bytes enteros
+en un BytesIO, el sha256 sobre ellos y json.load. "mmap" es la lectura desde la carpeta del
+servidor (ExportMapeado). Reporta la mediana del tiempo y el pico de memoria asignada por
+Python (tracemalloc) de hash + parseo; el mapeo en sí no cuenta, lo respalda el page cache.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sintetico import export_sintetico  # noqa: E402
+from simetrik_docs.locales import ExportMapeado  # noqa: E402
+from simetrik_docs.sesiones import hash_export  # noqa: E402
+
+
+def subido(ruta):
+    with open(ruta, "rb") as f:
+        up = io.BytesIO(f.read())
+    with up.getbuffer() as buffer:
+        hash_export(buffer)
+    return json.load(up)
+
+def mapeado(ruta):
+    with ExportMapeado(ruta) as export:
+        hash_export(export.buffer)
+        return export.cargar()
+
+def medir(fn, ruta, runs):
+    tiempos = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(ruta)
+        tiempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(ruta)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--export", help="Export JSON (por defecto uno sintético)")
+    parser.add_argument("--recursos", type=int, default=2000, help="Recursos del export sintético")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    ruta, temporal = args.export, None
+    if not ruta:
+        temporal = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+        with temporal:
+            json.dump(export_sintetico(args.recursos), temporal, ensure_ascii=False)
+        ruta = temporal.name
+    try:
+        print(f"export: {os.path.getsize(ruta) / 1024 / 1024:,.1f} MB")
+        print(f"{'lectura':<8} {'segundos':>9} {'pico MB':>9}")
+        for nombre, fn in (("subido", subido), ("mmap", mapeado)):
+            segundos, pico = medir(fn, ruta, args.runs)
+            print(f"{nombre:<8} {segundos:9.3f} {pico / 1024 / 1024:9.1f}")
+    finally:
+        if temporal:
+            os.unlink(ruta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
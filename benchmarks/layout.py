@@ -0,0 +1,76 @@
+"""Benchmark de los layouts del Excel: tiempo y tamaño con y sin celdas combinadas.
+
+    python benchmarks/layout.py                          # 200 recursos sintéticos
+    python benchmarks/layout.py --recursos 500 --runs 3
+    python benchmarks/layout.py --export flujo.json --estrategia completo
+
+Para cada estrategia y cada layout genera el workbook completo (modo determinista, así
+los bytes no dependen del reloj) y reporta la mediana del tiempo, el tamaño del xlsx y
+los rangos combinados que quedaron en las hojas.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sintetico import export_sintetico  # noqa: E402
+from simetrik_docs.estimador import ESTRATEGIAS, LAYOUTS  # noqa: E402
+
+
+def rangos_combinados(contenido):
+    """Cantidad de <mergeCell> en las hojas del xlsx (sin cargarlo con openpyxl)."""
+    with zipfile.ZipFile(io.BytesIO(contenido)) as zf:
+        return sum(zf.read(n).count(b"<mergeCell ") for n in zf.namelist()
+                   if n.startswith("xl/worksheets/sheet"))
+
+def medir(data, estrategia, layout, runs):
+    from simetrik_docs.excel import generar_excel
+    ids = [r.get('export_id') for r in data.get('resources', [])]
+    tiempos = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        with generar_excel(data, ids, determinista=True, estrategia=estrategia, layout=layout) as archivo:
+            tiempos.append(time.perf_counter() - t0)
+            contenido = archivo.read()
+    return statistics.median(tiempos), len(contenido), rangos_combinados(contenido)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--export", help="Export JSON (por defecto uno sintético)")
+    parser.add_argument("--recursos", type=int, default=200, help="Recursos del export sintético")
+    parser.add_argument("--estrategia", action="append", choices=list(ESTRATEGIAS),
+                        help="Estrategia a medir (repetible; por defecto todas)")
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.export:
+        with open(args.export, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = export_sintetico(args.recursos)
+
+    print(f"{'estrategia':<10} {'layout':<13} {'segundos':>9} {'bytes':>12} {'merges':>7}   vs combinado")
+    for estrategia in args.estrategia or list(ESTRATEGIAS):
+        base = None
+        for layout in LAYOUTS:
+            segundos, tamano, merges = medir(data, estrategia, layout, args.runs)
+            if base is None:
+                base, comparacion = (segundos, tamano), ""
+            else:
+                comparacion = (f"   tiempo x{segundos / base[0]:.2f}, "
+                               f"bytes {(tamano / base[1] - 1) * 100:+.1f}%")
+            print(f"{estrategia:<10} {layout:<13} {segundos:9.2f} {tamano:12,} {merges:7,}{comparacion}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
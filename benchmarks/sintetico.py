@@ -0,0 +1,103 @@
+"""Exports sintéticos con la forma del JSON de Simetrik, para benchmarks y pruebas de carga.
+
+    python benchmarks/sintetico.py 200 flujo.json          # 200 recursos
+    python benchmarks/sintetico.py 200 flujo.json --seed 7
+
+Cada recurso trae columnas (con fórmulas y unicidad), dos segmentos con filtros y, según
+el tipo, conciliación estándar o avanzada, agrupación o unión apuntando a recursos
+anteriores, así el grafo de nodes es un DAG y todas las secciones del Excel tienen datos.
+"""
+import argparse
+import json
+import random
+
+TIPOS = ["native", "source_union", "source_group", "reconciliation", "advanced_reconciliation"]
+
+
+def export_sintetico(n_recursos=60, seed=1):
+    rnd = random.Random(seed)
+    resources, nodes = [], []
+    ultimo = [1000]
+
+    def nuevo_id():
+        ultimo[0] += 1
+        return ultimo[0]
+
+    for i in range(n_recursos):
+        rt  = TIPOS[i % len(TIPOS)] if i >= 5 else "native"   # los primeros son fuentes
+        eid = nuevo_id()
+
+        cols = []
+        for j in range(rnd.randint(3, 12)):
+            c = {"export_id": nuevo_id(), "name": f"c{j}", "label": f"Col {j} de {eid}",
+                 "data_format": rnd.choice(["text", "integer", "boolean", "date"]),
+                 "column_type": "formula_column", "position": j}
+            if j % 4 == 1:
+                c["transformations"] = [{"is_parent": True, "query": f"CONCAT(a{j}, b{j})"}]
+            if j % 5 == 2:
+                c["uniqueness"] = {"type": "x",
+                                   "order_keys": [{"column_id": cols[0]["export_id"], "position": 0}],
+                                   "partition_keys": [{"column_id": cols[0]["export_id"]}]}
+            cols.append(c)
+
+        segs = [{"export_id": nuevo_id(), "name": f"Seg {k} {eid}", "default_segment": k == 0,
+                 "segment_filter_sets": [{"segment_filter_rules": [
+                     {"column_id": cols[0]["export_id"], "condition": "AND", "operator": "=", "value": str(k)}]}]}
+                for k in range(2)]
+
+        r = {"export_id": eid, "name": f"Recurso {i} {rt}", "resource_type": rt,
+             "columns": cols, "segments": segs}
+        if rt != "native" and resources:
+            a, b = rnd.sample(resources, 2) if len(resources) > 1 else (resources[0], resources[0])
+            col_a, col_b = a["columns"][0]["export_id"], b["columns"][0]["export_id"]
+            if rt == "reconciliation":
+                r["reconciliation"] = {
+                    "segment_a_id": a["segments"][0]["export_id"], "segment_b_id": b["segments"][0]["export_id"],
+                    "a_source_settings": {"resource_id": a["export_id"], "is_trigger": True},
+                    "b_source_settings": {"resource_id": b["export_id"]},
+                    "reconciliation_rule_sets": [{"position": 1, "name": "RS1", "reconciliation_rules": [
+                        {"column_a_id": col_a, "column_b_id": col_b, "operator": "=",
+                         "tolerance": 1, "tolerance_unit": "days"}]}]}
+            elif rt == "advanced_reconciliation":
+                md = {"export_id": nuevo_id(), "value": "MX"}
+                r["advanced_reconciliation"] = {
+                    "reconcilable_groups": [
+                        {"prefix_side": "A", "segment_id": a["segments"][0]["export_id"], "resource_id": a["export_id"],
+                         "segmentation_config": {"criteria_column_id": col_a, "segmentation_metadata": [md]}},
+                        {"prefix_side": "B", "segment_id": b["segments"][1]["export_id"], "resource_id": b["export_id"]}],
+                    "reconciliation_rule_sets": [{
+                        "position": 1, "name": "ARS", "cross_type": "one_to_many",
+                        "reconciliation_rules": [{"column_a_id": col_a, "column_b_id": col_b}],
+                        "sweep_sides": [{"prefix_side": "A", "input_sweep_resource": {"segmentation_metadata_id": md["export_id"]}},
+                                        {"prefix_side": "B", "input_sweep_resource": {}}]}]}
+            elif rt == "source_group":
+                r["source_group"] = {"columns": [{"column_id": col_a, "position": 0}],
+                                     "values": [{"function": "SUM", "column_id": a["columns"][1]["export_id"], "position": 0}],
+                                     "is_accumulative": False}
+            elif rt == "source_union":
+                us = [{"export_id": nuevo_id(), "segment_id": a["segments"][0]["export_id"], "is_trigger": True, "trigger_type": "x"},
+                      {"export_id": nuevo_id(), "segment_id": b["segments"][0]["export_id"]}]
+                ucs, cells = [], []
+                for c in cols[:3]:
+                    uc = {"export_id": nuevo_id(), "destination_column_id": c["export_id"]}
+                    ucs.append(uc)
+                    cells += [{"union_column_id": uc["export_id"], "union_segment_id": u["export_id"],
+                               "origin_column_id": col_a, "is_active": True} for u in us]
+                r["source_union"] = {"union_segments": us, "union_columns": ucs, "union_cells": cells}
+            nodes.append({"source": [a["export_id"], b["export_id"]], "target": eid})
+        resources.append(r)
+    return {"resources": resources, "nodes": nodes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recursos", type=int)
+    parser.add_argument("salida")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(export_sintetico(args.recursos, args.seed), f)
+
+
+if __name__ == "__main__":
+    main()
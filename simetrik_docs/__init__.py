@@ -0,0 +1,46 @@
+"""Documentación de flujos Simetrik: parsers del export JSON y generación del Excel.
+
+La página Streamlit (app_simetrik.py) y el servicio HTTP (simetrik_docs.server)
+usan este mismo código. Importar el paquete no carga pandas ni openpyxl: el renderer
+(simetrik_docs.excel) se importa recién al acceder a generar_excel.
+"""
+from .constants import C, RT_LABEL, RT_COLOR, RT_ORDER
+from .parsers import (build_maps, fmt_filter_rules, parse_transformation_logic,
+                      parse_std_reconciliation, parse_adv_reconciliation,
+                      parse_segment_filters, parse_source_group, parse_union_segments,
+                      parse_union_mapping, limpiar_hoja,
+                      sort_key, build_relations, recursos_unicos, build_adjacency,
+                      lineage_ids, build_index)
+from .hashing import canonical_json, content_hash
+from .diff import diff_exports, CAMPOS_CAMBIO
+from .store import VersionStore, ExportVersionado, STORE_DIR
+from .determinismo import FECHA_FIJA, fecha_determinista, huella, normalizar_xlsx
+from .salida import ArchivoGenerado, SPILL_MB
+from .estimador import ESTRATEGIAS, LAYOUTS, estimar, estimar_recurso, elegir_estrategia
+from .metricas import (REGISTRO, Registro, Contador, Histograma, PARSEO, iniciar_volcado,
+                       cache as contar_cache)
+from .perfil import perfilar, Perfil, marca
+from .secciones import secciones_recurso
+from .vista import vista_recurso, html_bloques, iter_html_bloques
+from .sitio import FORMATOS_SITIO, generar_sitio, generar_sitio_zip, iter_md_bloques
+from .diagrama import (FORMATOS_DIAGRAMA, Diagrama, layout_linaje, iter_svg, a_svg, a_dot, a_mermaid,
+                       exportar_linaje)
+from .plano import (ModeloPlano, ExportPlano, MapaPlano, codificar, publicar, abrir_compartido,
+                    guardar_plano, abrir_archivo)
+from .integridad import (validar, verificar, FlujoInvalido, describir, es_export, TIPOS as TIPOS_INTEGRIDAD,
+                         resumen as resumen_integridad)
+from .split import MODOS_SPLIT, particionar, generar_partes, generar_zip
+from .sesiones import SesionesFlujo, hash_export, nuevo_token
+from .locales import EXPORTS_DIR, ExportMapeado, listar_exports, ruta_export
+from .jobs import (ColaGeneracion, TrabajoGeneracion, GeneracionCancelada,
+                   ColaLlena, MAX_WORKERS, MAX_COLA)
+from .vigilar import Vigilante
+
+
+_LAZY = {"generar_excel": "excel", "row_height": "layout", "generar_excel_cambios": "excel"}
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        return getattr(import_module("." + _LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,266 @@
+"""Línea de comandos: python -m simetrik_docs <comando> …"""
+import argparse
+import json
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simetrik_docs",
+                                     description="Documentación de flujos Simetrik")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("serve", help="Servicio HTTP local para generar documentación")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8502)
+    p.add_argument("--threads", type=int, default=8, help="Conexiones HTTP atendidas en paralelo")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Generaciones simultáneas (por defecto SIMETRIK_DOC_WORKERS)")
+    p.add_argument("--metricas", help="Archivo donde volcar las métricas cada SIMETRIK_DOC_METRICAS_INTERVALO "
+                                      "segundos (además de GET /metrics; por defecto SIMETRIK_DOC_METRICAS)")
+
+    p = sub.add_parser("diff", help="Cambios entre dos exports del mismo flujo")
+    p.add_argument("antes", help="Export JSON de referencia")
+    p.add_argument("despues", help="Export JSON nuevo")
+    p.add_argument("-o", "--output", help="Excel con la hoja de cambios")
+    p.add_argument("--json", dest="json_out", help="Cambios en JSON ('-' para stdout)")
+
+    p = sub.add_parser("store", help="Almacén de versiones de exports")
+    p.add_argument("--root", help="Directorio del almacén (por defecto SIMETRIK_DOC_STORE)")
+    st = p.add_subparsers(dest="accion", required=True)
+    a = st.add_parser("guardar", help="Guarda una versión del export")
+    a.add_argument("flujo")
+    a.add_argument("export", help="Export JSON")
+    a = st.add_parser("versiones", help="Lista las versiones de un flujo (o los flujos)")
+    a.add_argument("flujo", nargs="?")
+    a = st.add_parser("exportar", help="Reconstruye el JSON de una versión")
+    a.add_argument("flujo")
+    a.add_argument("version", nargs="?", help="Id o prefijo (por defecto la última)")
+    a.add_argument("-o", "--output", help="Archivo de salida (por defecto stdout)")
+
+    from .estimador import ESTRATEGIAS, LAYOUTS
+    from .perfil import TOP_ASIGNACIONES
+    p = sub.add_parser("perfilar", help="Genera el Excel midiendo tiempo y memoria por fase")
+    p.add_argument("export", help="Export JSON")
+    p.add_argument("--ids", help="Ids separados por coma (por defecto todo el flujo)")
+    p.add_argument("--estrategia", choices=list(ESTRATEGIAS), help="Por defecto la elige el estimador")
+    p.add_argument("--layout", default="combinado", choices=list(LAYOUTS),
+                   help="sin_combinar arma el Excel sin celdas combinadas")
+    p.add_argument("--prof", help="Stats de cProfile (por defecto <export>.prof)")
+    p.add_argument("-o", "--output", help="Guarda también el Excel generado")
+    p.add_argument("--top", type=int, default=TOP_ASIGNACIONES,
+                   help="Asignaciones a listar por fase (0 = sólo tiempos y picos, más rápido)")
+    p.add_argument("--funciones", type=int, default=20, help="Funciones más costosas a listar")
+
+    from .sitio import FORMATOS_SITIO
+    p = sub.add_parser("sitio", help="Documentación estática: una página HTML o Markdown por recurso")
+    p.add_argument("export", help="Export JSON")
+    p.add_argument("-o", "--output", required=True,
+                   help="Directorio del sitio (se actualiza sólo lo que cambió) o archivo .zip")
+    p.add_argument("--formato", default="html", choices=list(FORMATOS_SITIO))
+    p.add_argument("--ids", help="Ids separados por coma (por defecto todo el flujo)")
+
+    from .diagrama import FORMATOS_DIAGRAMA
+    p = sub.add_parser("diagrama", help="Diagrama de linaje del flujo (SVG, DOT o Mermaid) con layout por niveles")
+    p.add_argument("export", help="Export JSON")
+    p.add_argument("-o", "--output", required=True,
+                   help="Archivo de salida; el formato sale de la extensión (.svg, .dot, .mmd)")
+    p.add_argument("--formato", choices=list(FORMATOS_DIAGRAMA), help="Por defecto el de la extensión")
+    p.add_argument("--ids", help="Ids separados por coma (por defecto todo el flujo)")
+
+    from .split import MODOS_SPLIT
+    p = sub.add_parser("vigilar", help="Regenera la documentación cuando cambia un export de una carpeta")
+    p.add_argument("carpeta", help="Carpeta donde llegan los exports JSON")
+    p.add_argument("-o", "--output", required=True, help="Carpeta de la documentación generada")
+    p.add_argument("--modo", default="unico", choices=["unico", *MODOS_SPLIT, *FORMATOS_SITIO])
+    p.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre sondeos")
+    p.add_argument("--espera", type=float, default=1.0,
+                   help="Segundos que un export debe quedar sin cambios antes de procesarlo")
+    p.add_argument("--workers", type=int, default=2, help="Generaciones simultáneas")
+    p.add_argument("--una-vez", action="store_true", help="Procesa lo pendiente y termina")
+    p.add_argument("--bloquear", action="store_true", help="No genera los exports con errores de integridad")
+
+    from .integridad import NIVELES
+    p = sub.add_parser("validar", help="Referencias rotas, ids repetidos y ciclos del export")
+    p.add_argument("export", help="Export JSON")
+    p.add_argument("--nivel", default="aviso", choices=list(NIVELES), help="Nivel mínimo a listar")
+    p.add_argument("--json", dest="json_out", help="Hallazgos en JSON ('-' para stdout)")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "serve":
+        from .server import serve
+        serve(args.host, args.port, threads=args.threads, workers=args.workers, metricas=args.metricas)
+    elif args.cmd == "diff":
+        return _diff(args)
+    elif args.cmd == "store":
+        return _store(args)
+    elif args.cmd == "perfilar":
+        return _perfilar(args)
+    elif args.cmd == "sitio":
+        return _sitio(args)
+    elif args.cmd == "diagrama":
+        return _diagrama(args)
+    elif args.cmd == "vigilar":
+        return _vigilar(args)
+    elif args.cmd == "validar":
+        return _validar(args)
+
+
+def _ids(texto):
+    if not texto:
+        return None
+    return {int(t) if t.strip().lstrip('-').isdigit() else t.strip()
+            for t in texto.split(",") if t.strip()}
+
+
+def _diff(args):
+    from .diff import diff_exports
+    with open(args.antes, encoding="utf-8") as fa, open(args.despues, encoding="utf-8") as fb:
+        diff = diff_exports(json.load(fa), json.load(fb))
+    if args.output:
+        from .excel import generar_excel_cambios
+        with generar_excel_cambios(diff) as archivo:
+            archivo.guardar_en(args.output)
+    if args.json_out == "-":
+        print(json.dumps(diff, ensure_ascii=False, indent=2))
+    elif args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(diff, f, ensure_ascii=False, indent=2)
+    res = diff['resumen']
+    if args.json_out != "-":
+        print(f"Agregados: {res['agregados']}  Eliminados: {res['eliminados']}  "
+              f"Modificados: {res['modificados']}  Sin cambios: {res['sin_cambios']}  "
+              f"({res['filas']} filas)")
+    return 1 if res['filas'] else 0
+
+
+def _store(args):
+    from .store import VersionStore
+    store = VersionStore(args.root)
+    if args.accion == "guardar":
+        with open(args.export, encoding="utf-8") as f:
+            version = store.guardar(args.flujo, json.load(f))
+        v = next(v for v in store.versiones(args.flujo) if v['version'] == version)
+        print(f"{args.flujo}/{version}  ({v['blobs_nuevos']} blobs nuevos, {v['bytes_nuevos']:,} bytes)")
+    elif args.accion == "versiones":
+        if not args.flujo:
+            print("\n".join(store.flujos()))
+            return 0
+        from datetime import datetime
+        for v in store.versiones(args.flujo):
+            print(f"{v['version']}  {datetime.fromtimestamp(v['guardado']):%Y-%m-%d %H:%M}"
+                  f"  {v['recursos']:>5} recursos  {v['blobs_nuevos']:>6} blobs nuevos")
+    elif args.accion == "exportar":
+        version = args.version
+        if version:
+            ids = [v['version'] for v in store.versiones(args.flujo) if v['version'].startswith(version)]
+            if len(ids) != 1:
+                raise SystemExit(f"El prefijo {version} coincide con {len(ids)} versiones")
+            version = ids[0]
+        body = json.dumps(store.cargar(args.flujo, version).materializar(), ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(body)
+        else:
+            print(body)
+    return 0
+
+
+def _perfilar(args):
+    import os
+    from .excel import generar_excel
+    from .perfil import marca, perfilar
+    ids = _ids(args.ids)
+    with perfilar(args.top) as perfil:
+        marca("carga")
+        with open(args.export, encoding="utf-8") as f:
+            data = json.load(f)
+        archivo = generar_excel(data, ids, estrategia=args.estrategia, layout=args.layout)
+    with archivo:
+        if args.output:
+            archivo.guardar_en(args.output)
+        tamano = archivo.tamano
+
+    print(perfil.informe(args.funciones))
+    print(f"Workbook: {tamano:,} bytes")
+    ruta = perfil.guardar_prof(args.prof or os.path.splitext(args.export)[0] + ".prof")
+    print(f"Stats de cProfile en {ruta}  (python -m pstats {ruta})")
+    return 0
+
+
+def _sitio(args):
+    from .sitio import generar_sitio, generar_sitio_zip
+    with open(args.export, encoding="utf-8") as f:
+        data = json.load(f)
+    if args.output.endswith(".zip"):
+        with generar_sitio_zip(data, _ids(args.ids), args.formato) as archivo:
+            archivo.guardar_en(args.output)
+            print(f"{args.output}: {archivo.tamano:,} bytes")
+        return 0
+    stats = generar_sitio(data, args.output, _ids(args.ids), args.formato)
+    print(f"{args.output}: {stats['escritas']} escritos, {stats['sin_cambios']} sin cambios, "
+          f"{stats['eliminadas']} eliminados")
+    return 0
+
+
+def _diagrama(args):
+    import os
+    from .diagrama import FORMATOS_DIAGRAMA, exportar_linaje, layout_linaje
+    formato = args.formato or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if formato not in FORMATOS_DIAGRAMA:
+        print(f"Formato desconocido '{formato}': usa --formato {' | '.join(FORMATOS_DIAGRAMA)}")
+        return 2
+    with open(args.export, encoding="utf-8") as f:
+        d = layout_linaje(json.load(f), _ids(args.ids))
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(exportar_linaje(d, formato))
+    print(f"{args.output}: {len(d.nodos)} recursos en {len(d.niveles)} niveles, {d.cruces} cruces")
+    return 0
+
+
+def _vigilar(args):
+    from datetime import datetime
+    from .vigilar import Vigilante
+    vig = Vigilante(args.carpeta, args.output, args.modo, args.intervalo, args.espera, args.workers,
+                    bloquear=args.bloquear)
+    errores = []
+
+    def notificar(evento, nombre, detalle):
+        if evento == "error":
+            errores.append(nombre)
+        print(f"{datetime.now():%H:%M:%S}  {evento:<12}{nombre}  {detalle}", flush=True)
+
+    if not args.una_vez:
+        print(f"Vigilando {args.carpeta} → {args.output} (Ctrl+C para terminar)", flush=True)
+    try:
+        vig.correr(notificar, una_vez=args.una_vez)
+    except KeyboardInterrupt:
+        pass
+    return 1 if args.una_vez and errores else 0
+
+
+def _validar(args):
+    import time
+    from .integridad import NIVELES, describir, resumen, validar
+    with open(args.export, encoding="utf-8") as f:
+        data = json.load(f)
+    t0 = time.perf_counter()
+    hallazgos = validar(data)
+    ms = (time.perf_counter() - t0) * 1000
+    if args.json_out:
+        body = json.dumps(hallazgos, ensure_ascii=False, indent=2, default=str)
+        if args.json_out == "-":
+            print(body)
+        else:
+            with open(args.json_out, "w", encoding="utf-8") as f:
+                f.write(body)
+    n = resumen(hallazgos)
+    if args.json_out != "-":
+        hasta = NIVELES.index(args.nivel)
+        for h in hallazgos:
+            if NIVELES.index(h['nivel']) <= hasta:
+                print(f"{h['nivel'].upper():<6} {describir(h)}")
+        print(f"Errores: {n['error']}  Avisos: {n['aviso']}  Info: {n['info']}  ({ms:.0f} ms)")
+    return 1 if n['error'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
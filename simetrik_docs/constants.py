@@ -0,0 +1,45 @@
+# ══════════════════════════════════════════════════════════════════════════════
+# CONSTANTES (Paleta Excel - Sobria, Profesional y Corporativa PeYa)
+# ══════════════════════════════════════════════════════════════════════════════
+C = {
+    # Paleta corporativa
+    "red":    "EA0050",  # Rojo PeYa oficial — headers principales
+    "red2":   "C0003A",  # Rojo PeYa oscuro — subsecciones
+    "white":  "FFFFFF",  # Blanco puro — filas impares
+    "grey":   "F2F2F2",  # Gris claro y 100% neutro — filas pares (zebra)
+    "grey2":  "E8E8E8",  # Gris un poco más oscuro
+    "dark":   "1A1A2E",  # Azul muy oscuro — header índice y pie
+    "border": "E5E7EB",  # Gris suave — bordes de celdas
+    "slate":  "6B7280",  # Gris medio — labels de metadatos
+    "blue":   "1D4ED8",  # Azul links
+}
+
+RT_LABEL = {
+    "native":                  "📥 Fuente",
+    "source_union":            "🔗 Unión de Fuentes",
+    "source_group":            "📊 Agrupación (Group By)",
+    "reconciliation":          "⚖️ Conciliación Estándar",
+    "advanced_reconciliation": "🔬 Conciliación Avanzada",
+    "consolidation":           "🗂️ Consolidación",
+    "resource_join":           "🔀 Join de Recursos",
+    "cumulative_balance":      "📈 Balance Acumulado",
+}
+
+# Paleta PeYa — un color dominante por tipo, tonos oscuros sobre blanco
+RT_COLOR = {
+    "native":                  "1D4ED8",  # Azul cobalto — Fuentes
+    "source_union":            "0F766E",  # Verde azulado — Uniones
+    "source_group":            "92400E",  # Ámbar oscuro — Agrupaciones
+    "reconciliation":          "EA0050",  # Rojo PeYa — Conciliación estándar
+    "advanced_reconciliation": "6D28D9",  # Violeta oscuro — Conciliación avanzada
+    "consolidation":           "374151",  # Gris pizarra — Consolidación
+    "resource_join":           "065F46",  # Verde esmeralda — Join
+    "cumulative_balance":      "065F46",  # Verde esmeralda — Balance
+}
+
+# Orden de tipos para sorting
+RT_ORDER = {
+    "native": 1, "source_union": 2, "source_group": 3,
+    "reconciliation": 4, "advanced_reconciliation": 5,
+    "consolidation": 6, "resource_join": 7, "cumulative_balance": 8,
+}
@@ -0,0 +1,80 @@
+"""Salida reproducible: mismo export y misma selección → mismos bytes.
+
+openpyxl escribe la hora actual en docProps/core.xml (created y modified) y zipfile le pone
+la hora actual a cada entrada del paquete. En modo determinista la fecha sale del propio
+export y el xlsx se normaliza después de guardarlo: fechas fijas en core.xml y metadatos
+fijos en cada entrada del zip, conservando el orden en que openpyxl las escribió.
+"""
+import os
+import re
+import zipfile
+from datetime import datetime, timezone
+
+from .hashing import content_hash
+from .salida import ArchivoGenerado, copiar
+
+# Fecha usada cuando el export no trae ninguna propia (mínimo que admite el formato zip)
+FECHA_FIJA = datetime(1980, 1, 1)
+
+# Claves de primer nivel del export que pueden traer su fecha de exportación
+CLAVES_FECHA = ('exported_at', 'export_date', 'updated_at', 'created_at')
+
+_CORE_FECHA = re.compile(rb'(<dcterms:(created|modified)[^>]*>)[^<]*(</dcterms:\2>)')
+
+
+def fecha_determinista(data):
+    """Fecha reproducible para el export: SOURCE_DATE_EPOCH, la fecha del propio export o FECHA_FIJA."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), tz=timezone.utc).replace(tzinfo=None)
+    return fecha_export(data) or FECHA_FIJA
+
+def fecha_export(data):
+    """Fecha de exportación que trae el propio export (UTC, sin tz), o None.
+
+    SOURCE_DATE_EPOCH no cuenta: sólo fija los metadatos, lo que se ve en las hojas no cambia.
+    """
+    for k in CLAVES_FECHA:
+        v = data.get(k)
+        if isinstance(v, str):
+            try:
+                fecha = datetime.fromisoformat(v.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            if fecha.tzinfo:
+                fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+            return max(fecha, FECHA_FIJA)
+    return None
+
+def huella(data, selected_ids=None):
+    """Hash corto del export (y la selección) para nombres de archivo y encabezados reproducibles."""
+    sel = sorted(selected_ids, key=str) if selected_ids is not None else None
+    # Un ExportPlano trae los hashes del flujo entero aunque sólo tenga decodificada una parte
+    hashes = (data.hashes_recursos() if hasattr(data, 'hashes_recursos')
+              else [content_hash(r) for r in data.get('resources', [])])
+    return content_hash(hashes + [sel])[:12]
+
+def zip_info(nombre, fecha, compress_type=zipfile.ZIP_DEFLATED):
+    """ZipInfo con metadatos fijos: fecha dada, permisos 0644 y sistema de origen constante."""
+    info = zipfile.ZipInfo(nombre, date_time=fecha.timetuple()[:6])
+    info.compress_type = compress_type
+    info.create_system = 3
+    info.external_attr = 0o644 << 16
+    return info
+
+def normalizar_xlsx(origen, fecha):
+    """Reescribe el paquete xlsx con fechas y metadatos fijos, entrada por entrada; devuelve un ArchivoGenerado."""
+    stamp = fecha.strftime('%Y-%m-%dT%H:%M:%SZ').encode()
+    out = ArchivoGenerado()
+    origen.seek(0)
+    with zipfile.ZipFile(origen) as zin, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            info = zip_info(item.filename, fecha)
+            if item.filename == "docProps/core.xml":
+                core = _CORE_FECHA.sub(lambda m: m.group(1) + stamp + m.group(3), zin.read(item))
+                zout.writestr(info, core)
+            else:
+                with zin.open(item) as src, zout.open(info, "w") as dst:
+                    copiar(src, dst)
+    out.seek(0)
+    return out
@@ -0,0 +1,342 @@
+"""Diagrama de linaje del flujo (el grafo de nodes) con un layout por capas propio.
+
+"Proviene de / Alimenta a" en el Índice no muestran la forma de un flujo de mil recursos.
+layout_linaje() ubica cada recurso sin depender de Graphviz ni de un servicio externo:
+
+    1. niveles      camino más largo desde los orígenes (orden topológico de Kahn). Las
+                    aristas que cierran un ciclo se invierten para ubicar y se dibujan
+                    punteadas. Un origen se corre al nivel anterior a su primer destino.
+    2. virtuales    una arista que salta niveles pasa por un nodo virtual en cada nivel
+                    intermedio: cuenta al ordenar y su trazo no atraviesa ninguna caja.
+    3. cruces       barridos baricéntricos de ida y vuelta (cada nivel se ordena por la
+                    posición media de sus vecinos en el nivel de al lado) y se queda el orden
+                    con menos cruces, contados con un árbol de Fenwick en E log V.
+    4. coordenadas  un nivel por columna, de izquierda (orígenes) a derecha.
+
+El layout se guarda por hash del flujo (ids, nombres y tipos de la selección más nodes) y
+de él salen el SVG, el DOT, el Mermaid, la página del sitio y la hoja 🗺️ Linaje del Excel.
+Un Diagrama cacheado se comparte entre sesiones: no se modifica.
+"""
+import html
+import threading
+from collections import OrderedDict, deque
+
+from .constants import C, RT_COLOR, RT_LABEL
+from .hashing import content_hash
+from .layout import ancho_px
+from .metricas import cache
+from .parsers import build_adjacency, recursos_unicos
+
+FORMATOS_DIAGRAMA = {
+    "svg": "SVG",
+    "dot": "Graphviz (DOT)",
+    "mmd": "Mermaid",
+}
+
+ANCHO_NODO   = 190   # px de cada caja
+ALTO_NODO    = 28
+SEP_NIVEL    = 70    # hueco horizontal entre niveles, por donde van las aristas
+SEP_NODO     = 10
+ALTO_VIRTUAL = 8     # lugar que ocupa en su nivel una arista que lo atraviesa
+MARGEN       = 20
+FUENTE_PX    = 11
+BARRIDOS     = 12    # pares de barridos como máximo; se corta antes si dejan de mejorar
+MAX_LAYOUTS  = 16    # layouts recordados (uno por flujo y selección)
+
+
+class Diagrama:
+    """Layout calculado: cajas, aristas con sus puntos de paso y tamaño del dibujo."""
+
+    def __init__(self):
+        self.nodos   = {}   # eid → {'nombre', 'tipo', 'nivel', 'x', 'y'} (esquina superior izquierda)
+        self.niveles = []   # por nivel, los eid de arriba hacia abajo (sin los virtuales)
+        self.aristas = []   # (origen, destino, [(x, y), …] de izquierda a derecha, invertida)
+        self.cruces  = 0
+        self.ancho   = self.alto = 0
+        self.clave   = None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# LAYOUT
+# ══════════════════════════════════════════════════════════════════════════════
+def _invertidas(ids, hijos):
+    """Aristas que cierran un ciclo (van a un nodo en la pila de un DFS iterativo)."""
+    color, out = {}, set()
+    for raiz in ids:
+        if raiz in color:
+            continue
+        color[raiz] = 1
+        pila = [(raiz, iter(hijos[raiz]))]
+        while pila:
+            v, it = pila[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                color[v] = 2
+                pila.pop()
+            elif nxt not in color:
+                color[nxt] = 1
+                pila.append((nxt, iter(hijos[nxt])))
+            elif color[nxt] == 1:
+                out.add((v, nxt))
+    return out
+
+def _barrer(capas, vecinos, pos):
+    """Ordena cada capa por el baricentro de sus vecinos (ya ubicados en la capa anterior)."""
+    for capa in capas:
+        clave = {}
+        for i, x in enumerate(capa):
+            vs = vecinos[x]
+            # Sin vecinos conserva su lugar: no se lo arrastra al principio
+            clave[x] = sum(pos[v] for v in vs) / len(vs) if vs else i
+        capa.sort(key=clave.__getitem__)
+        for i, x in enumerate(capa):
+            pos[x] = i
+
+def _cruces(capas, abajo, pos):
+    total = 0
+    for k in range(len(capas) - 1):
+        n = len(capas[k + 1])
+        arbol, insertadas = [0] * (n + 1), 0
+        for x in capas[k]:
+            ys = sorted(pos[y] for y in abajo[x])
+            # Cruzan las aristas ya insertadas que llegan más abajo que esta
+            for y in ys:
+                i, menores = y + 1, 0
+                while i > 0:
+                    menores += arbol[i]
+                    i -= i & -i
+                total += insertadas - menores
+            for y in ys:
+                i = y + 1
+                while i <= n:
+                    arbol[i] += 1
+                    i += i & -i
+                insertadas += 1
+    return total
+
+def _calcular(resources, nodes):
+    d   = Diagrama()
+    ids = [r.get('export_id') for r in resources]
+    _, down = build_adjacency(nodes)
+    hijos = {eid: [] for eid in ids}
+    for s in ids:
+        for t in dict.fromkeys(down.get(s, ())):
+            if t in hijos and t != s:
+                hijos[s].append(t)
+
+    invertidas = _invertidas(ids, hijos)
+    aristas = [(s, t) for s in ids for t in hijos[s]]
+    sal     = {eid: [] for eid in ids}
+    entra   = dict.fromkeys(ids, 0)
+    for s, t in aristas:
+        invertida = (s, t) in invertidas
+        a, b = (t, s) if invertida else (s, t)
+        sal[a].append((b, invertida))
+        entra[b] += 1
+
+    # 1. Niveles por camino más largo; los orígenes se acercan a su primer destino
+    origenes = [eid for eid in ids if not entra[eid]]
+    nivel    = dict.fromkeys(ids, 0)
+    cola, topo = deque(origenes), []
+    while cola:
+        v = cola.popleft()
+        topo.append(v)
+        for b, _ in sal[v]:
+            nivel[b] = max(nivel[b], nivel[v] + 1)
+            entra[b] -= 1
+            if not entra[b]:
+                cola.append(b)
+    for v in origenes:
+        if sal[v]:
+            nivel[v] = min(nivel[b] for b, _ in sal[v]) - 1
+
+    # 2. Nodos virtuales en los niveles que salta cada arista
+    n_niveles = max(nivel.values(), default=-1) + 1
+    capas  = [[] for _ in range(n_niveles)]
+    arriba = {eid: [] for eid in ids}
+    abajo  = {eid: [] for eid in ids}
+    cadenas = []
+    for v in topo:
+        capas[nivel[v]].append(v)
+    for v in topo:
+        for b, invertida in sal[v]:
+            cadena = [v]
+            for k in range(nivel[v] + 1, nivel[b]):
+                virtual = ("·", len(arriba))
+                capas[k].append(virtual)
+                arriba[virtual], abajo[virtual] = [], []
+                cadena.append(virtual)
+            cadena.append(b)
+            for x, y in zip(cadena, cadena[1:]):
+                abajo[x].append(y)
+                arriba[y].append(x)
+            cadenas.append((cadena, invertida))
+
+    # 3. Barridos baricéntricos; se guarda el orden con menos cruces
+    pos = {x: i for capa in capas for i, x in enumerate(capa)}
+    mejor, menos, sin_mejora = [list(c) for c in capas], _cruces(capas, abajo, pos), 0
+    for _ in range(BARRIDOS):
+        if not menos:
+            break
+        _barrer(capas[1:], arriba, pos)
+        _barrer(capas[-2::-1], abajo, pos)
+        cruces = _cruces(capas, abajo, pos)
+        # Mejoras de menos del 1% no justifican otro barrido sobre miles de nodos
+        sin_mejora = 0 if cruces < menos * 0.99 else sin_mejora + 1
+        if cruces < menos:
+            mejor, menos = [list(c) for c in capas], cruces
+        if sin_mejora == 2:
+            break
+    capas, d.cruces = mejor, menos
+
+    # 4. Coordenadas: cada nivel es una columna, centrada en el alto del dibujo
+    def alto_capa(capa):
+        return sum(ALTO_NODO + SEP_NODO if x in hijos else ALTO_VIRTUAL for x in capa)
+    alto = max((alto_capa(c) for c in capas), default=0)
+    xy = {}
+    for k, capa in enumerate(capas):
+        x = MARGEN + k * (ANCHO_NODO + SEP_NIVEL)
+        y = MARGEN + (alto - alto_capa(capa)) // 2
+        for v in capa:
+            if v in hijos:
+                xy[v] = (x, y)
+                y += ALTO_NODO + SEP_NODO
+            else:
+                xy[v] = (x, y + ALTO_VIRTUAL // 2)
+                y += ALTO_VIRTUAL
+    por_id = {r.get('export_id'): r for r in resources}
+    for k, capa in enumerate(capas):
+        d.niveles.append([v for v in capa if v in hijos])
+        for v in d.niveles[-1]:
+            d.nodos[v] = {'nombre': por_id[v].get('name', ''), 'tipo': por_id[v].get('resource_type', ''),
+                          'nivel': k, 'x': xy[v][0], 'y': xy[v][1]}
+    medio = ALTO_NODO // 2
+    for cadena, invertida in cadenas:
+        a, b = cadena[0], cadena[-1]
+        puntos = [(xy[a][0] + ANCHO_NODO, xy[a][1] + medio)]
+        for v in cadena[1:-1]:
+            puntos += [(xy[v][0], xy[v][1]), (xy[v][0] + ANCHO_NODO, xy[v][1])]
+        puntos.append((xy[b][0], xy[b][1] + medio))
+        d.aristas.append((b, a, puntos, True) if invertida else (a, b, puntos, False))
+    d.ancho = 2 * MARGEN + max(n_niveles * (ANCHO_NODO + SEP_NIVEL) - SEP_NIVEL, 0)
+    d.alto  = 2 * MARGEN + alto
+    return d
+
+
+_CACHE = OrderedDict()
+_LOCK  = threading.Lock()
+
+def layout_linaje(data, selected_ids=None):
+    """Diagrama de los recursos seleccionados; se calcula una vez por flujo y selección."""
+    resources = recursos_unicos(data.get('resources', []), selected_ids)
+    clave = content_hash([[[r.get('export_id'), r.get('name', ''), r.get('resource_type', '')] for r in resources],
+                          data.get('nodes', [])])
+    with _LOCK:
+        cache("linaje", clave in _CACHE)
+        if clave in _CACHE:
+            _CACHE.move_to_end(clave)
+            return _CACHE[clave]
+    d = _calcular(resources, data.get('nodes', []))
+    d.clave = clave
+    with _LOCK:
+        _CACHE[clave] = d
+        while len(_CACHE) > MAX_LAYOUTS:
+            _CACHE.popitem(last=False)
+    return d
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SALIDAS
+# ══════════════════════════════════════════════════════════════════════════════
+def _recortar(texto, disponible=ANCHO_NODO - 16):
+    size = FUENTE_PX * 0.75   # ancho_px mide en puntos
+    ancho = ancho_px(texto, size)
+    if ancho <= disponible:
+        return texto
+    n = int(len(texto) * disponible / ancho)
+    while n > 0 and ancho_px(texto[:n] + "…", size) > disponible:
+        n -= 1
+    return texto[:n] + "…"
+
+def _trazo(puntos):
+    (x, y), partes = puntos[0], [f"M{puntos[0][0]},{puntos[0][1]}"]
+    for qx, qy in puntos[1:]:
+        if qy == y:
+            partes.append(f"L{qx},{qy}")
+        else:
+            mx = (x + qx) // 2
+            partes.append(f"C{mx},{y} {mx},{qy} {qx},{qy}")
+        x, y = qx, qy
+    return " ".join(partes)
+
+def iter_svg(d, enlaces=None):
+    """SVG del diagrama por fragmentos; enlaces {eid: url} hace clickeable cada caja."""
+    yield (f"<svg xmlns='http://www.w3.org/2000/svg' width='{d.ancho}' height='{d.alto}' "
+           f"viewBox='0 0 {d.ancho} {d.alto}' font-family='Inter, Calibri, sans-serif' font-size='{FUENTE_PX}'>"
+           f"<rect width='100%' height='100%' fill='#{C['white']}'/>"
+           "<defs><marker id='f' viewBox='0 0 10 10' refX='10' refY='5' markerWidth='7' markerHeight='7' "
+           f"orient='auto-start-reverse'><path d='M0,0 L10,5 L0,10 z' fill='#{C['slate']}'/></marker></defs>"
+           f"<g fill='none' stroke='#{C['slate']}' stroke-opacity='0.7' stroke-width='1.2'>")
+    for _, _, puntos, invertida in d.aristas:
+        # Los puntos van de izquierda a derecha: una arista invertida lleva la flecha al principio
+        yield (f"<path d='{_trazo(puntos)}' stroke-dasharray='4 3' marker-start='url(#f)'/>" if invertida
+               else f"<path d='{_trazo(puntos)}' marker-end='url(#f)'/>")
+    yield "</g>"
+    for eid, n in d.nodos.items():
+        tipo  = RT_LABEL.get(n['tipo'], n['tipo'])
+        caja  = (f"<g><title>{html.escape(n['nombre'])} · {html.escape(tipo)} · {html.escape(str(eid))}</title>"
+                 f"<rect x='{n['x']}' y='{n['y']}' width='{ANCHO_NODO}' height='{ALTO_NODO}' rx='4' "
+                 f"fill='#{RT_COLOR.get(n['tipo'], C['dark'])}'/>"
+                 f"<text x='{n['x'] + 8}' y='{n['y'] + ALTO_NODO // 2 + 4}' fill='#{C['white']}'>"
+                 f"{html.escape(_recortar(n['nombre']))}</text></g>")
+        if enlaces and eid in enlaces:
+            caja = f"<a href='{html.escape(enlaces[eid])}'>{caja}</a>"
+        yield caja
+    yield "</svg>\n"
+
+def a_svg(d, enlaces=None):
+    return "".join(iter_svg(d, enlaces))
+
+def _cadena_dot(v):
+    return '"' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") + '"'
+
+def a_dot(d):
+    """DOT con los niveles como rank=same y las posiciones calculadas en pos (neato -n2 las respeta)."""
+    lineas = ["digraph linaje {", "  rankdir=LR;",
+              '  node [shape=box, style="rounded,filled", fontcolor=white, fontname="Calibri", fontsize=10];']
+    for eid, n in d.nodos.items():
+        # Graphviz mide en puntos y con el eje y hacia arriba
+        x = (n['x'] + ANCHO_NODO / 2) * 0.75
+        y = (d.alto - n['y'] - ALTO_NODO / 2) * 0.75
+        lineas.append(f"  {_cadena_dot(eid)} [label={_cadena_dot(n['nombre'])}, "
+                      f"fillcolor=\"#{RT_COLOR.get(n['tipo'], C['dark'])}\", "
+                      f"tooltip={_cadena_dot(RT_LABEL.get(n['tipo'], n['tipo']))}, pos=\"{x:.0f},{y:.0f}!\"];")
+    for capa in d.niveles:
+        lineas.append("  { rank=same; " + " ".join(_cadena_dot(eid) + ";" for eid in capa) + " }")
+    for origen, destino, _, invertida in d.aristas:
+        lineas.append(f"  {_cadena_dot(origen)} -> {_cadena_dot(destino)}" + (" [style=dashed];" if invertida else ";"))
+    lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+def a_mermaid(d):
+    """flowchart de Mermaid (Mermaid hace su propio layout; los nodos van en el orden calculado)."""
+    ids    = {eid: f"n{i}" for i, eid in enumerate(d.nodos)}
+    lineas = ["flowchart LR"]
+    for rt in sorted({n['tipo'] for n in d.nodos.values()}):
+        color = RT_COLOR.get(rt, C["dark"])
+        lineas.append(f"  classDef {rt or 'otro'} fill:#{color},stroke:#{color},color:#{C['white']}")
+    for eid, n in d.nodos.items():
+        nombre = n['nombre'].replace('"', "#quot;").replace("\n", " ")
+        lineas.append(f"  {ids[eid]}[\"{nombre}\"]:::{n['tipo'] or 'otro'}")
+    for origen, destino, _, invertida in d.aristas:
+        lineas.append(f"  {ids[origen]} {'-.->' if invertida else '-->'} {ids[destino]}")
+    return "\n".join(lineas) + "\n"
+
+def exportar_linaje(d, formato="svg"):
+    if formato == "svg":
+        return a_svg(d)
+    if formato == "dot":
+        return a_dot(d)
+    if formato == "mmd":
+        return a_mermaid(d)
+    raise ValueError(f"Formato de diagrama desconocido: {formato}")
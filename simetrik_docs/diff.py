@@ -0,0 +1,263 @@
+"""Diff estructural entre dos exports del mismo flujo.
+
+Cada recurso y cada sub-objeto (columna, segmento, rule set, grupo conciliable, mapeo
+de unión) se compara primero por hash de contenido y sólo se describe si el hash
+cambió, así el costo depende del tamaño del cambio y no del flujo. Los nombres se
+resuelven con los res_map / col_map / seg_map de cada lado.
+"""
+from .hashing import content_hash
+from .parsers import (build_maps, recursos_unicos, fmt_filter_rules, parse_transformation_logic,
+                      parse_std_reconciliation, parse_adv_reconciliation, parse_source_group,
+                      parse_union_segments, parse_union_mapping, sort_key)
+from .constants import RT_LABEL
+
+SECCIONES = {
+    'columns':                 "Columnas",
+    'segments':                "Grupos conciliables",
+    'reconciliation':          "Conciliación estándar",
+    'advanced_reconciliation': "Conciliación avanzada",
+    'source_group':            "Agrupación",
+    'source_union':            "Unión de fuentes",
+}
+
+CAMPOS_CAMBIO = ('recurso_id', 'recurso', 'tipo', 'cambio', 'seccion', 'objeto', 'campo', 'antes', 'despues')
+
+
+class _Lado:
+    def __init__(self, data):
+        self.res_map, self.col_map, self.seg_map, self.meta_map, _ = build_maps(data)
+        self.recursos = {r.get('export_id'): r for r in recursos_unicos(data.get('resources', []))}
+        self.hashes   = {eid: content_hash(r) for eid, r in self.recursos.items()}
+
+
+def _por_clave(items, *claves):
+    """Indexa una lista de sub-objetos por la primera clave presente (export_id, position…)."""
+    out = {}
+    for i, it in enumerate(items or []):
+        k = next((it.get(c) for c in claves if it.get(c) is not None), None)
+        out[k if k is not None else f"#{i}"] = it
+    return out
+
+def _claves_distintas(a, b):
+    return sorted(k for k in set(a or {}) | set(b or {})
+                  if content_hash((a or {}).get(k)) != content_hash((b or {}).get(k)))
+
+def _texto(v):
+    if isinstance(v, (list, tuple)):
+        return "\n".join(str(x) for x in v)
+    if isinstance(v, bool):
+        return "Sí" if v else "No"
+    return "—" if v is None else str(v)
+
+
+class _Comparador:
+    def __init__(self, a, b):
+        self.a, self.b = a, b
+        self.filas = []
+
+    def _fila(self, r, cambio, seccion="Recurso", objeto="", campo="", antes="", despues=""):
+        rt = r.get('resource_type', '')
+        self.filas.append({
+            'recurso_id': r.get('export_id'),
+            'recurso':    r.get('name', ''),
+            'tipo':       RT_LABEL.get(rt, rt),
+            'cambio':     cambio,
+            'seccion':    seccion,
+            'objeto':     objeto,
+            'campo':      campo,
+            'antes':      _texto(antes) if antes != "" else "",
+            'despues':    _texto(despues) if despues != "" else "",
+        })
+
+    def _campos(self, r, seccion, objeto, desc_a, desc_b, raw_a, raw_b):
+        """Compara dos descriptores legibles; si el hash difería pero se ven iguales, lista los atributos crudos."""
+        distintos = [k for k in desc_b if desc_a.get(k) != desc_b.get(k)]
+        for k in distintos:
+            self._fila(r, "modificado", seccion, objeto, k, desc_a.get(k), desc_b.get(k))
+        if not distintos:
+            self._fila(r, "modificado", seccion, objeto, "Otros atributos",
+                       ", ".join(_claves_distintas(raw_a, raw_b)), "")
+
+    def _coleccion(self, r, seccion, items_a, items_b, nombre, descriptor, *claves):
+        """Sub-objetos de una lista: agregados, eliminados y, sólo si el hash cambió, sus campos."""
+        ka, kb = _por_clave(items_a, *claves), _por_clave(items_b, *claves)
+        for k, it in kb.items():
+            if k not in ka:
+                self._fila(r, "agregado", seccion, nombre(it, self.b))
+            elif content_hash(ka[k]) != content_hash(it):
+                self._campos(r, seccion, nombre(it, self.b),
+                             descriptor(ka[k], self.a), descriptor(it, self.b), ka[k], it)
+        for k, it in ka.items():
+            if k not in kb:
+                self._fila(r, "eliminado", seccion, nombre(it, self.a))
+
+    # ── descriptores por sección ─────────────────────────────────────────────
+    @staticmethod
+    def _desc_columna(col, lado):
+        return {
+            'Label':     col.get('label') or col.get('name', ''),
+            'Tipo dato': col.get('data_format', ''),
+            'Tipo col.': (col.get('column_type') or '').replace('_', ' ').upper(),
+            'Lógica':    parse_transformation_logic(col, lado.res_map, lado.col_map),
+        }
+
+    @staticmethod
+    def _desc_segmento(seg, lado):
+        rules = [rule for fset in (seg.get('segment_filter_sets') or [])
+                 for rule in (fset.get('segment_filter_rules') or [])]
+        return {
+            'Nombre':  seg.get('name', ''),
+            'Default': seg.get('default_segment', False),
+            'Filtros': fmt_filter_rules(rules, lado.col_map),
+        }
+
+    @staticmethod
+    def _desc_rule_set_std(rs, lado):
+        p = parse_std_reconciliation({'reconciliation_rule_sets': [rs]}, lado.res_map, lado.col_map, lado.seg_map)
+        rs_p = p['rule_sets'][0]
+        return {'Posición': rs_p['pos'], 'Nombre': rs_p['name'], 'Reglas': rs_p['rules']}
+
+    @staticmethod
+    def _desc_rule_set_adv(rs, lado):
+        p = parse_adv_reconciliation({'reconciliation_rule_sets': [rs]}, lado.res_map, lado.col_map,
+                                     lado.seg_map, lado.meta_map)
+        rs_p = p['rule_sets'][0]
+        return {'Posición': rs_p['pos'], 'Nombre': rs_p['name'], 'Cruce': rs_p['cross_type'],
+                'Reglas': rs_p['rules'], 'Segmentos barridos': rs_p['sweep']}
+
+    @staticmethod
+    def _desc_grupo_adv(rg, lado):
+        g = parse_adv_reconciliation({'reconcilable_groups': [rg]}, lado.res_map, lado.col_map,
+                                     lado.seg_map, lado.meta_map)['groups'][0]
+        return {'Recurso': g['resource_name'], 'Grupo conciliable': g['group_name'],
+                'Filtros del grupo': g['group_filters'], 'Criterio': g['crit_col'],
+                'Segmentos internos': g['segments']}
+
+    # ── secciones ────────────────────────────────────────────────────────────
+    def _std(self, r, ra, rb):
+        seccion = SECCIONES['reconciliation']
+        lados = ('segment_a_id', 'segment_b_id', 'segment_a_prefix', 'segment_b_prefix',
+                 'a_source_settings', 'b_source_settings', 'is_chained')
+        if content_hash({k: ra.get(k) for k in lados}) != content_hash({k: rb.get(k) for k in lados}):
+            pa = parse_std_reconciliation(ra, self.a.res_map, self.a.col_map, self.a.seg_map)
+            pb = parse_std_reconciliation(rb, self.b.res_map, self.b.col_map, self.b.seg_map)
+            for sa, sb in zip(pa['sides'], pb['sides']):
+                desc = lambda s: {'Recurso': s['resource_name'], 'Grupo conciliable': s['group_name'],
+                                  'Filtros del grupo': s['group_filters'], 'Trigger': s['is_trigger']}
+                for k, va in desc(sa).items():
+                    if va != desc(sb)[k]:
+                        self._fila(r, "modificado", seccion, f"Lado {sb['prefix']}", k, va, desc(sb)[k])
+            if pa['is_chained'] != pb['is_chained']:
+                self._fila(r, "modificado", seccion, "", "Encadenada", pa['is_chained'], pb['is_chained'])
+        if content_hash(ra.get('reconciliation_rule_sets')) != content_hash(rb.get('reconciliation_rule_sets')):
+            self._coleccion(r, "Rule sets", ra.get('reconciliation_rule_sets'), rb.get('reconciliation_rule_sets'),
+                            lambda rs, _: rs.get('name', '') or f"Pos. {rs.get('position', '?')}",
+                            self._desc_rule_set_std, 'export_id', 'position')
+
+    def _adv(self, r, aa, ab):
+        if content_hash(aa.get('reconcilable_groups')) != content_hash(ab.get('reconcilable_groups')):
+            self._coleccion(r, SECCIONES['advanced_reconciliation'],
+                            aa.get('reconcilable_groups'), ab.get('reconcilable_groups'),
+                            lambda rg, _: f"Lado {rg.get('prefix_side', '?')}",
+                            self._desc_grupo_adv, 'prefix_side', 'export_id')
+        if content_hash(aa.get('reconciliation_rule_sets')) != content_hash(ab.get('reconciliation_rule_sets')):
+            self._coleccion(r, "Rule sets", aa.get('reconciliation_rule_sets'), ab.get('reconciliation_rule_sets'),
+                            lambda rs, _: rs.get('name', '') or f"Pos. {rs.get('position', '?')}",
+                            self._desc_rule_set_adv, 'export_id', 'position')
+
+    def _group(self, r, ga, gb):
+        def desc(sg, lado):
+            group_cols, agg_vals = parse_source_group(sg, lado.col_map)
+            return {'GROUP BY': " | ".join(group_cols) or "—",
+                    'Agregaciones': "  |  ".join(f"{fn}( {col} )" for fn, col in agg_vals) or "—",
+                    'Acumulativo': bool(sg.get('is_accumulative'))}
+        self._campos(r, SECCIONES['source_group'], "", desc(ga, self.a), desc(gb, self.b), ga, gb)
+
+    def _union(self, r, ua, ub):
+        seccion = SECCIONES['source_union']
+        if content_hash(ua.get('union_segments')) != content_hash(ub.get('union_segments')):
+            sa = {(s['resource_name'], s['group_name']): s for s in parse_union_segments(ua, self.a.col_map, self.a.seg_map)}
+            sb = {(s['resource_name'], s['group_name']): s for s in parse_union_segments(ub, self.b.col_map, self.b.seg_map)}
+            for k, s in sb.items():
+                if k not in sa:
+                    self._fila(r, "agregado", seccion, f"{k[0]} · {k[1]}")
+                else:
+                    for campo, key in (("Rol", 'rol'), ("Filtros del grupo", 'filters')):
+                        if sa[k][key] != s[key]:
+                            self._fila(r, "modificado", seccion, f"{k[0]} · {k[1]}", campo, sa[k][key], s[key])
+            for k in sa:
+                if k not in sb:
+                    self._fila(r, "eliminado", seccion, f"{k[0]} · {k[1]}")
+        mapeo = ('union_columns', 'union_cells', 'union_segments')
+        if content_hash([ua.get(k) for k in mapeo]) != content_hash([ub.get(k) for k in mapeo]):
+            ma = parse_union_mapping(ua, self.a.col_map, self.a.seg_map)
+            mb = parse_union_mapping(ub, self.b.col_map, self.b.seg_map)
+            fmt = lambda ms: [f"{m['source']}: {m['orig_col']} ({m['active']})" for m in ms]
+            for dest, ms in mb.items():
+                if dest not in ma:
+                    self._fila(r, "agregado", "Mapeo de unión", dest, "", "", fmt(ms))
+                elif ma[dest] != ms:
+                    self._fila(r, "modificado", "Mapeo de unión", dest, "Mapeo", fmt(ma[dest]), fmt(ms))
+            for dest, ms in ma.items():
+                if dest not in mb:
+                    self._fila(r, "eliminado", "Mapeo de unión", dest, "", fmt(ms), "")
+
+    def recurso(self, ra, rb):
+        for k in sorted(set(ra) | set(rb)):
+            va, vb = ra.get(k), rb.get(k)
+            if k in SECCIONES or isinstance(va, (dict, list)) or isinstance(vb, (dict, list)):
+                continue
+            if va != vb:
+                self._fila(rb, "modificado", "Recurso", "", k, va, vb)
+
+        if content_hash(ra.get('columns')) != content_hash(rb.get('columns')):
+            self._coleccion(rb, SECCIONES['columns'], ra.get('columns'), rb.get('columns'),
+                            lambda c, _: c.get('label') or c.get('name', ''), self._desc_columna, 'export_id')
+        if content_hash(ra.get('segments')) != content_hash(rb.get('segments')):
+            self._coleccion(rb, SECCIONES['segments'], ra.get('segments'), rb.get('segments'),
+                            lambda s, _: s.get('name', ''), self._desc_segmento, 'export_id')
+
+        for key, fn in (('reconciliation', self._std), ('advanced_reconciliation', self._adv),
+                        ('source_group', self._group), ('source_union', self._union)):
+            va, vb = ra.get(key) or {}, rb.get(key) or {}
+            if content_hash(va) == content_hash(vb):
+                continue
+            if not va or not vb:
+                self._fila(rb, "agregado" if vb else "eliminado", SECCIONES[key])
+            else:
+                fn(rb, va, vb)
+
+        # Cualquier otro bloque anidado que no tenga descriptor propio
+        otros = [k for k in _claves_distintas(ra, rb)
+                 if k not in SECCIONES and (isinstance(ra.get(k), (dict, list)) or isinstance(rb.get(k), (dict, list)))]
+        for k in otros:
+            self._fila(rb, "modificado", "Recurso", "", k, "(estructura)", "(estructura)")
+
+
+def diff_exports(data_a, data_b):
+    """Cambios de data_a (antes) a data_b (después): {'resumen': {...}, 'cambios': [fila, ...]}."""
+    a, b = _Lado(data_a), _Lado(data_b)
+    comp = _Comparador(a, b)
+    resumen = {'agregados': 0, 'eliminados': 0, 'modificados': 0, 'sin_cambios': 0}
+
+    ids = sorted(set(a.recursos) | set(b.recursos),
+                 key=lambda eid: sort_key(b.recursos.get(eid) or a.recursos[eid]))
+    for eid in ids:
+        ra, rb = a.recursos.get(eid), b.recursos.get(eid)
+        if ra is None:
+            resumen['agregados'] += 1
+            comp._fila(rb, "agregado")
+        elif rb is None:
+            resumen['eliminados'] += 1
+            comp._fila(ra, "eliminado")
+        elif a.hashes[eid] == b.hashes[eid]:
+            resumen['sin_cambios'] += 1
+        else:
+            resumen['modificados'] += 1
+            n = len(comp.filas)
+            comp.recurso(ra, rb)
+            if len(comp.filas) == n:   # sólo cambió el orden de claves/listas sin efecto visible
+                comp._fila(rb, "modificado", "Recurso", "", "Otros atributos",
+                           ", ".join(_claves_distintas(ra, rb)), "")
+    resumen['filas'] = len(comp.filas)
+    return {'resumen': resumen, 'cambios': comp.filas}
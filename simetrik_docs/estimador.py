@@ -0,0 +1,108 @@
+"""Estimación barata del tamaño del workbook y elección de la estrategia de render.
+
+Recorre columnas, segmentos, rule sets y celdas de unión de cada recurso sin parsear
+nada, con las mismas cuentas de filas que usa el renderer por sección. Alcanza para
+elegir la estrategia antes de generar:
+
+    completo   estilo completo (bordes, merges formateados), el camino de siempre
+    reducido   sin bordes por celda y merges sin formatear: la mitad del costo de estilos
+    streaming  workbook write_only: cada hoja se arma aparte y se vuelca a disco al terminarla
+
+El layout es aparte y lo elige quien genera (no el estimador):
+
+    combinado     títulos, metadatos y columnas anchas de las tablas en celdas combinadas
+    sin_combinar  sin merges: centrado en la selección y columnas que se ensanchan en su lugar;
+                  ahorra el costo de las combinaciones (el grueso del estilo completo)
+"""
+import json
+import os
+
+from .parsers import recursos_unicos
+
+ESTRATEGIAS = {
+    "completo":  "Estilo completo",
+    "reducido":  "Estilo reducido (sin bordes por celda)",
+    "streaming": "Streaming (hoja por hoja a disco)",
+}
+
+LAYOUTS = {
+    "combinado":    "Celdas combinadas",
+    "sin_combinar": "Sin combinar (centrado en la selección)",
+}
+
+# Umbrales en celdas estimadas para pasar a la estrategia siguiente
+CELDAS_REDUCIDO  = int(os.environ.get("SIMETRIK_DOC_CELDAS_REDUCIDO", "60000"))
+CELDAS_STREAMING = int(os.environ.get("SIMETRIK_DOC_CELDAS_STREAMING", "250000"))
+
+COLS_DETALLE = 5
+COLS_INDICE  = 7
+
+
+def estimar_recurso(r):
+    """(filas, merges, caracteres) de la hoja de detalle de un recurso."""
+    filas, merges = 6, 5   # título, 4 metadatos y separador
+
+    recon = r.get('reconciliation')
+    if recon:
+        n_rs = len(recon.get('reconciliation_rule_sets') or [])
+        filas  += 11 + n_rs
+        merges += 9 + n_rs
+    adv = r.get('advanced_reconciliation')
+    if adv:
+        n = len(adv.get('reconcilable_groups') or []) + len(adv.get('reconciliation_rule_sets') or [])
+        filas  += 7 + n
+        merges += 3
+    if r.get('source_group'):
+        filas  += 5
+        merges += 4
+    su = r.get('source_union')
+    if su:
+        n = len(su.get('union_segments') or [])
+        filas  += 4 + n
+        merges += 2 + n
+        if su.get('union_columns') and su.get('union_cells'):
+            n = len(su.get('union_columns') or [])
+            filas  += 4 + n
+            merges += 2 + n
+    n = len(r.get('segments') or [])
+    if n:
+        filas  += 3 + n
+        merges += 2 + n
+    n = len(r.get('columns') or [])
+    if n:
+        filas  += 2 + n
+        merges += 2 + n
+    # El JSON del recurso es una cota razonable del texto que termina en la hoja
+    texto = len(json.dumps(r, ensure_ascii=False, separators=(',', ':')))
+    return filas, merges, texto
+
+def elegir_estrategia(celdas):
+    if celdas > CELDAS_STREAMING:
+        return "streaming"
+    if celdas > CELDAS_REDUCIDO:
+        return "reducido"
+    return "completo"
+
+def estimar(data, selected_ids=None, por_recurso=None, layout="combinado"):
+    """Estimación del workbook para la selección y la estrategia que le corresponde.
+
+    por_recurso: {eid: estimar_recurso(r)} precalculado, para reestimar sin recorrer el JSON.
+    layout: con "sin_combinar" no se cuentan rangos combinados.
+    """
+    if por_recurso is None:
+        resources = recursos_unicos(data.get('resources', []), selected_ids)
+        partes = [estimar_recurso(r) for r in resources]
+    else:
+        partes = [por_recurso[eid] for eid in (por_recurso if selected_ids is None else selected_ids)
+                  if eid in por_recurso]
+    hojas  = len(partes)
+    filas  = sum(p[0] for p in partes) + hojas + 4
+    celdas = sum(p[0] for p in partes) * COLS_DETALLE + (hojas + 4) * COLS_INDICE
+    return {
+        'hojas':      hojas + 1,
+        'filas':      filas,
+        'celdas':     celdas,
+        'merges':     sum(p[1] for p in partes) + 2 if layout == "combinado" else 0,
+        'texto_kb':   round(sum(p[2] for p in partes) / 1024, 1),
+        'estrategia': elegir_estrategia(celdas),
+    }
@@ -0,0 +1,659 @@
+"""Renderer Excel: es el único módulo que importa openpyxl (y pandas, al generar).
+
+simetrik_docs lo importa recién cuando se pide generar_excel, así el import de la
+librería y de cada worker queda liviano.
+"""
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import copy
+from datetime import datetime
+from functools import lru_cache
+
+from openpyxl.cell.cell import Cell
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+from openpyxl.worksheet.cell_range import CellRange
+
+from .constants import C, RT_LABEL, RT_COLOR
+from .determinismo import FECHA_FIJA, fecha_determinista, fecha_export, huella, normalizar_xlsx
+from .estimador import ESTRATEGIAS, LAYOUTS, estimar
+from .layout import ajustar_hoja
+from .perfil import marca
+from .salida import ArchivoGenerado
+from .secciones import secciones_recurso
+from .streaming import CeldaDiferida, HojaDiferida, LibroStreaming
+from .parsers import build_adjacency, build_maps, build_relations, limpiar_hoja, recursos_unicos
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HELPERS OPENPYXL (Ajuste automático de celdas y bordes)
+# ══════════════════════════════════════════════════════════════════════════════
+# Estrategia de render de la generación en curso (las generaciones corren en hilos)
+_ESTRATEGIA = ContextVar("estrategia", default="completo")
+# Estilo de sc() → StyleArray ya registrado en el workbook de la generación en curso
+_ESTILOS    = ContextVar("estilos", default=None)
+_LAYOUT     = ContextVar("layout", default="combinado")
+# Sin combinar: título de la hoja → celdas cuyo texto desborda sobre un rango no combinado
+_DESBORDES  = ContextVar("desbordes", default=None)
+
+def mk_border():
+    t = Side(border_style="thin", color=C["border"])
+    return Border(left=t, right=t, top=t, bottom=t)
+
+@lru_cache(maxsize=None)
+def _borde(tramo):
+    # Un rango sin combinar lleva el contorno de la combinación: sin líneas entre sus celdas
+    if tramo is None:
+        return mk_border()
+    t, nada = Side(border_style="thin", color=C["border"]), Side()
+    return Border(left=t if tramo == "ini" else nada, right=t if tramo == "fin" else nada, top=t, bottom=t)
+
+def con_bordes():
+    return _ESTRATEGIA.get() == "completo"
+
+def sin_combinar():
+    return _LAYOUT.get() == "sin_combinar"
+
+def _tramo(col, ini, fin):
+    """Posición de col en el rango ini..fin cuando el layout no combina (None si combina)."""
+    if ini == fin or not sin_combinar():
+        return None
+    return "ini" if col == ini else "fin" if col == fin else "medio"
+
+@lru_cache(maxsize=None)
+def _estilo(bg, bold, color, size, ha, va, wrap):
+    fill = PatternFill(start_color=bg, end_color=bg, fill_type="solid") if bg else None
+    return (Alignment(horizontal=ha, vertical=va, wrap_text=wrap),
+            Font(name='Calibri', bold=bold, size=size, color=color), fill)
+
+def sc(cell, bg=None, bold=False, color=C["dark"], size=10,
+       ha='left', va='top', wrap=True, tramo=None):
+    clave = (bg, bold, color, size, ha, va, wrap, tramo)
+    if isinstance(cell, CeldaDiferida):
+        cell.estilo, cell.objetos = clave, _estilo(*clave[:7])
+        return
+    # Una celda nueva con un estilo ya visto copia su StyleArray: registrar fuente, relleno y
+    # bordes en el workbook (hash y comparación de cada objeto) se paga una vez por estilo
+    ids = _ESTILOS.get()
+    if ids is not None and not cell.has_style:
+        base = ids.get(clave)
+        if base is not None:
+            cell._style = copy(base)
+            return
+    else:
+        ids = None
+    if con_bordes():
+        cell.border = _borde(tramo)
+    cell.alignment, cell.font, fill = _estilo(*clave[:7])
+    if fill is not None:
+        cell.fill = fill
+    if ids is not None:
+        ids[clave] = copy(cell._style)
+
+def combinar(ws, rango):
+    """merge_cells; sin estilo completo se registra el rango sin formatear sus bordes.
+
+    Con el layout sin_combinar sólo anota la primera celda para ajustar_hoja: las celdas del
+    rango ya llevan su estilo.
+    """
+    if sin_combinar():
+        desbordes = _DESBORDES.get()
+        if desbordes is not None:
+            r = CellRange(rango)
+            desbordes.setdefault(ws.title, set()).add((r.min_row, r.min_col))
+        return
+    if con_bordes():
+        ws.merge_cells(rango)
+    else:
+        ws.merged_cells.add(CellRange(rango))
+
+def combinar_celdas(ws, row, ini, fin, valor, ha='left', **estilo):
+    """Celdas ini..fin de la fila con un mismo estilo y `valor` en la primera, combinadas.
+
+    Sin combinar, un texto centrado pasa a centrarse en la selección (centerContinuous) y
+    uno a la izquierda sin wrap desborda sobre las celdas vecinas, que quedan vacías.
+    """
+    if ha == 'center' and sin_combinar():
+        ha = 'centerContinuous'
+    for i in range(ini, fin + 1):
+        c = ws.cell(row=row, column=i)
+        if i == ini: c.value = valor
+        sc(c, ha=ha, tramo=_tramo(i, ini, fin), **estilo)
+    combinar(ws, f'{chr(64+ini)}{row}:{chr(64+fin)}{row}')
+
+def hdr(cell, text, bg=C["dark"], ha='center', tramo=None):
+    cell.value = text
+    sc(cell, bg=bg, bold=True, color=C["white"], size=10,
+       ha=ha, va='center', wrap=False, tramo=tramo)
+
+def section_title(ws, row, text, bg=C["red"], cols=5):
+    # Sub-secciones (texto con sangría) usan red2 automáticamente
+    effective_bg = C["red2"] if bg == C["red"] and text.startswith("  ") else bg
+    combinar_celdas(ws, row, 1, cols, text, bg=effective_bg, bold=True, color=C["white"], size=10,
+                    va='center', wrap=False)
+    ws.row_dimensions[row].height = 20
+    return row + 1
+
+def meta_row(ws, row, label, value, cols=5, bg_val=None, bg_label=C["slate"]):
+    bg_val = bg_val or C["grey"]
+    c_l = ws.cell(row=row, column=1)
+    c_l.value = label
+    sc(c_l, bg=bg_label, bold=True, color=C["white"], size=9, ha='left', va='center', wrap=False)
+
+    # Sin combinar el valor hace wrap en B, que entonces puede ensancharse (LIMITES_PLANO)
+    val_str = str(value) if value is not None else "—"
+    combinar_celdas(ws, row, 2, cols, val_str, bg=bg_val, size=9, va='center', wrap=True)
+    return row + 1   # el alto lo fija ajustar_hoja con el ancho real de B:E
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PLANES DE FILAS (tablas de secciones_recurso compiladas una vez por plantilla)
+# ══════════════════════════════════════════════════════════════════════════════
+ZEBRA = (C["grey"], C["white"])
+
+class _Plan:
+    """Plantilla compilada: qué escribir en cada columna de la hoja y con qué estilo.
+
+    celdas[z] tiene, para la zebra z, una tupla (columna, índice del valor o None si la
+    cubre una combinación, clave de sc(), objetos de estilo, color) por columna de la hoja;
+    color es la función de la plantilla o None. rangos son las combinaciones de cada fila
+    (ninguna con el layout sin_combinar: ahí cada celda del rango lleva su tramo de borde).
+    """
+    __slots__ = ('encabezados', 'celdas', 'rangos')
+
+    def __init__(self, plantilla, plano):
+        self.encabezados, self.rangos = [], []
+        por_columna = []
+        col = 1
+        for k, (texto, ancho, ha, color) in enumerate(plantilla.columnas):
+            fin = col + ancho - 1
+            for j in range(col, fin + 1):
+                tramo = None if not plano or ancho == 1 else "ini" if j == col else "fin" if j == fin else "medio"
+                self.encabezados.append((j, texto if j == col else "",
+                                         'centerContinuous' if tramo else 'center', tramo))
+                por_columna.append((j, k if j == col else None, ha, color if j == col else None, tramo))
+            if ancho > 1 and not plano:
+                self.rangos.append(f"{chr(64 + col)}{{0}}:{chr(64 + fin)}{{0}}")
+            col = fin + 1
+        self.celdas = tuple(
+            tuple((c, k, (bg, False, C["dark"], 9, ha, 'top', True, tramo),
+                   _estilo(bg, False, C["dark"], 9, ha, 'top', True), color)
+                  for c, k, ha, color, tramo in por_columna)
+            for bg in ZEBRA)
+
+@lru_cache(maxsize=None)
+def _plan(plantilla, plano=False):
+    return _Plan(plantilla, plano)
+
+def escribir_tabla(ws, row, plantilla, filas, tc):
+    """Encabezado y filas de una tabla de secciones_recurso(); devuelve la fila siguiente."""
+    plan = _plan(plantilla, sin_combinar())
+    for col, texto, ha, tramo in plan.encabezados:
+        hdr(ws.cell(row=row, column=col), texto, bg=tc, ha=ha, tramo=tramo)
+    for rango in plan.rangos:
+        combinar(ws, rango.format(row))
+    ws.row_dimensions[row].height = plantilla.alto
+    row += 1
+    escribir = _filas_diferidas if isinstance(ws, HojaDiferida) else _filas_openpyxl
+    return escribir(ws, row, plan, filas)
+
+def _filas_openpyxl(ws, row, plan, filas):
+    ids = _ESTILOS.get()
+    if ids is None:
+        ids = {}   # fuera de generar_excel: el estilo se registra igual, sin reusarlo entre tablas
+    for i, fila in enumerate(filas):
+        for col, k, clave, _, color in plan.celdas[i % 2]:
+            v = "" if k is None else fila[k]
+            c = Cell(ws, row=row, column=col, value=v)
+            ws._add_cell(c)
+            if color is not None:
+                clave = clave[:2] + (color(v),) + clave[3:]
+            base = ids.get(clave)
+            if base is not None:
+                c._style = copy(base)
+            else:
+                sc(c, *clave)
+                ids.setdefault(clave, copy(c._style))
+        for rango in plan.rangos:
+            combinar(ws, rango.format(row))
+        row += 1
+    return row
+
+def _filas_diferidas(ws, row, plan, filas):
+    for i, fila in enumerate(filas):
+        celdas = []
+        for col, k, clave, objetos, color in plan.celdas[i % 2]:
+            v = "" if k is None else fila[k]
+            if color is not None:
+                clave = clave[:2] + (color(v),) + clave[3:]
+                objetos = _estilo(*clave[:7])
+            celdas.append((col, v, clave, objetos))
+        ws.escribir_fila(row, celdas)
+        for rango in plan.rangos:
+            combinar(ws, rango.format(row))
+        row += 1
+    return row
+
+def escribir_bloques(ws, row, bloques, tc, cols=5, continuaciones=None):
+    """Bloques de secciones_recurso() en la hoja desde `row`; devuelve la fila siguiente.
+
+    continuaciones: las tablas paginables de más de continuaciones.max_filas filas dejan
+    acá las primeras y un link a la hoja de continuación con el resto.
+    """
+    titulo = None
+    for b in bloques:
+        if b['tipo'] == 'titulo':
+            # El nivel 2 lleva sangría: section_title lo pinta con red2 en las conciliaciones
+            titulo = b['texto'] if b['nivel'] == 1 else "  " + b['texto']
+            row    = section_title(ws, row, titulo, bg=tc, cols=cols)
+        elif b['tipo'] == 'meta':
+            for etiqueta, valor in b['filas']:
+                row = meta_row(ws, row, etiqueta, valor, cols=cols, bg_label=tc)
+            row += 1
+        elif continuaciones is not None and continuaciones.corta(b):
+            tope = continuaciones.max_filas
+            row  = escribir_tabla(ws, row, b['plantilla'], b['filas'][:tope], tc)
+            hoja = continuaciones.agregar(titulo, b['plantilla'], b['filas'])
+            row  = enlace_hoja(ws, row, f"… {_miles(len(b['filas']) - tope)} filas más en «{hoja}»  →",
+                               hoja, cols) + 1
+        else:
+            row = escribir_tabla(ws, row, b['plantilla'], b['filas'], tc) + 1
+    return row
+
+def _miles(n):
+    return f"{n:,}".replace(",", ".")
+
+def enlace_hoja(ws, row, texto, hoja, cols=5, col=1):
+    """Fila con un link interno a `hoja` desde la columna col; devuelve la fila siguiente."""
+    combinar_celdas(ws, row, col, cols, texto, bg=C["grey"], size=9, va='center', wrap=False)
+    c = ws.cell(row=row, column=col)
+    c.hyperlink = f"#'{hoja}'!A1"
+    c.font = Font(name='Calibri', color=C["blue"], underline="single", size=9)
+    ws.row_dimensions[row].height = 15
+    return row + 1
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HOJAS DE CONTINUACIÓN (secciones de miles de filas)
+# ══════════════════════════════════════════════════════════════════════════════
+# Filas por sección paginable en cada hoja; 0 desactiva las hojas de continuación
+MAX_FILAS_SECCION = int(os.environ.get("SIMETRIK_DOC_MAX_FILAS_SECCION", "1000"))
+
+class Continuaciones:
+    """Hojas de continuación de un recurso: «Nombre_eid (2)», «(3)»… de a max_filas filas.
+
+    escribir_bloques las va reservando mientras arma la hoja principal; escribir() las
+    crea después, así quedan a continuación de ella en el workbook (también en streaming).
+    """
+
+    def __init__(self, nombre, eid, principal, max_filas=MAX_FILAS_SECCION):
+        self.nombre, self.eid = nombre, eid
+        self.principal = principal
+        self.max_filas = max_filas
+        self.partes    = []   # (hoja, título de la sección, plantilla, filas, desde, total, anterior, siguiente)
+
+    def corta(self, bloque):
+        return bool(self.max_filas) and bloque['plantilla'].paginable and len(bloque['filas']) > self.max_filas
+
+    def agregar(self, titulo, plantilla, filas):
+        """Reserva las hojas para filas[max_filas:] y devuelve el nombre de la primera."""
+        tope     = self.max_filas
+        desde    = list(range(tope, len(filas), tope))
+        primera  = len(self.partes) + 2
+        hojas    = [limpiar_hoja(self.nombre, self.eid, primera + k) for k in range(len(desde))]
+        for k, ini in enumerate(desde):
+            self.partes.append((hojas[k], titulo, plantilla, filas[ini:ini + tope], ini, len(filas),
+                                hojas[k - 1] if k else self.principal,
+                                hojas[k + 1] if k + 1 < len(hojas) else None))
+        return hojas[0]
+
+    def escribir(self, wb, titulo, tc, limites, cols=5):
+        for hoja, seccion, plantilla, filas, desde, total, anterior, siguiente in self.partes:
+            ws = wb.create_sheet(hoja)
+            ws.sheet_view.showGridLines = False
+            combinar_celdas(ws, 1, 1, cols, f"{titulo}  ·  continuación", bg=tc, bold=True, color=C["white"],
+                            size=12, va='center', wrap=False)
+            ws.row_dimensions[1].height = 30
+            row = enlace_hoja(ws, 2, f"←  {anterior}", anterior, cols)
+            if siguiente:
+                row = enlace_hoja(ws, row, f"{siguiente}  →", siguiente, cols)
+            row = section_title(ws, row + 1, f"{(seccion or '').rstrip()}  ·  filas {_miles(desde + 1)} a "
+                                             f"{_miles(desde + len(filas))} de {_miles(total)}", bg=tc, cols=cols)
+            ws.freeze_panes = f"A{row + 1}"   # el encabezado de la tabla queda fijo al desplazarse
+            row = escribir_tabla(ws, row, plantilla, filas, tc)
+            if siguiente:
+                enlace_hoja(ws, row + 1, f"… siguen en «{siguiente}»  →", siguiente, cols)
+            _cerrar_hoja(wb, ws, limites)
+
+
+# Anchos (mínimo, máximo) que ajustar_hoja puede elegir según el contenido
+LIMITES_INDICE  = {'A': (5, 8), 'B': (8, 14), 'C': (24, 60), 'D': (18, 30),
+                   'E': (24, 60), 'F': (24, 60), 'G': (8, 10)}
+LIMITES_DETALLE = {'A': (26, 40), 'B': (22, 34), 'C': (22, 34), 'D': (22, 22), 'E': (36, 36)}
+# Sin combinar el texto de un rango hace wrap en su primera columna, que puede ensancharse
+LIMITES_PLANO   = {'A': (26, 40), 'B': (22, 50), 'C': (22, 40), 'D': (22, 50), 'E': (22, 36)}
+LIMITES_CAMBIOS = {'A': (10, 12), 'B': (24, 50), 'C': (18, 30), 'D': (13, 13), 'E': (18, 30),
+                   'F': (22, 40), 'G': (14, 24), 'H': (48, 48), 'I': (48, 48)}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# GENERADOR EXCEL
+# ══════════════════════════════════════════════════════════════════════════════
+def generar_excel(data, selected_ids, progreso=None, enlaces_externos=None, determinista=False,
+                  estrategia=None, maps=None, linaje=False, layout="combinado", max_filas=None):
+    """Workbook con el índice y una hoja por recurso seleccionado.
+
+    estrategia: una de ESTRATEGIAS; None la elige estimar() según el tamaño de la selección.
+    layout: uno de LAYOUTS; "sin_combinar" no usa merges (más rápido y liviano).
+    max_filas: tope de filas de columnas y de mapeo de unión por hoja (por defecto
+    MAX_FILAS_SECCION; 0 sin tope): el resto va a hojas de continuación enlazadas.
+    maps: build_maps(data) ya calculado (p. ej. los de un ModeloPlano compartido).
+    linaje: agrega después del Índice la hoja 🗺️ Linaje con el diagrama por niveles.
+    """
+    if estrategia is None:
+        estrategia = estimar(data, selected_ids)['estrategia']
+    elif estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {estrategia}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout desconocido: {layout}")
+    token     = _ESTRATEGIA.set(estrategia)
+    estilos   = _ESTILOS.set({})
+    capas     = _LAYOUT.set(layout)
+    desbordes = _DESBORDES.set({})
+    try:
+        return _generar_excel(data, selected_ids, progreso, enlaces_externos, determinista, estrategia, maps,
+                              linaje, MAX_FILAS_SECCION if max_filas is None else max_filas)
+    finally:
+        _DESBORDES.reset(desbordes)
+        _LAYOUT.reset(capas)
+        _ESTILOS.reset(estilos)
+        _ESTRATEGIA.reset(token)
+        marca(None)
+
+@contextmanager
+def _libro(output, estrategia):
+    """Workbook de destino: el de pandas o uno write_only en modo streaming."""
+    if estrategia == "streaming":
+        wb = LibroStreaming()
+        yield wb
+        wb.save(output)
+        return
+    import pandas as pd
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        yield writer.book
+
+def _desbordes(ws):
+    return (_DESBORDES.get() or {}).pop(ws.title, ())
+
+def _cerrar_hoja(wb, ws, limites):
+    # Anchos según contenido y altos de todas las filas con wrap, en una sola pasada
+    ajustar_hoja(ws, limites, desbordes=_desbordes(ws))
+    if isinstance(wb, LibroStreaming):
+        wb.volcar(ws)
+
+def _generar_excel(data, selected_ids, progreso, enlaces_externos, determinista, estrategia, maps, linaje,
+                   max_filas):
+    marca("build_maps")
+    all_resources             = data.get('resources', [])
+    nodes                     = data.get('nodes', [])
+    maps                      = maps or build_maps(data)
+    res_map                   = maps[0]
+
+    resources = recursos_unicos(all_resources, selected_ids)
+
+    rels      = build_relations(resources, nodes, res_map)
+    map_hojas = {r.get('export_id'): limpiar_hoja(r.get('name', ''), r.get('export_id'))
+                 for r in resources}
+
+    # En modo determinista nada depende del reloj: mismo export y selección → mismos bytes
+    if not determinista:
+        fecha = datetime.now()
+        sello = f"Generado: {fecha.strftime('%Y-%m-%d %H:%M')}"
+    elif fecha_export(data):
+        fecha = fecha_determinista(data)
+        sello = f"Exportado: {fecha_export(data).strftime('%Y-%m-%d %H:%M')}"
+    else:
+        fecha = fecha_determinista(data)
+        sello = f"Versión: {huella(data, selected_ids)}"
+
+    marca("indice")
+    output = ArchivoGenerado()   # en memoria hasta SPILL_MB, después en un temporal en disco
+    with _libro(output, estrategia) as wb:
+
+        # ── ÍNDICE ─────────────────────────────────────────────────────────────
+        ws = wb.create_sheet("📚 Índice", 0)
+        ws.sheet_view.showGridLines = False
+
+        combinar_celdas(ws, 1, 1, 7, "SIMETRIK DOCUMENTATION  ·  PeYa Finance Operations & Payments",
+                        bg=C["red"], bold=True, color=C["white"], size=13, ha='center', va='center', wrap=False)
+        ws.row_dimensions[1].height = 32
+
+        combinar_celdas(ws, 2, 1, 7, f"{sello}   |   Recursos documentados: {len(resources)}",
+                        bg=C["dark"], color=C["white"], size=9, ha='center', va='center', wrap=False)
+        ws.row_dimensions[2].height = 15
+
+        idx_hdrs = ["#", "ID", "NOMBRE DEL RECURSO", "TIPO",
+                    "PROVIENE DE", "ALIMENTA A", "LINK 🔗"]
+        for i, h in enumerate(idx_hdrs, 1):
+            hdr(ws.cell(row=4, column=i), h, bg=C["dark"])
+        ws.row_dimensions[4].height = 20
+        
+        ws.freeze_panes = "A5"
+
+        for row_n, res in enumerate(resources, 5):
+            eid     = res.get('export_id')
+            rt      = res.get('resource_type', '')
+            bg      = C["grey"] if row_n % 2 == 0 else C["white"]
+
+            vals = [row_n - 4, eid, res.get('name', ''), RT_LABEL.get(rt, rt),
+                    ", ".join(rels[eid]["parents"]) or "— origen",
+                    ", ".join(rels[eid]["children"]) or "— fin de flujo"]
+            for col_n, val in enumerate(vals, 1):
+                c = ws.cell(row_n, col_n, val)
+                sc(c, bg=bg, size=9, va='center', wrap=False)
+                if col_n == 4:
+                    c.font = Font(name='Calibri', bold=True, size=9,
+                                  color=RT_COLOR.get(rt, C["dark"]))
+
+            # Link interno seguro a las pestañas del mismo excel
+            lnk = ws.cell(row_n, 7, "Ver →")
+            lnk.hyperlink = f"#'{map_hojas[eid]}'!A1"
+            lnk.font = Font(name='Calibri', color=C["blue"], underline="single", size=9)
+            if con_bordes(): lnk.border = mk_border()
+            ws.row_dimensions[row_n].height = 15
+
+        # Modo dividido: recursos vecinos que viven en otro archivo del mismo paquete
+        if enlaces_externos:
+            up, down = build_adjacency(nodes)
+            propios  = set(map_hojas)
+            externos = {}
+            for eid in map_hojas:
+                for oid in up.get(eid, []):
+                    if oid not in propios and oid in enlaces_externos:
+                        externos.setdefault(oid, set()).add("Proviene de")
+                for oid in down.get(eid, []):
+                    if oid not in propios and oid in enlaces_externos:
+                        externos.setdefault(oid, set()).add("Alimenta a")
+            if externos:
+                by_id = {r.get('export_id'): r for r in recursos_unicos(all_resources, externos)}
+                row_n = len(resources) + 6
+                row_n = section_title(ws, row_n, "🔗  RECURSOS RELACIONADOS EN OTROS ARCHIVOS", bg=C["dark"], cols=7)
+                for i, h in enumerate(["#", "ID", "NOMBRE DEL RECURSO", "TIPO", "RELACIÓN", "ARCHIVO", "LINK 🔗"], 1):
+                    hdr(ws.cell(row=row_n, column=i), h, bg=C["dark"])
+                row_n += 1
+                for n, (oid, res) in enumerate(by_id.items(), 1):
+                    rt    = res.get('resource_type', '')
+                    bg    = C["grey"] if n % 2 == 0 else C["white"]
+                    vals  = [n, oid, res.get('name', ''), RT_LABEL.get(rt, rt),
+                             " / ".join(sorted(externos[oid])), enlaces_externos[oid]]
+                    for col_n, val in enumerate(vals, 1):
+                        sc(ws.cell(row_n, col_n, val), bg=bg, size=9, va='center', wrap=False)
+                    lnk = ws.cell(row_n, 7, "Abrir →")
+                    hoja = limpiar_hoja(res.get('name', ''), oid)
+                    lnk.hyperlink = f"{enlaces_externos[oid]}#'{hoja}'!A1"
+                    lnk.font = Font(name='Calibri', color=C["blue"], underline="single", size=9)
+                    if con_bordes(): lnk.border = mk_border()
+                    ws.row_dimensions[row_n].height = 15
+                    row_n += 1
+
+        _cerrar_hoja(wb, ws, LIMITES_INDICE)
+
+        if linaje:
+            marca("linaje")
+            from .diagrama import layout_linaje
+            ws = escribir_linaje(wb, layout_linaje(data, selected_ids), map_hojas)
+            if isinstance(wb, LibroStreaming):
+                wb.volcar(ws)
+
+        # ── HOJAS DE DETALLE ───────────────────────────────────────────────────
+        marca("hojas")
+        for n_hoja, res in enumerate(resources):
+            # El callback de progreso puede lanzar GeneracionCancelada para cortar la generación
+            if progreso:
+                progreso(n_hoja, len(resources))
+            eid  = res.get('export_id')
+            rt   = res.get('resource_type', '')
+            name = res.get('name', '')
+            tc   = RT_COLOR.get(rt, C["dark"])  # Color sobrio de la temática de ESTE recurso
+            COLS = 5
+
+            ws = wb.create_sheet(map_hojas[eid])
+            ws.sheet_view.showGridLines = False
+
+            row = 1
+            combinar_celdas(ws, row, 1, COLS, RT_LABEL.get(rt, '') + "  ·  " + name,
+                            bg=tc, bold=True, color=C["white"], size=12, va='center', wrap=False)
+            ws.row_dimensions[row].height = 30
+            row += 1
+            
+            ws.freeze_panes = "A2"
+
+            # Etiquetas también toman el color de la temática; las tablas salen de sus planes
+            limites = LIMITES_PLANO if sin_combinar() else LIMITES_DETALLE
+            resto   = Continuaciones(name, eid, map_hojas[eid], max_filas)
+            escribir_bloques(ws, row, secciones_recurso(res, maps, rels), tc, cols=COLS, continuaciones=resto)
+
+            _cerrar_hoja(wb, ws, limites)
+            resto.escribir(wb, RT_LABEL.get(rt, '') + "  ·  " + name, tc, limites, cols=COLS)
+
+        if "Sheet" in wb.sheetnames:
+            wb.remove(wb["Sheet"])
+        if progreso:
+            progreso(len(resources), len(resources))
+        marca("guardado")
+
+    if determinista:
+        with output:
+            return normalizar_xlsx(output, fecha)
+    output.seek(0)
+    return output
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HOJA DE LINAJE (layout de simetrik_docs.diagrama)
+# ══════════════════════════════════════════════════════════════════════════════
+def escribir_linaje(wb, diagrama, map_hojas, titulo="🗺️ Linaje", index=1):
+    """Hoja con el diagrama de linaje: una columna por nivel y cada recurso en el orden del layout.
+
+    openpyxl no inserta imágenes SVG, así que la hoja dibuja el mismo layout con celdas
+    (color del tipo y link a la hoja del recurso); las aristas están en el SVG del diagrama.
+    """
+    from openpyxl.utils import get_column_letter
+    ws = wb.create_sheet(titulo, index)
+    ws.sheet_view.showGridLines = False
+    cols = max(len(diagrama.niveles), 1)
+
+    for i in range(1, cols + 1):
+        c = ws.cell(row=1, column=i)
+        if i == 1: c.value = "LINAJE DEL FLUJO  ·  de los orígenes (izquierda) a las conciliaciones"
+        sc(c, bg=C["red"], bold=True, color=C["white"], size=13, ha='left', va='center', wrap=False,
+           tramo=_tramo(i, 1, cols))
+        c = ws.cell(row=2, column=i)
+        if i == 1: c.value = (f"Recursos: {len(diagrama.nodos)}   |   Niveles: {len(diagrama.niveles)}   |   "
+                              f"Cruces de aristas: {diagrama.cruces}   |   "
+                              "Diagrama con aristas: python -m simetrik_docs diagrama")
+        sc(c, bg=C["dark"], color=C["white"], size=9, ha='left', va='center', wrap=False,
+           tramo=_tramo(i, 1, cols))
+    if cols > 1:
+        combinar(ws, f'A1:{get_column_letter(cols)}1')
+        combinar(ws, f'A2:{get_column_letter(cols)}2')
+    ws.row_dimensions[1].height = 32
+    ws.row_dimensions[2].height = 15
+
+    for k, capa in enumerate(diagrama.niveles, 1):
+        hdr(ws.cell(row=4, column=k), f"NIVEL {k}", bg=C["dark"])
+        for row_n, eid in enumerate(capa, 5):
+            n = diagrama.nodos[eid]
+            c = ws.cell(row_n, k, n['nombre'])
+            sc(c, bg=RT_COLOR.get(n['tipo'], C["dark"]), bold=True, color=C["white"], size=9,
+               va='center', wrap=False)
+            if eid in map_hojas:
+                c.hyperlink = f"#'{map_hojas[eid]}'!A1"
+            ws.row_dimensions[row_n].height = 18
+    ws.row_dimensions[4].height = 20
+    ws.freeze_panes = "A5"
+    # Sin wrap ajustar_hoja sólo fija los anchos
+    ajustar_hoja(ws, {get_column_letter(k): (18, 36) for k in range(1, cols + 1)}, desbordes=_desbordes(ws))
+    return ws
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HOJA DE CAMBIOS (diff entre dos exports)
+# ══════════════════════════════════════════════════════════════════════════════
+CAMBIO_COLOR = {"agregado": "16A34A", "eliminado": C["red"], "modificado": "D97706"}
+
+def escribir_cambios(wb, diff, titulo="🔀 Cambios", index=0, fecha=None):
+    """Agrega a wb la hoja de cambios de diff_exports(); sin fecha el encabezado no lleva hora."""
+    ws = wb.create_sheet(titulo, index)
+    ws.sheet_view.showGridLines = False
+    res = diff['resumen']
+
+    for i in range(1, 10):
+        c = ws.cell(row=1, column=i)
+        if i == 1: c.value = "CAMBIOS ENTRE EXPORTS  ·  PeYa Finance Operations & Payments"
+        sc(c, bg=C["red"], bold=True, color=C["white"], size=13, ha='center', va='center', wrap=False)
+    ws.merge_cells('A1:I1')
+    ws.row_dimensions[1].height = 32
+
+    for i in range(1, 10):
+        c = ws.cell(row=2, column=i)
+        if i == 1: c.value = ((f"Generado: {fecha.strftime('%Y-%m-%d %H:%M')}   |   " if fecha else "") +
+                              f"Agregados: {res['agregados']}   |   Eliminados: {res['eliminados']}   |   "
+                              f"Modificados: {res['modificados']}   |   Sin cambios: {res['sin_cambios']}")
+        sc(c, bg=C["dark"], color=C["white"], size=9, ha='center', va='center', wrap=False)
+    ws.merge_cells('A2:I2')
+    ws.row_dimensions[2].height = 15
+
+    for i, h in enumerate(["ID", "RECURSO", "TIPO", "CAMBIO", "SECCIÓN",
+                           "OBJETO", "CAMPO", "ANTES", "DESPUÉS"], 1):
+        hdr(ws.cell(row=4, column=i), h, bg=C["dark"])
+    ws.row_dimensions[4].height = 20
+    ws.freeze_panes = "A5"
+
+    for row_n, fila in enumerate(diff['cambios'], 5):
+        bg = C["grey"] if row_n % 2 == 0 else C["white"]
+        vals = [fila['recurso_id'], fila['recurso'], fila['tipo'], fila['cambio'].upper(),
+                fila['seccion'], fila['objeto'], fila['campo'], fila['antes'], fila['despues']]
+        for col_n, val in enumerate(vals, 1):
+            c = ws.cell(row_n, col_n, val)
+            sc(c, bg=bg, size=9, va='top', wrap=col_n >= 6,
+               ha='center' if col_n in (1, 4) else 'left')
+            if col_n == 4:
+                c.font = Font(name='Calibri', bold=True, size=9,
+                              color=CAMBIO_COLOR.get(fila['cambio'], C["dark"]))
+
+    if not diff['cambios']:
+        c = ws.cell(5, 1, "Los dos exports son idénticos")
+        sc(c, size=9, va='center', wrap=False)
+
+    ajustar_hoja(ws, LIMITES_CAMBIOS)
+    ws.auto_filter.ref = f"A4:I{max(5, 4 + len(diff['cambios']))}"
+    return ws
+
+def generar_excel_cambios(diff, determinista=False):
+    """Workbook con sólo la hoja de cambios."""
+    from openpyxl import Workbook
+    wb = Workbook()
+    escribir_cambios(wb, diff, fecha=None if determinista else datetime.now())
+    wb.remove(wb["Sheet"])
+    output = ArchivoGenerado()
+    wb.save(output)
+    if determinista:
+        with output:
+            return normalizar_xlsx(output, FECHA_FIJA)
+    output.seek(0)
+    return output
@@ -0,0 +1,11 @@
+"""Hash de contenido canónico para recursos y sub-objetos del export."""
+import hashlib
+import json
+
+
+def canonical_json(obj):
+    """Serialización estable: mismas claves y valores → mismos bytes, sin importar el orden."""
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def content_hash(obj):
+    return hashlib.blake2b(canonical_json(obj), digest_size=16).hexdigest()
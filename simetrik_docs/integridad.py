@@ -0,0 +1,241 @@
+"""Chequeo de integridad del export antes de generar.
+
+Las referencias rotas no fallan: build_maps y los parsers las muestran como col_{id},
+ID:{id} o "—", y un export_id repetido se descarta sin aviso, así que el problema recién
+se ve en el Excel terminado. validar() junta en una pasada los ids definidos (recursos,
+columnas, grupos conciliables, metadatos) y en otra resuelve cada referencia contra esos
+conjuntos, sin guardar nada salvo los hallazgos: tiempo lineal en el tamaño del export.
+
+Cada hallazgo es un dict {'nivel', 'tipo', 'recurso', 'nombre', 'donde', 'id'}; el nivel
+y la descripción de cada tipo están en TIPOS.
+"""
+from .parsers import build_adjacency
+
+NIVELES = ("error", "aviso", "info")
+
+TIPOS = {
+    "recurso_duplicado":     ("error", "export_id de recurso repetido: sólo se documenta la primera aparición"),
+    "columna_duplicada":     ("error", "export_id de columna repetido: el nombre queda el de la última"),
+    "segmento_duplicado":    ("error", "export_id de grupo conciliable repetido"),
+    "columna_inexistente":   ("error", "Columna inexistente"),
+    "segmento_inexistente":  ("error", "Grupo conciliable inexistente"),
+    "metadato_inexistente":  ("error", "Metadato de segmentación inexistente"),
+    "recurso_inexistente":   ("error", "Recurso inexistente"),
+    "union_inexistente":     ("error", "Columna o fuente de la unión inexistente"),
+    "ciclo":                 ("error", "Ciclo en nodes"),
+    "nodo_externo":          ("aviso", "Nodo que apunta a un recurso fuera del export"),
+    "segmento_sin_uso":      ("info",  "Grupo conciliable sin uso en el flujo"),
+}
+
+# Ciclos informados como máximo (en un grafo muy enredado el primero ya alcanza para corregirlo)
+MAX_CICLOS = 20
+
+
+class FlujoInvalido(ValueError):
+    def __init__(self, hallazgos):
+        self.hallazgos = hallazgos
+        n = resumen(hallazgos)
+        super().__init__(f"El export tiene {n['error']} errores de integridad "
+                         f"(primero: {describir(hallazgos[0])})")
+
+
+def es_export(data):
+    """Si data tiene la forma de un export: objeto con 'resources' (lista de objetos) y 'nodes' lista.
+
+    validar() y los parsers dan esa forma por supuesta; otro JSON no es un export con errores
+    sino otra cosa, y se rechaza antes de tocarlo.
+    """
+    return (isinstance(data, dict)
+            and isinstance(data.get('resources', []), list)
+            and all(isinstance(r, dict) for r in data.get('resources', []))
+            and isinstance(data.get('nodes', []), list))
+
+def describir(h):
+    recurso = h['nombre'] or h['recurso']
+    return f"{TIPOS[h['tipo']][1]}: {h['id']} · " + (f"{recurso} · " if recurso is not None else "") + h['donde']
+
+def resumen(hallazgos):
+    n = dict.fromkeys(NIVELES, 0)
+    for h in hallazgos:
+        n[h['nivel']] += 1
+    return n
+
+
+class _Recorrido:
+    def __init__(self):
+        self.recursos, self.columnas, self.segmentos, self.metadatos = {}, set(), {}, set()
+        self.usados    = set()
+        self.hallazgos = []
+        self.definidos = {"columna_inexistente": self.columnas, "segmento_inexistente": self.segmentos,
+                          "metadato_inexistente": self.metadatos, "recurso_inexistente": self.recursos}
+
+    def hallazgo(self, tipo, r, donde, id_):
+        self.hallazgos.append({'nivel': TIPOS[tipo][0], 'tipo': tipo, 'recurso': r.get('export_id'),
+                               'nombre': r.get('name', ''), 'donde': donde, 'id': id_})
+
+    def definiciones(self, r):
+        for c in r.get('columns') or []:
+            cid = c.get('export_id')
+            if cid in self.columnas:
+                self.hallazgo("columna_duplicada", r, f"Columna '{c.get('label') or c.get('name', '')}'", cid)
+            self.columnas.add(cid)
+        for seg in r.get('segments') or []:
+            sid = seg.get('export_id')
+            if sid in self.segmentos:
+                self.hallazgo("segmento_duplicado", r, f"Grupo '{seg.get('name', '')}'", sid)
+            self.segmentos[sid] = (r, seg.get('name', ''))
+        for rg in (r.get('advanced_reconciliation') or {}).get('reconcilable_groups') or []:
+            for m in (rg.get('segmentation_config') or {}).get('segmentation_metadata') or []:
+                self.metadatos.add(m.get('export_id'))
+
+    def ref(self, tipo, id_, r, donde):
+        # Los ids definidos ya están todos: sólo se guarda algo si la referencia falta
+        if id_ is not None and id_ not in self.definidos[tipo]:
+            self.hallazgo(tipo, r, donde, id_)
+
+    def ref_col(self, id_, r, donde):
+        self.ref("columna_inexistente", id_, r, donde)
+
+    def ref_seg(self, id_, r, donde):
+        if id_ is not None:
+            self.usados.add(id_)
+        self.ref("segmento_inexistente", id_, r, donde)
+
+    def reglas(self, rules, r, donde):
+        for n, rule in enumerate(rules or [], 1):
+            self.ref_col(rule.get('column_a_id'), r, f"{donde} · regla {n} lado A")
+            self.ref_col(rule.get('column_b_id'), r, f"{donde} · regla {n} lado B")
+
+    def referencias(self, r):
+        for c in r.get('columns') or []:
+            cname = f"Columna '{c.get('label') or c.get('name') or c.get('export_id')}'"
+            uniq = c.get('uniqueness') or {}
+            for k in uniq.get('order_keys') or []:
+                self.ref_col(k.get('column_id'), r, cname + " · ORDER BY")
+            for k in uniq.get('partition_keys') or []:
+                self.ref_col(k.get('column_id'), r, cname + " · PARTITION BY")
+            vs = (c.get('v_lookup') or {}).get('v_lookup_set') or {}
+            if vs:
+                self.ref("recurso_inexistente", vs.get('origin_source_id'), r, cname + " · BUSCAR V")
+                for n, rule in enumerate(vs.get('rules') or [], 1):
+                    self.ref_col(rule.get('column_a_id'), r, f"{cname} · BUSCAR V clave {n} lado A")
+                    self.ref_col(rule.get('column_b_id'), r, f"{cname} · BUSCAR V clave {n} lado B")
+
+        for seg in r.get('segments') or []:
+            for fset in seg.get('segment_filter_sets') or []:
+                for rule in fset.get('segment_filter_rules') or []:
+                    self.ref_col(rule.get('column_id'), r, f"Filtro del grupo '{seg.get('name', '')}'")
+
+        recon = r.get('reconciliation') or {}
+        if recon:
+            for lado in ("a", "b"):
+                self.ref_seg(recon.get(f'segment_{lado}_id'), r, f"Conciliación · grupo lado {lado.upper()}")
+                self.ref("recurso_inexistente", (recon.get(f'{lado}_source_settings') or {}).get('resource_id'),
+                         r, f"Conciliación · recurso lado {lado.upper()}")
+            for rs in recon.get('reconciliation_rule_sets') or []:
+                self.reglas(rs.get('reconciliation_rules'), r, f"Conciliación · rule set '{rs.get('name', '')}'")
+
+        adv = r.get('advanced_reconciliation') or {}
+        for rg in adv.get('reconcilable_groups') or []:
+            lado = f"Conciliación avanzada · lado {rg.get('prefix_side', '?')}"
+            self.ref_seg(rg.get('segment_id'), r, lado + " · grupo")
+            self.ref("recurso_inexistente", rg.get('resource_id'), r, lado + " · recurso")
+            for cs in rg.get('columns_selection') or []:
+                self.ref_col(cs.get('column_id'), r, lado + " · columnas")
+            sc2 = rg.get('segmentation_config') or {}
+            self.ref_col(sc2.get('criteria_column_id'), r, lado + " · criterio de segmentación")
+        for rs in adv.get('reconciliation_rule_sets') or []:
+            donde = f"Conciliación avanzada · rule set '{rs.get('name', '')}'"
+            self.reglas(rs.get('reconciliation_rules'), r, donde)
+            for sw in rs.get('sweep_sides') or []:
+                self.ref("metadato_inexistente", (sw.get('input_sweep_resource') or {}).get('segmentation_metadata_id'),
+                         r, f"{donde} · segmento lado {sw.get('prefix_side', '?')}")
+
+        sg = r.get('source_group') or {}
+        for c in sg.get('columns') or []:
+            self.ref_col(c.get('column_id'), r, "Agrupación · GROUP BY")
+        for v in sg.get('values') or []:
+            self.ref_col(v.get('column_id'), r, "Agrupación · agregación")
+
+        su = r.get('source_union') or {}
+        if su:
+            fuentes  = {us.get('export_id') for us in su.get('union_segments') or []}
+            destinos = {uc.get('export_id') for uc in su.get('union_columns') or []}
+            for us in su.get('union_segments') or []:
+                self.ref_seg(us.get('segment_id'), r, "Unión · fuente")
+            for uc in su.get('union_columns') or []:
+                self.ref_col(uc.get('destination_column_id'), r, "Unión · columna destino")
+            for cell in su.get('union_cells') or []:
+                self.ref_col(cell.get('origin_column_id'), r, "Unión · columna origen")
+                # Las referencias internas de la unión se resuelven acá mismo, con sus propios ids
+                if cell.get('union_column_id') not in destinos:
+                    self.hallazgo("union_inexistente", r, "Unión · celda sin columna destino", cell.get('union_column_id'))
+                if cell.get('union_segment_id') not in fuentes:
+                    self.hallazgo("union_inexistente", r, "Unión · celda sin fuente", cell.get('union_segment_id'))
+
+def _ciclos(down):
+    """Ciclos del grafo origen → destinos con un DFS iterativo (cada arista se mira una vez)."""
+    color, ciclos = {}, []   # sin color: no visitado · 1: en la pila · 2: terminado
+    for raiz in list(down):
+        if raiz in color:
+            continue
+        color[raiz] = 1
+        camino, pila = [raiz], [iter(down.get(raiz, ()))]
+        while pila:
+            nxt = next(pila[-1], None)
+            if nxt is None:
+                color[camino.pop()] = 2
+                pila.pop()
+            elif nxt not in color:
+                color[nxt] = 1
+                camino.append(nxt)
+                pila.append(iter(down.get(nxt, ())))
+            elif color[nxt] == 1 and len(ciclos) < MAX_CICLOS:
+                ciclos.append(camino[camino.index(nxt):] + [nxt])
+    return ciclos
+
+def validar(data):
+    """Hallazgos de integridad del export, ordenados por nivel (errores primero)."""
+    rec = _Recorrido()
+    recursos = rec.recursos
+    for r in data.get('resources', []):
+        eid = r.get('export_id')
+        if eid in recursos:
+            rec.hallazgo("recurso_duplicado", r, "Recurso", eid)
+            continue
+        recursos[eid] = r
+        rec.definiciones(r)
+    for r in recursos.values():
+        rec.referencias(r)
+
+    nodes = data.get('nodes', [])
+    for n in nodes:
+        # Los nodes no tienen id ni nombre propios: el hallazgo va al recurso del export que
+        # conectan (el destino si el externo es un origen, el primer origen si es el destino)
+        s_val   = n.get('source')
+        fuentes = s_val if isinstance(s_val, list) else [s_val] if s_val is not None else []
+        destino = recursos.get(n.get('target'), {})
+        for sid in fuentes:
+            if sid not in recursos:
+                rec.hallazgo("nodo_externo", destino, f"nodes · origen de {n.get('target')}", sid)
+        if n.get('target') is not None and not destino:
+            origen = next((recursos[sid] for sid in fuentes if sid in recursos), {})
+            rec.hallazgo("nodo_externo", origen, "nodes · destino", n.get('target'))
+    _, down = build_adjacency(nodes)
+    for ciclo in _ciclos(down):
+        nombres = [recursos.get(i, {}).get('name', str(i)) for i in ciclo]
+        rec.hallazgo("ciclo", recursos.get(ciclo[0], {}), " → ".join(nombres), ciclo[0])
+
+    for sid, (r, nombre) in rec.segmentos.items():
+        if sid not in rec.usados:
+            rec.hallazgo("segmento_sin_uso", r, f"Grupo '{nombre}'", sid)
+
+    orden = {n: i for i, n in enumerate(NIVELES)}
+    return sorted(rec.hallazgos, key=lambda h: orden[h['nivel']])
+
+def verificar(data):
+    """Levanta FlujoInvalido si el export tiene errores de integridad; devuelve los hallazgos."""
+    hallazgos = validar(data)
+    if hallazgos and hallazgos[0]['nivel'] == "error":
+        raise FlujoInvalido([h for h in hallazgos if h['nivel'] == "error"])
+    return hallazgos
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from .integridad import FlujoInvalido, verificar
+from .metricas import BYTES, GENERACION, GENERACIONES, RECURSOS, escala
+from .perfil import perfilar
+from .sitio import FORMATOS_SITIO
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# TRABAJOS EN SEGUNDO PLANO (cola compartida entre sesiones)
+# ══════════════════════════════════════════════════════════════════════════════
+# Concurrencia máxima de generaciones simultáneas y tamaño máximo de la cola
+MAX_WORKERS = int(os.environ.get("SIMETRIK_DOC_WORKERS", "2"))
+MAX_COLA    = int(os.environ.get("SIMETRIK_DOC_MAX_COLA", "20"))
+
+class GeneracionCancelada(Exception):
+    pass
+
+class ColaLlena(Exception):
+    pass
+
+class TrabajoGeneracion:
+    def __init__(self, n_recursos):
+        self.id         = uuid.uuid4().hex
+        self.n_recursos = n_recursos
+        self.estado     = "en_cola"    # en_cola · generando · listo · error · cancelado
+        self.hechos     = 0
+        self.total      = n_recursos
+        self.resultado  = None
+        self.error      = None
+        self.modo       = "unico"
+        self.determinista = False
+        self.perfilar   = False
+        self.bloquear   = False      # no generar si el export tiene errores de integridad
+        self.linaje     = False      # hoja 🗺️ Linaje en el xlsx único
+        self.layout     = "combinado"   # uno de LAYOUTS (xlsx único y dividido)
+        self.perfil     = None       # Perfil de cProfile/tracemalloc si se pidió perfilar
+        self.future     = None
+        self.cancelado  = threading.Event()
+
+    @property
+    def activo(self):
+        return self.estado in ("en_cola", "generando")
+
+class ColaGeneracion:
+    """Ejecuta generar_excel en un pool acotado y lleva el orden de llegada para informar la posición."""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_cola=MAX_COLA):
+        self.max_workers = max_workers
+        self.max_cola    = max_cola
+        self._pool       = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="simetrik-doc")
+        self._lock       = threading.Lock()
+        self._pendientes = []   # ids de trabajos aún no tomados por un worker (FIFO)
+        self._corriendo  = 0
+
+    def enviar(self, data, selected_ids, modo="unico", determinista=False, perfilar=False, bloquear=False,
+               linaje=False, layout="combinado"):
+        """Encola una generación; modo 'unico' produce un xlsx, 'tipo' o 'cadena' un zip dividido
+        y 'html' o 'md' el sitio estático en un zip.
+
+        perfilar sólo aplica al xlsx único: el modo dividido genera en otros procesos.
+        linaje agrega la hoja del diagrama de linaje al xlsx único (el sitio siempre lo trae).
+        layout es uno de LAYOUTS: "sin_combinar" arma los xlsx sin celdas combinadas.
+        bloquear corre verificar() antes de generar y termina en error si el export no la pasa.
+        """
+        with self._lock:
+            if len(self._pendientes) >= self.max_cola:
+                raise ColaLlena(f"Hay {len(self._pendientes)} generaciones en espera, intenta en unos minutos.")
+            job = TrabajoGeneracion(len(selected_ids))
+            self._pendientes.append(job.id)
+        job.modo   = modo
+        job.determinista = determinista
+        job.perfilar = perfilar and modo == "unico"
+        job.bloquear = bloquear
+        job.linaje = linaje and modo == "unico"
+        job.layout = layout
+        job.future = self._pool.submit(self._ejecutar, job, data, set(selected_ids))
+        return job
+
+    def _ejecutar(self, job, data, selected_ids):
+        with self._lock:
+            if job.id in self._pendientes:
+                self._pendientes.remove(job.id)
+            self._corriendo += 1
+        inicio = time.perf_counter()
+        try:
+            if job.cancelado.is_set():
+                raise GeneracionCancelada()
+            job.estado = "generando"
+            if job.bloquear:
+                verificar(data)
+
+            def progreso(hechos, total):
+                if job.cancelado.is_set():
+                    raise GeneracionCancelada()
+                job.hechos, job.total = hechos, total
+
+            if job.modo == "unico":
+                from .excel import generar_excel
+                with (perfilar() if job.perfilar else nullcontext()) as perfil:
+                    job.resultado = generar_excel(data, selected_ids, progreso=progreso,
+                                                  determinista=job.determinista, linaje=job.linaje,
+                                                  layout=job.layout)
+                job.perfil = perfil
+            elif job.modo in FORMATOS_SITIO:
+                from .sitio import generar_sitio_zip
+                job.resultado = generar_sitio_zip(data, selected_ids, job.modo, progreso=progreso,
+                                                  determinista=job.determinista)
+            else:
+                from .split import generar_zip
+                job.resultado = generar_zip(data, selected_ids, job.modo, progreso=progreso,
+                                            determinista=job.determinista, layout=job.layout)
+            job.estado = "listo"
+            GENERACION.observar(time.perf_counter() - inicio, modo=job.modo, escala=escala(job.n_recursos))
+            RECURSOS.observar(job.n_recursos, modo=job.modo)
+            BYTES.observar(job.resultado.tamano, modo=job.modo)
+        except GeneracionCancelada:
+            job.estado = "cancelado"
+        except FlujoInvalido as e:
+            job.error  = str(e)
+            job.estado = "error"
+        except Exception:
+            job.error  = traceback.format_exc()
+            job.estado = "error"
+        finally:
+            GENERACIONES.inc(modo=job.modo, estado=job.estado)
+            with self._lock:
+                self._corriendo -= 1
+
+    def posicion(self, job):
+        """Posición 1-based del trabajo en la cola de espera (0 si ya no está esperando)."""
+        with self._lock:
+            try:
+                return self._pendientes.index(job.id) + 1
+            except ValueError:
+                return 0
+
+    def en_espera(self):
+        with self._lock:
+            return len(self._pendientes)
+
+    def cancelar(self, job):
+        job.cancelado.set()
+        # Si todavía no arrancó se descarta de la cola; si está corriendo se corta en la próxima hoja
+        if job.future is not None and job.future.cancel():
+            with self._lock:
+                if job.id in self._pendientes:
+                    self._pendientes.remove(job.id)
+            job.estado = "cancelado"
+            # _ejecutar no va a correr: la cancelación se cuenta acá
+            GENERACIONES.inc(modo=job.modo, estado=job.estado)
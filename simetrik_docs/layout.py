@@ -0,0 +1,141 @@
+"""Auto-ajuste de anchos de columna y altos de fila con métricas aproximadas de Calibri.
+
+Cada texto distinto se mide una sola vez (lru_cache por texto, tamaño y negrita) y el
+corte de líneas simula el wrap de Excel sobre el ancho real de la celda, sumando las
+columnas cuando está combinada. ajustar_hoja() hace la pasada completa sobre una hoja ya
+escrita: primero fija los anchos y después calcula los altos con esos mismos anchos.
+"""
+import unicodedata
+from functools import lru_cache
+
+# Avance de cada glifo de Calibri en unidades de 1/2048 em
+_AVANCE = {
+    ' ': 463, '!': 593, '"': 823, '#': 1019, '$': 1038, '%': 1464, '&': 1397, "'": 452,
+    '(': 621, ')': 621, '*': 1019, '+': 1019, ',': 511, '-': 627, '.': 517, '/': 792,
+    ':': 548, ';': 548, '<': 1019, '=': 1019, '>': 1019, '?': 925, '@': 1833,
+    '[': 632, '\\': 801, ']': 632, '^': 1019, '_': 1022, '`': 603, '{': 712, '|': 943,
+    '}': 712, '~': 1019, '·': 517, '±': 1019, '…': 1536, '→': 2048, '✦': 1600,
+    'A': 1185, 'B': 1114, 'C': 1092, 'D': 1260, 'E': 1000, 'F': 941, 'G': 1292, 'H': 1276,
+    'I': 516, 'J': 653, 'K': 1064, 'L': 861, 'M': 1751, 'N': 1322, 'O': 1356, 'P': 1058,
+    'Q': 1378, 'R': 1112, 'S': 941, 'T': 998, 'U': 1314, 'V': 1162, 'W': 1822, 'X': 1063,
+    'Y': 998, 'Z': 959,
+    'a': 981, 'b': 1076, 'c': 866, 'd': 1076, 'e': 1019, 'f': 625, 'g': 964, 'h': 1076,
+    'i': 470, 'j': 490, 'k': 931, 'l': 470, 'm': 1636, 'n': 1076, 'o': 1080, 'p': 1076,
+    'q': 1076, 'r': 714, 's': 801, 't': 686, 'u': 1076, 'v': 925, 'w': 1464, 'x': 887,
+    'y': 927, 'z': 809,
+}
+_AVANCE.update({d: 1038 for d in '0123456789'})
+_AVANCE_DEFAULT = 1038
+_AVANCE_ANCHO   = 2600   # emoji y símbolos de ancho doble
+_NEGRITA        = 1.06
+
+PX_CARACTER = 7      # ancho de '0' en Calibri 11 a 96 dpi: la unidad de column_dimensions
+PADDING_PX  = 6      # márgenes internos de la celda
+
+
+@lru_cache(maxsize=None)
+def _avance(ch):
+    if ch in _AVANCE:
+        return _AVANCE[ch]
+    base = unicodedata.normalize('NFD', ch)[0]   # á → a, Ñ → N
+    if base in _AVANCE:
+        return _AVANCE[base]
+    if unicodedata.east_asian_width(ch) in ('W', 'F') or ord(ch) >= 0x1F000:
+        return _AVANCE_ANCHO
+    if unicodedata.category(ch) in ('Mn', 'Cf'):   # selectores de variante, combinantes
+        return 0
+    return _AVANCE_DEFAULT
+
+@lru_cache(maxsize=65536)
+def ancho_px(texto, size=9, bold=False):
+    """Ancho en píxeles de una línea de texto."""
+    em = sum(_avance(ch) for ch in texto)
+    return em * size * (96 / 72) / 2048 * (_NEGRITA if bold else 1)
+
+def ancho_columna_px(width):
+    return int(width * PX_CARACTER + 5)
+
+def px_a_ancho(px):
+    return (px - 5) / PX_CARACTER
+
+@lru_cache(maxsize=65536)
+def n_lineas(texto, disponible_px, size=9, bold=False):
+    """Líneas que ocupa el texto con wrap en una celda de disponible_px de ancho."""
+    total = 0
+    espacio = ancho_px(' ', size, bold)
+    for linea in str(texto).split('\n'):
+        if ancho_px(linea, size, bold) <= disponible_px:
+            total += 1
+            continue
+        n, actual = 1, 0.0
+        for palabra in linea.split(' '):
+            w = ancho_px(palabra, size, bold)
+            if actual and actual + espacio + w > disponible_px:
+                n, actual = n + 1, 0.0
+            if w > disponible_px:   # palabra más larga que la celda: Excel la corta por caracteres
+                n += int(w // disponible_px)
+                w = w % disponible_px
+            actual += (espacio if actual else 0) + w
+        total += n
+    return total
+
+def alto_linea(size):
+    """Alto (pt) de una línea de Calibri: 12 a 9 pt, 15 a 11 pt."""
+    return round(size * 1.25 + 0.75, 2)
+
+def row_height(text, width=40, base=13):
+    """Altura de una fila para `text` en una celda de `width` de ancho (unidades de columna)."""
+    if not text: return 14
+    return max(14, n_lineas(str(text), ancho_columna_px(width) - PADDING_PX) * base)
+
+
+def ajustar_hoja(ws, limites, min_alto=14, desbordes=()):
+    """Fija anchos de columna dentro de `limites` y recalcula los altos de las filas con wrap.
+
+    limites: {letra: (mínimo, máximo)} en unidades de column_dimensions. El ancho natural de
+    cada columna es el de su línea más larga en celdas no combinadas. Las filas sin ninguna
+    celda con wrap conservan el alto que se les haya fijado (títulos, encabezados).
+    desbordes: (fila, columna) de celdas sin combinar cuyo texto sin wrap desborda sobre las
+    vecinas vacías (layout sin_combinar); como las combinadas, no cuentan para el ancho.
+    """
+    spans = {(r.min_row, r.min_col): r.max_col for r in ws.merged_cells.ranges}
+    desbordes = set(desbordes)
+    celdas = []
+    natural = {}
+    for fila in ws.iter_rows():
+        for c in fila:
+            v = c.value
+            if v is None or v == "":
+                continue
+            texto = str(v)
+            font  = c.font
+            size, bold = font.sz or 11, bool(font.b)
+            wrap  = bool(c.alignment.wrap_text)
+            fin   = spans.get((c.row, c.column), c.column)
+            celdas.append((c.row, c.column, fin, texto, size, bold, wrap))
+            if fin == c.column and (wrap or (c.row, c.column) not in desbordes):
+                w = max(ancho_px(linea, size, bold) for linea in texto.split('\n'))
+                natural[c.column_letter] = max(natural.get(c.column_letter, 0), w)
+
+    px = {}
+    for letra, (lo, hi) in limites.items():
+        ancho = min(hi, max(lo, px_a_ancho(natural.get(letra, 0) + PADDING_PX)))
+        ws.column_dimensions[letra].width = round(ancho, 1)
+    from openpyxl.utils import get_column_letter
+    def col_px(col):
+        if col not in px:
+            px[col] = ancho_columna_px(ws.column_dimensions[get_column_letter(col)].width or 8.43)
+        return px[col]
+
+    altos = {}
+    con_wrap = set()
+    for row, ini, fin, texto, size, bold, wrap in celdas:
+        if wrap:
+            con_wrap.add(row)
+            disponible = sum(col_px(k) for k in range(ini, fin + 1)) - PADDING_PX
+            lineas = n_lineas(texto, disponible, size, bold)
+        else:
+            lineas = 1
+        altos[row] = max(altos.get(row, 0), lineas * alto_linea(size) + (3 if lineas > 1 else 0))
+    for row in con_wrap:
+        ws.row_dimensions[row].height = max(min_alto, altos[row])
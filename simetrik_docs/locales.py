@@ -0,0 +1,69 @@
+"""Exports que ya están en una carpeta del servidor (un volumen montado), sin subirlos.
+
+    SIMETRIK_DOC_EXPORTS   carpeta con los exports .json que ofrece la página (vacío: no se ofrece)
+
+Subir por el navegador hace viajar el archivo entero por el websocket, queda limitado por
+server.maxUploadSize y Streamlit lo guarda completo en memoria (UploadedFile). Desde la
+carpeta, el export se mapea con mmap de sólo lectura: el hash se calcula sobre el mapeo y
+el JSON se decodifica desde él, sin leerlo antes a un bytes intermedio.
+
+Sólo se abren archivos .json directamente dentro de la carpeta (sin subcarpetas ni rutas
+que salgan de ella).
+"""
+import json
+import mmap
+import os
+
+EXPORTS_DIR = os.environ.get("SIMETRIK_DOC_EXPORTS", "")
+
+
+def listar_exports(directorio=None):
+    """[(nombre, bytes, mtime)] de los .json de la carpeta, ordenados por nombre (sólo stat)."""
+    directorio = directorio or EXPORTS_DIR
+    if not directorio or not os.path.isdir(directorio):
+        return []
+    exports = []
+    with os.scandir(directorio) as it:
+        for e in it:
+            if e.name.lower().endswith(".json") and not e.name.startswith(".") and e.is_file():
+                info = e.stat()
+                exports.append((e.name, info.st_size, info.st_mtime))
+    return sorted(exports)
+
+def ruta_export(nombre, directorio=None):
+    """Ruta absoluta de `nombre` dentro de la carpeta; ValueError si sale de ella o no es .json."""
+    base = os.path.realpath(directorio or EXPORTS_DIR)
+    ruta = os.path.realpath(os.path.join(base, nombre))
+    if os.path.dirname(ruta) != base or not ruta.lower().endswith(".json"):
+        raise ValueError(f"{nombre!r} no es un export de {base}")
+    return ruta
+
+
+class ExportMapeado:
+    """Export abierto con mmap de sólo lectura; se usa como context manager.
+
+    buffer es el mapeo (hashlib lo acepta tal cual) y cargar() decodifica el JSON desde él.
+    Al salir se cierra el mapeo: lo cargado no lo referencia.
+    """
+
+    def __init__(self, ruta):
+        self.ruta   = ruta
+        self.nombre = os.path.basename(ruta)
+        with open(ruta, "rb") as f:
+            self.tamano = os.fstat(f.fileno()).st_size
+            if not self.tamano:
+                raise ValueError(f"{self.nombre} está vacío")
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def cargar(self):
+        # str() decodifica directo del mapeo; json.loads no acepta un mmap
+        return json.loads(str(self.buffer, "utf-8-sig"))
+
+    def cerrar(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
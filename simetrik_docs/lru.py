@@ -0,0 +1,41 @@
+"""Cache LRU en memoria, compartido por el servicio HTTP y las sesiones de la página."""
+import threading
+from collections import OrderedDict
+
+from .metricas import cache
+
+
+class LRUCache:
+    """LRU thread-safe acotado por cantidad de entradas y, opcionalmente, por bytes."""
+
+    def __init__(self, max_items, max_bytes=None, size=len, nombre=None):
+        self.nombre    = nombre       # con nombre, cada get cuenta en simetrik_doc_cache_total
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._size     = size
+        self._bytes    = 0
+        self._data     = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if self.nombre:
+                cache(self.nombre, key in self._data)
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._size(self._data.pop(key)) if self.max_bytes else 0
+            self._data[key] = value
+            self._bytes += self._size(value) if self.max_bytes else 0
+            while self._data and (len(self._data) > self.max_items or
+                                  (self.max_bytes and self._bytes > self.max_bytes)):
+                _, old = self._data.popitem(last=False)
+                self._bytes -= self._size(old) if self.max_bytes else 0
+
+    def __len__(self):
+        return len(self._data)
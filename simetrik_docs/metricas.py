@@ -0,0 +1,258 @@
+"""Métricas del servicio en memoria, en el formato de texto de Prometheus (sólo stdlib).
+
+    GET /metrics                                   en python -m simetrik_docs serve
+    SIMETRIK_DOC_METRICAS=/var/lib/node_exporter/simetrik.prom streamlit run app_simetrik.py
+
+Contadores e histogramas con etiquetas, seguros entre hilos. Sin servidor HTTP propio (la
+página Streamlit) el registro se vuelca cada `intervalo` segundos a un archivo, de forma
+atómica, para el textfile collector de node_exporter o para mirarlo a mano.
+
+Lo que se mide:
+    simetrik_doc_parseo_segundos       parseo del export JSON (app, http, vigilar)
+    simetrik_doc_generacion_segundos   generación completa por modo y tamaño de la selección
+    simetrik_doc_fase_segundos         cada fase que marca generar_excel (build_maps, indice, hojas…)
+    simetrik_doc_archivo_bytes         tamaño del xlsx / zip entregado
+    simetrik_doc_recursos              recursos por generación
+    simetrik_doc_generaciones_total    generaciones terminadas por modo y estado
+    simetrik_doc_cache_total           consultas a los caches por resultado (acierto / fallo);
+                                       la exposición agrega simetrik_doc_cache_aciertos_ratio
+
+Las fases del modo dividido corren en otros procesos: de ese modo sólo se mide el total.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+ARCHIVO   = os.environ.get("SIMETRIK_DOC_METRICAS")
+INTERVALO = float(os.environ.get("SIMETRIK_DOC_METRICAS_INTERVALO", "15"))
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BUCKETS_BYTES    = tuple(10_000 * 4 ** i for i in range(10))     # 10 KB … ~2,6 GB
+BUCKETS_RECURSOS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _escapar(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _numero(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+def _serie(nombre, etiquetas, valor):
+    if etiquetas:
+        nombre += "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + "}"
+    return f"{nombre} {_numero(valor)}"
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre    = nombre
+        self.ayuda     = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores  = {}          # valores de las etiquetas (en orden) → estado
+        self._lock     = threading.Lock()
+
+    def _clave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre} lleva las etiquetas {self.etiquetas}, no {tuple(etiquetas)}")
+        return tuple(str(etiquetas[k]) for k in self.etiquetas)
+
+    def lineas(self):
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} {self.tipo}"
+        with self._lock:
+            valores = [(k, self._copia(v)) for k, v in sorted(self._valores.items())]
+        for clave, estado in valores:
+            yield from self._series(list(zip(self.etiquetas, clave)), estado)
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, n=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + n
+
+    def valor(self, **etiquetas):
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def _copia(self, valor):
+        return valor
+
+    def _series(self, etiquetas, valor):
+        yield _serie(self.nombre, etiquetas, valor)
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        i     = bisect_left(self.buckets, valor)   # le: el primer límite >= valor
+        with self._lock:
+            estado = self._valores.get(clave)
+            if estado is None:
+                # cuentas por bucket (la última es +Inf), suma, cantidad
+                estado = self._valores[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            estado[0][i] += 1
+            estado[1]    += valor
+            estado[2]    += 1
+
+    def _copia(self, estado):
+        return [list(estado[0]), estado[1], estado[2]]
+
+    @contextmanager
+    def medir(self, **etiquetas):
+        """Observa los segundos que tarda el bloque (también si termina con una excepción)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - t0, **etiquetas)
+
+    def _series(self, etiquetas, estado):
+        cuentas, suma, n = estado
+        acumulado = 0
+        for limite, c in zip((*self.buckets, float("inf")), cuentas):
+            acumulado += c
+            yield _serie(self.nombre + "_bucket", etiquetas + [("le", _numero(limite))], acumulado)
+        yield _serie(self.nombre + "_sum", etiquetas, suma)
+        yield _serie(self.nombre + "_count", etiquetas, n)
+
+
+class Registro:
+    """Métricas con nombre; pedir dos veces la misma devuelve la ya creada."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock     = threading.Lock()
+
+    def _obtener(self, clase, nombre, *args, **kwargs):
+        with self._lock:
+            m = self._metricas.get(nombre)
+            if m is None:
+                m = self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            elif not isinstance(m, clase):
+                raise ValueError(f"{nombre} ya está registrada como {m.tipo}")
+            return m
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._obtener(Contador, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        return self._obtener(Histograma, nombre, ayuda, etiquetas, buckets)
+
+    def texto(self):
+        """Exposición en el formato de texto 0.0.4 de Prometheus."""
+        lineas = []
+        with self._lock:
+            metricas = list(self._metricas.values())
+        for m in metricas:
+            lineas += m.lineas()
+        lineas += _ratio_cache()
+        return "\n".join(lineas) + "\n"
+
+    def volcar(self, ruta):
+        # Temporal + replace: quien lee el archivo nunca ve una exposición a medias
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.texto())
+        os.replace(ruta + ".tmp", ruta)
+        return ruta
+
+
+REGISTRO = Registro()
+
+PARSEO = REGISTRO.histograma(
+    "simetrik_doc_parseo_segundos", "Segundos de parseo del export JSON", ("origen",))
+GENERACION = REGISTRO.histograma(
+    "simetrik_doc_generacion_segundos", "Segundos de una generación completa", ("modo", "escala"))
+FASE = REGISTRO.histograma(
+    "simetrik_doc_fase_segundos", "Segundos de cada fase de generar_excel", ("fase",))
+BYTES = REGISTRO.histograma(
+    "simetrik_doc_archivo_bytes", "Bytes del archivo generado", ("modo",), BUCKETS_BYTES)
+RECURSOS = REGISTRO.histograma(
+    "simetrik_doc_recursos", "Recursos documentados por generación", ("modo",), BUCKETS_RECURSOS)
+GENERACIONES = REGISTRO.contador(
+    "simetrik_doc_generaciones_total", "Generaciones terminadas", ("modo", "estado"))
+CACHE = REGISTRO.contador(
+    "simetrik_doc_cache_total", "Consultas a los caches", ("cache", "resultado"))
+
+
+def escala(n_recursos):
+    """Tramo del tamaño de la selección, para comparar latencias entre flujos parecidos."""
+    for tope in (10, 100, 1000):
+        if n_recursos <= tope:
+            return f"<={tope}"
+    return ">1000"
+
+def cache(nombre, acierto):
+    CACHE.inc(cache=nombre, resultado="acierto" if acierto else "fallo")
+
+def _ratio_cache():
+    with CACHE._lock:
+        valores = dict(CACHE._valores)
+    caches = sorted({c for c, _ in valores})
+    if not caches:
+        return []
+    lineas = ["# HELP simetrik_doc_cache_aciertos_ratio Aciertos sobre consultas de cada cache desde el arranque",
+              "# TYPE simetrik_doc_cache_aciertos_ratio gauge"]
+    for c in caches:
+        aciertos = valores.get((c, "acierto"), 0)
+        total    = aciertos + valores.get((c, "fallo"), 0)
+        lineas.append(_serie("simetrik_doc_cache_aciertos_ratio", [("cache", c)], round(aciertos / total, 4)))
+    return lineas
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FASES Y VOLCADO
+# ══════════════════════════════════════════════════════════════════════════════
+_FASE = ContextVar("fase_metricas", default=None)
+
+def fase(nombre):
+    """Cierra la fase abierta en este contexto (observando su duración) y abre `nombre`."""
+    ahora   = time.perf_counter()
+    abierta = _FASE.get()
+    if abierta is not None:
+        FASE.observar(ahora - abierta[1], fase=abierta[0])
+    _FASE.set(None if nombre is None else (nombre, ahora))
+
+
+_VOLCADOS = {}
+_VOLCADOS_LOCK = threading.Lock()
+
+def iniciar_volcado(ruta=None, intervalo=None):
+    """Vuelca REGISTRO a `ruta` (por defecto SIMETRIK_DOC_METRICAS) cada `intervalo` segundos.
+
+    Un hilo daemon por ruta: llamarla otra vez con la misma ruta no arranca otro.
+    Devuelve la ruta, o None si no hay ninguna configurada.
+    """
+    ruta = ruta or ARCHIVO
+    if not ruta:
+        return None
+    intervalo = intervalo or INTERVALO
+    with _VOLCADOS_LOCK:
+        if ruta in _VOLCADOS:
+            return ruta
+
+        def bucle():
+            while True:
+                try:
+                    REGISTRO.volcar(ruta)
+                except OSError:
+                    pass   # un disco lleno o un directorio borrado no debe tumbar el servicio
+                time.sleep(intervalo)
+
+        _VOLCADOS[ruta] = threading.Thread(target=bucle, name="simetrik-metricas", daemon=True)
+        _VOLCADOS[ruta].start()
+    return ruta
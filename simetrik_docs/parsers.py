@@ -0,0 +1,420 @@
+import re
+
+from .constants import RT_LABEL, RT_ORDER
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PARSERS
+# ══════════════════════════════════════════════════════════════════════════════
+def build_maps(data):
+    res_map   = {}   
+    col_map   = {}   
+    seg_map   = {}   
+    meta_map  = {}   
+    seg_usage = {}   
+
+    for r in data.get('resources', []):
+        eid  = r.get('export_id')
+        res_map[eid] = r.get('name', str(eid))
+
+        for c in (r.get('columns') or []):
+            cid = c.get('export_id')
+            col_map[cid] = c.get('label') or c.get('name') or str(cid)
+
+        sg = r.get('source_group') or {}
+        for c in sg.get('columns', []):
+            cid = c.get('column_id')
+            if cid and cid not in col_map:
+                col_map[cid] = f"col_{cid}"
+        for v in sg.get('values', []):
+            cid = v.get('column_id')
+            if cid and cid not in col_map:
+                col_map[cid] = f"col_{cid}"
+
+        adv = r.get('advanced_reconciliation') or {}
+        for rg in adv.get('reconcilable_groups', []):
+            for cs in rg.get('columns_selection', []):
+                cid = cs.get('column_id')
+                if cid and cid not in col_map:
+                    col_map[cid] = f"col_{cid}"
+            sc2 = rg.get('segmentation_config') or {}
+            for m in sc2.get('segmentation_metadata', []):
+                meta_map[m.get('export_id')] = m.get('value', '?')
+            ccid = sc2.get('criteria_column_id')
+            if ccid and ccid not in col_map:
+                col_map[ccid] = f"col_{ccid}"
+
+        for seg in (r.get('segments') or []):
+            rules = []
+            for fset in (seg.get('segment_filter_sets') or []):
+                for rule in (fset.get('segment_filter_rules') or []):
+                    rules.append(rule)
+            seg_map[seg.get('export_id')] = {
+                'name':        seg.get('name', ''),
+                'resource':    r.get('name', ''),
+                'resource_id': eid,
+                'default':     seg.get('default_segment', False),
+                'rules':       rules,
+            }
+
+    for r in data.get('resources', []):
+        rname = r.get('name', '')
+
+        recon = r.get('reconciliation') or {}
+        sa = recon.get('segment_a_id')
+        sb = recon.get('segment_b_id')
+        pa = recon.get('segment_a_prefix', 'A')
+        pb = recon.get('segment_b_prefix', 'B')
+        if sa:
+            seg_usage.setdefault(sa, []).append((rname, f"Conciliacion lado {pa}"))
+        if sb:
+            seg_usage.setdefault(sb, []).append((rname, f"Conciliacion lado {pb}"))
+
+        adv = r.get('advanced_reconciliation') or {}
+        for rg in adv.get('reconcilable_groups', []):
+            sgid = rg.get('segment_id')
+            if sgid:
+                seg_usage.setdefault(sgid, []).append(
+                    (rname, f"Conciliacion Avanzada lado {rg.get('prefix_side','?')}")
+                )
+
+        su = r.get('source_union') or {}
+        for us in su.get('union_segments', []):
+            sgid = us.get('segment_id')
+            if sgid:
+                seg_usage.setdefault(sgid, []).append((rname, "Union de Fuentes"))
+
+    return res_map, col_map, seg_map, meta_map, seg_usage
+
+def fmt_filter_rules(rules, col_map):
+    lines = []
+    for r in rules:
+        col_name = col_map.get(r.get('column_id'), f"ID:{r.get('column_id')}")
+        cond = r.get('condition', '')
+        op   = r.get('operator', '')
+        val  = r.get('value', '')
+        lines.append(f"{cond} [{col_name}] {op} {val}".strip())
+    return "\n".join(lines) if lines else "Sin filtros configurados"
+
+def parse_transformation_logic(col, res_map, col_map):
+    lines = []
+    uniq = col.get('uniqueness')
+    if uniq:
+        dtype      = col.get('data_format', '')
+        uniq_type  = uniq.get('type')
+        order_keys = uniq.get('order_keys', [])
+        part_keys  = uniq.get('partition_keys', [])
+
+        if dtype == 'boolean':
+            lines.append("TIPO: Booleano de duplicado")
+        elif dtype == 'integer':
+            lines.append("TIPO: Numeracion de duplicado")
+
+        if order_keys:
+            order_parts = []
+            for ok in sorted(order_keys, key=lambda x: x.get('position', 0)):
+                col_name  = col_map.get(ok.get('column_id'), f"ID:{ok.get('column_id')}")
+                direction = "ASC" if ok.get('order_by', 1) == 1 else "DESC"
+                order_parts.append(f"{col_name} {direction}")
+            lines.append("ORDER BY: " + ", ".join(order_parts))
+
+        if part_keys:
+            part_names = [col_map.get(pk.get('column_id'), f"ID:{pk.get('column_id')}")
+                          for pk in part_keys]
+            lines.append("PARTITION BY (clave de duplicado):\n  " + "\n  ".join(part_names))
+
+        return "\n".join(lines)
+
+    v = col.get('v_lookup')
+    if v:
+        vs = v.get('v_lookup_set') or {}
+        origin_id = vs.get('origin_source_id')
+        origin = res_map.get(origin_id, f"ID:{origin_id}")
+        rules = vs.get('rules', [])
+        keys = " & ".join(
+            "A." + col_map.get(r.get('column_a_id'), '?') +
+            " = B." + col_map.get(r.get('column_b_id'), '?')
+            for r in rules
+        )
+        lines.append("BUSCAR V EN: " + origin)
+        if keys:
+            lines.append("CLAVE MATCH: " + keys)
+
+    parents = [t for t in (col.get('transformations') or []) if t.get('is_parent')]
+    for t in parents:
+        q = (t.get('query') or '').strip()
+        if q and q.upper() != 'N/A':
+            lines.append("FÓRMULA: " + q)
+
+    return "\n".join(lines) if lines else "Campo directo / heredado"
+
+def parse_std_reconciliation(recon, res_map, col_map, seg_map):
+    if not recon:
+        return None
+
+    sa_id = recon.get('segment_a_id')
+    sb_id = recon.get('segment_b_id')
+    a_cfg = recon.get('a_source_settings') or {}
+    b_cfg = recon.get('b_source_settings') or {}
+
+    def resolve_side(cfg, seg_id, prefix):
+        resource_name = res_map.get(cfg.get('resource_id'), '—')
+        seg = seg_map.get(seg_id) or {}
+        seg_name = seg.get('name', f"ID:{seg_id}")
+        seg_rules = fmt_filter_rules(seg.get('rules', []), col_map)
+        return {
+            'prefix':        prefix,
+            'resource_name': resource_name,
+            'group_name':    seg_name,
+            'group_filters': seg_rules,
+            'is_trigger':    cfg.get('is_trigger', False),
+        }
+
+    sides = [
+        resolve_side(a_cfg, sa_id, recon.get('segment_a_prefix', 'A')),
+        resolve_side(b_cfg, sb_id, recon.get('segment_b_prefix', 'B')),
+    ]
+
+    rule_sets = []
+    for rs in sorted(recon.get('reconciliation_rule_sets', []),
+                     key=lambda x: x.get('position', 99)):
+        rules_desc = []
+        for rule in (rs.get('reconciliation_rules') or []):
+            col_a = col_map.get(rule.get('column_a_id'), f"ID:{rule.get('column_a_id')}")
+            col_b = col_map.get(rule.get('column_b_id'), f"ID:{rule.get('column_b_id')}")
+            op    = rule.get('operator', '=')
+            tol   = rule.get('tolerance', 0)
+            tol_u = rule.get('tolerance_unit') or ''
+            tol_s = f"  [tolerancia ±{tol} {tol_u}]" if tol else ""
+            rules_desc.append(f"A.{col_a}  {op}  B.{col_b}{tol_s}")
+        rule_sets.append({
+            'pos':   rs.get('position', 0),
+            'name':  rs.get('name', ''),
+            'rules': rules_desc,
+        })
+
+    return {
+        'sides':      sides,
+        'is_chained': recon.get('is_chained', False),
+        'rule_sets':  rule_sets,
+    }
+
+def parse_adv_reconciliation(adv, res_map, col_map, seg_map, meta_map):
+    if not adv:
+        return None
+
+    groups = []
+    for rg in (adv.get('reconcilable_groups') or []):
+        prefix   = rg.get('prefix_side', '?')
+        seg_id   = rg.get('segment_id')
+        seg      = seg_map.get(seg_id) or {}
+        seg_name = seg.get('name', f"ID:{seg_id}")
+        resource_name = seg.get('resource', res_map.get(rg.get('resource_id'), '—'))
+        seg_rules = fmt_filter_rules(seg.get('rules', []), col_map)
+
+        sc2      = rg.get('segmentation_config') or {}
+        crit_id  = sc2.get('criteria_column_id')
+        crit_col = col_map.get(crit_id, f"ID:{crit_id}") if crit_id else "—"
+        segments = [m.get('value', '') for m in sc2.get('segmentation_metadata', [])
+                    if m.get('value')]
+
+        groups.append({
+            'prefix':        prefix,
+            'resource_name': resource_name,
+            'group_name':    seg_name,
+            'group_filters': seg_rules,
+            'crit_col':      crit_col,
+            'segments':      segments,
+        })
+
+    rule_sets = []
+    for rs in sorted(adv.get('reconciliation_rule_sets', []),
+                     key=lambda x: x.get('position', 99)):
+        rules_desc = []
+        for rule in (rs.get('reconciliation_rules') or []):
+            col_a = col_map.get(rule.get('column_a_id'), f"ID:{rule.get('column_a_id')}")
+            col_b = col_map.get(rule.get('column_b_id'), f"ID:{rule.get('column_b_id')}")
+            op    = rule.get('operator', '=')
+            tol   = rule.get('tolerance', 0)
+            tol_u = rule.get('tolerance_unit') or ''
+            tol_s = f"  [tolerancia ±{tol} {tol_u}]" if tol else ""
+            rules_desc.append(f"A.{col_a}  {op}  B.{col_b}{tol_s}")
+
+        sweep = []
+        for sw in (rs.get('sweep_sides') or []):
+            p       = sw.get('prefix_side', '?')
+            isr     = sw.get('input_sweep_resource') or {}
+            meta_id = isr.get('segmentation_metadata_id')
+            if meta_id:
+                seg_val = meta_map.get(meta_id, f"ID:{meta_id}")
+            else:
+                seg_val = "(recurso completo sin segmentar)"
+            sweep.append(f"Lado {p}: {seg_val}")
+
+        rule_sets.append({
+            'pos':        rs.get('position', 0),
+            'name':       rs.get('name', ''),
+            'cross_type': rs.get('cross_type', ''),
+            'new_ver':    rs.get('is_new_version', False),
+            'rules':      rules_desc,
+            'sweep':      sweep,
+        })
+
+    return {'groups': groups, 'rule_sets': rule_sets}
+
+def parse_segment_filters(segs, col_map):
+    result = []
+    for seg in (segs or []):
+        rules = []
+        for fset in (seg.get('segment_filter_sets') or []):
+            for r in (fset.get('segment_filter_rules') or []):
+                col_name = col_map.get(r.get('column_id'), f"ID:{r.get('column_id')}")
+                rules.append(
+                    f"{r.get('condition','')} [{col_name}] {r.get('operator','')} {r.get('value','')}".strip()
+                )
+        if rules:
+            result.append({
+                'seg_id': seg.get('export_id'),
+                'name':   seg.get('name', ''),
+                'rules':  rules,
+            })
+    return result
+
+def parse_source_group(sg, col_map):
+    if not sg:
+        return [], []
+    group_cols = [col_map.get(c.get('column_id'), f"ID:{c.get('column_id')}")
+                  for c in sorted(sg.get('columns', []), key=lambda x: x.get('position', 0))]
+    agg_vals   = [(v.get('function', '?'),
+                   col_map.get(v.get('column_id'), f"ID:{v.get('column_id')}"))
+                  for v in sorted(sg.get('values', []), key=lambda x: x.get('position', 0))]
+    return group_cols, agg_vals
+
+def parse_union_segments(su, col_map, seg_map):
+    result = []
+    for us in (su or {}).get('union_segments') or []:
+        seg_id   = us.get('segment_id')
+        seg_info = seg_map.get(seg_id) or {}
+        result.append({
+            'resource_name': seg_info.get('resource', seg_info.get('resource_name', f"ID:{seg_id}")),
+            'group_name':    seg_info.get('name', f"ID:{seg_id}"),
+            'rol':           "TRIGGER · " + (us.get('trigger_type') or '') if us.get('is_trigger') else "Fuente adicional",
+            'filters':       fmt_filter_rules(seg_info.get('rules', []), col_map),
+        })
+    return result
+
+def parse_union_mapping(su, col_map, seg_map):
+    """Columna destino → [{'source', 'orig_col', 'active'}] en el orden de union_columns."""
+    su = su or {}
+    union_cols  = su.get('union_columns', [])
+    union_cells = su.get('union_cells', [])
+    if not (union_cols and union_cells):
+        return {}
+
+    seg_lookup = {}
+    for us in su.get('union_segments', []):
+        seg_info = seg_map.get(us.get('segment_id')) or {}
+        seg_lookup[us.get('export_id')] = seg_info.get('resource', seg_info.get('resource_name', f"ID:{us.get('segment_id')}"))
+
+    # Un solo pase sobre las celdas en vez de filtrarlas por cada columna
+    cells_by_col = {}
+    for cell in union_cells:
+        cells_by_col.setdefault(cell.get('union_column_id'), []).append(cell)
+
+    mapped_data = {}
+    for uc in union_cols:
+        dest_id   = uc.get('destination_column_id')
+        dest_name = col_map.get(dest_id, f"ID:{dest_id}")
+        for cell in cells_by_col.get(uc.get('export_id'), []):
+            u_seg_id      = cell.get('union_segment_id')
+            origin_col_id = cell.get('origin_column_id')
+            mapped_data.setdefault(dest_name, []).append({
+                'source':   seg_lookup.get(u_seg_id, f"Fuente:{u_seg_id}"),
+                'orig_col': col_map.get(origin_col_id, f"ID:{origin_col_id}") if origin_col_id else "—",
+                'active':   "✅ Activa" if cell.get('is_active', False) else "❌ Inactiva",
+            })
+    return mapped_data
+
+def limpiar_hoja(nombre, eid, parte=1):
+    """Nombre de la hoja del recurso; parte > 1 es una hoja de continuación: «… (2)»."""
+    clean = re.sub(r'[\\/*?:\[\]]', '', str(nombre))
+    hoja  = (clean[:18] + "_" + str(eid))[:31]
+    if parte > 1:
+        sufijo = f" ({parte})"
+        hoja   = hoja[:31 - len(sufijo)] + sufijo
+    return hoja
+
+def sort_key(r):
+    return (RT_ORDER.get(r.get('resource_type', ''), 99), r.get('export_id', 0))
+
+def build_relations(resources, nodes, res_map):
+    all_ids = {r.get('export_id') for r in resources}
+    rels = {r.get('export_id'): {"parents": [], "children": []} for r in resources}
+    for n in nodes:
+        t_id  = n.get('target')
+        s_val = n.get('source')
+        if not (t_id and s_val):
+            continue
+        s_list = s_val if isinstance(s_val, list) else [s_val]
+        for sid in s_list:
+            ext_a = "" if sid in all_ids else " ↗"
+            ext_b = "" if t_id in all_ids else " ↗"
+            if t_id in rels:
+                rels[t_id]["parents"].append(res_map.get(sid, str(sid)) + ext_a)
+            if sid in rels:
+                rels[sid]["children"].append(res_map.get(t_id, str(t_id)) + ext_b)
+    return rels
+
+def recursos_unicos(resources, selected_ids=None):
+    """Primera aparición de cada export_id (opcionalmente filtrada por selección), ordenada por tipo."""
+    seen, out = set(), []
+    for r in resources:
+        eid = r.get('export_id')
+        if eid in seen or (selected_ids is not None and eid not in selected_ids):
+            continue
+        seen.add(eid)
+        out.append(r)
+    out.sort(key=sort_key)
+    return out
+
+def build_adjacency(nodes):
+    """Listas de adyacencia del grafo de nodes: (up: destino → orígenes, down: origen → destinos)."""
+    up, down = {}, {}
+    for n in nodes:
+        t_id  = n.get('target')
+        s_val = n.get('source')
+        if not (t_id and s_val):
+            continue
+        for sid in (s_val if isinstance(s_val, list) else [s_val]):
+            up.setdefault(t_id, []).append(sid)
+            down.setdefault(sid, []).append(t_id)
+    return up, down
+
+def lineage_ids(nodes, root, direction="up", adjacency=None):
+    """Ids alcanzables desde `root` en el grafo de nodes: 'up' (orígenes), 'down' (destinos) o 'both'."""
+    up, down = adjacency or build_adjacency(nodes)
+    grafos = {"up": [up], "down": [down], "both": [up, down]}[direction]
+    found = {root}
+    for g in grafos:
+        stack = [root]
+        while stack:
+            for nxt in g.get(stack.pop(), []):
+                if nxt not in found:
+                    found.add(nxt)
+                    stack.append(nxt)
+    return found
+
+def build_index(data, selected_ids=None):
+    """Filas del Índice (mismo orden y relaciones que la hoja '📚 Índice') como dicts serializables."""
+    resources = recursos_unicos(data.get('resources', []), selected_ids)
+    res_map   = {r.get('export_id'): r.get('name', str(r.get('export_id'))) for r in data.get('resources', [])}
+    rels      = build_relations(resources, data.get('nodes', []), res_map)
+    return [{
+        'pos':        pos,
+        'id':         r.get('export_id'),
+        'name':       r.get('name', ''),
+        'type':       r.get('resource_type', ''),
+        'type_label': RT_LABEL.get(r.get('resource_type', ''), r.get('resource_type', '')),
+        'sheet':      limpiar_hoja(r.get('name', ''), r.get('export_id')),
+        'parents':    rels[r.get('export_id')]["parents"],
+        'children':   rels[r.get('export_id')]["children"],
+    } for pos, r in enumerate(resources, 1)]
@@ -0,0 +1,179 @@
+"""Perfilado opcional de una generación: cProfile y tracemalloc por fase.
+
+    with perfilar() as perfil:
+        generar_excel(data, ids)
+    perfil.resumen()          # filas para una tabla: tiempo, pico y memoria neta por fase
+    perfil.guardar_prof(ruta) # stats de cProfile, se abren con pstats o snakeviz
+
+generar_excel marca sus fases con marca("build_maps"), marca("indice"), … y sin un perfil
+activo la marca sólo alimenta el histograma de fases de simetrik_docs.metricas. Los parsers corren intercalados con el render de cada
+hoja, así que su tiempo sale de las stats de cProfile (las parse_* llamadas desde el
+renderer) y no de una fase propia.
+
+cProfile y tracemalloc son globales al proceso: se perfila una generación a la vez, y el
+pico de memoria incluye lo que asignen otras generaciones que corran en paralelo.
+"""
+import io
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .metricas import fase
+
+_PERFIL = ContextVar("perfil", default=None)
+_LOCK   = threading.Lock()
+
+TOP_ASIGNACIONES = 8
+
+# Prefijos que se recortan al mostrar dónde se asignó la memoria
+_RAICES = sorted({os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                  *(p for p in sys.path if p and os.path.isdir(p))},
+                 key=len, reverse=True)
+
+
+def _ubicacion(frame):
+    archivo = frame.filename
+    for raiz in _RAICES:
+        if archivo.startswith(raiz + os.sep):
+            archivo = archivo[len(raiz) + 1:]
+            break
+    return f"{archivo}:{frame.lineno}"
+
+
+class Perfil:
+    def __init__(self, top=TOP_ASIGNACIONES):
+        self.top    = top
+        self.fases  = []     # {fase, segundos, pico_mb, neto_mb, asignaciones}
+        self.stats  = None   # pstats.Stats de toda la corrida
+        self._prof  = None
+        self._abierta = None
+
+    # ── fases ────────────────────────────────────────────────────────────────
+    def marca(self, nombre):
+        """Cierra la fase abierta y, si hay nombre, abre la siguiente."""
+        # El registro de la fase (snapshots, comparación) no es parte de lo perfilado
+        self._prof.disable()
+        try:
+            self._marca(nombre)
+        finally:
+            self._prof.enable()
+
+    def _marca(self, nombre):
+        fin = time.perf_counter()
+        # Los snapshots son lo más caro del perfil: con top=0 sólo se miden tiempos y picos
+        snap = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]) if self.top else None
+        if self._abierta is not None:
+            fase, t0, actual0, snap0 = self._abierta
+            actual, pico = tracemalloc.get_traced_memory()
+            self.fases.append({
+                'fase':     fase,
+                'segundos': round(fin - t0, 3),
+                'pico_mb':  round((pico - actual0) / 2**20, 2),
+                'neto_mb':  round((actual - actual0) / 2**20, 2),
+                'asignaciones': [(_ubicacion(d.traceback[0]), round(d.size_diff / 1024, 1), d.count_diff)
+                                 for d in (snap.compare_to(snap0, 'lineno')[:self.top] if snap else [])
+                                 if d.size_diff > 0],
+            })
+            self._abierta = None
+        if nombre is not None:
+            # El snapshot de cierre sirve de inicio para la fase siguiente
+            tracemalloc.reset_peak()
+            self._abierta = (nombre, time.perf_counter(), tracemalloc.get_traced_memory()[0], snap)
+
+    # ── resultados ───────────────────────────────────────────────────────────
+    def tiempo_parsers(self):
+        """Segundos acumulados en las parse_* (ninguna llama a otra, así que se suman sin repetir)."""
+        total = 0.0
+        for (archivo, _, funcion), (_, _, _, acumulado, _) in (self.stats.stats if self.stats else {}).items():
+            if archivo.endswith("parsers.py") and funcion.startswith("parse_"):
+                total += acumulado
+        return round(total, 3)
+
+    def resumen(self):
+        """Una fila por fase más la de parsers; el porcentaje es sobre el total de las fases."""
+        total = sum(f['segundos'] for f in self.fases) or 1
+        filas = [{'fase': f['fase'], 'segundos': f['segundos'],
+                  '% del total': round(100 * f['segundos'] / total, 1),
+                  'pico MB': f['pico_mb'], 'neto MB': f['neto_mb']} for f in self.fases]
+        parsers = self.tiempo_parsers()
+        filas.append({'fase': 'parsers (dentro de hojas)', 'segundos': parsers,
+                      '% del total': round(100 * parsers / total, 1), 'pico MB': None, 'neto MB': None})
+        return filas
+
+    def asignaciones(self):
+        """Top de asignaciones que quedaron vivas al cerrar cada fase."""
+        return [{'fase': f['fase'], 'ubicación': u, 'KB': kb, 'bloques': n}
+                for f in self.fases for u, kb, n in f['asignaciones']]
+
+    def texto(self, n=30, orden="cumulative"):
+        """Las n funciones más costosas, como las imprime pstats."""
+        if self.stats is None:
+            return ""
+        buf = io.StringIO()
+        self.stats.stream = buf
+        self.stats.sort_stats(orden).print_stats(n)
+        return buf.getvalue()
+
+    def informe(self, funciones=20):
+        """Resumen en texto plano para adjuntar a un ticket: fases, asignaciones y funciones."""
+        lineas = [f"{'FASE':<28}{'SEGUNDOS':>10}{'%':>7}{'PICO MB':>10}{'NETO MB':>10}"]
+        for f in self.resumen():
+            pico = "" if f['pico MB'] is None else f"{f['pico MB']:.2f}"
+            neto = "" if f['neto MB'] is None else f"{f['neto MB']:.2f}"
+            lineas.append(f"{f['fase']:<28}{f['segundos']:>10.3f}{f['% del total']:>7.1f}{pico:>10}{neto:>10}")
+        if self.asignaciones():
+            lineas += ["", "ASIGNACIONES VIVAS AL CERRAR CADA FASE"]
+            lineas += [f"  {a['fase']:<12}{a['KB']:>10.1f} KB {a['bloques']:>8} bloques  {a['ubicación']}"
+                       for a in self.asignaciones()]
+        if funciones:
+            lineas += ["", self.texto(funciones)]
+        return "\n".join(lineas)
+
+    def prof_bytes(self):
+        """Contenido del .prof (el mismo formato que escribe pstats.Stats.dump_stats)."""
+        return marshal.dumps(self.stats.stats) if self.stats else b""
+
+    def guardar_prof(self, ruta):
+        with open(ruta, "wb") as f:
+            f.write(self.prof_bytes())
+        return ruta
+
+
+@contextmanager
+def perfilar(top=TOP_ASIGNACIONES):
+    """Perfila lo que corra dentro del bloque en este hilo; las fases las marca el código perfilado."""
+    import cProfile
+    import pstats
+
+    perfil = Perfil(top)
+    with _LOCK:
+        propio = not tracemalloc.is_tracing()
+        if propio:
+            tracemalloc.start()
+        perfil._prof = cProfile.Profile()
+        token = _PERFIL.set(perfil)
+        perfil._prof.enable()
+        try:
+            yield perfil
+        finally:
+            perfil.marca(None)
+            perfil._prof.disable()
+            _PERFIL.reset(token)
+            if propio:
+                tracemalloc.stop()
+            perfil.stats = pstats.Stats(perfil._prof)
+            perfil._prof = None
+
+
+def marca(nombre):
+    """Punto de fase: se mide siempre en las métricas y, si hay un perfil activo, también ahí."""
+    fase(nombre)
+    perfil = _PERFIL.get()
+    if perfil is not None:
+        perfil.marca(nombre)
@@ -0,0 +1,296 @@
+"""Modelo del flujo plano y de sólo lectura, para compartirlo entre procesos sin copiarlo.
+
+Los workers del modo dividido recibían el export entero por pickle y cada uno volvía a
+armar res_map, col_map, seg_map, meta_map y seg_usage: en flujos grandes, cientos de MB
+repetidos por proceso. codificar() deja los maps de build_maps y los recursos en un único
+buffer que se publica una vez en memoria compartida (o en un archivo que se abre con mmap);
+cada worker lo lee en su lugar y sólo decodifica lo que consulta.
+
+Formato (little endian, secciones alineadas a 8 bytes):
+
+    "SKDP" · versión u32 · largo u32 · encabezado JSON {sección: [offset, tipo, n], …}
+    str_off  Q[n+1]   offsets de la tabla de textos (cada texto es UTF-8, sin repetir)
+    str_dat  B[…]     los textos concatenados
+    <map>_h  q[n]     hash de 64 bits de cada clave, ordenado (búsqueda con bisect)
+    <map>_k  I[n]     texto de la clave (JSON del id: 123 y "123" son claves distintas)
+    <map>_v  I[n]     texto del valor (JSON)
+    rec_k    I[n]     por recurso, en el orden del export: JSON del export_id
+    rec_v    I[n]     y canonical_json del recurso (su content_hash es el hash de esos bytes)
+
+Los maps se consultan con la misma API que los dicts de build_maps (get, [], in, len,
+iteración); los valores se decodifican al pedirlos y se recuerdan en el proceso.
+"""
+import hashlib
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from .hashing import canonical_json
+from .parsers import build_maps
+
+MAGIC   = b"SKDP"
+VERSION = 1
+MAPAS   = ("res", "col", "seg", "meta", "usage")   # el orden de la tupla de build_maps
+
+_CABECERA = struct.Struct("<4sII")
+# json.dumps con argumentos arma un encoder por llamada; con decenas de miles de claves pesa
+_ENCODER  = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _clave(k):
+    return str(k).encode() if type(k) is int else _ENCODER.encode(k).encode()
+
+def _hash(kb):
+    return int.from_bytes(hashlib.blake2b(kb, digest_size=8).digest(), "little", signed=True)
+
+def _json(v):
+    return _ENCODER.encode(v).encode()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CODIFICACIÓN
+# ══════════════════════════════════════════════════════════════════════════════
+class _Textos:
+    def __init__(self):
+        self.indices = {}
+        self.partes  = []
+        self.off     = array("Q", [0])
+
+    def agregar(self, b):
+        i = self.indices.get(b)
+        if i is None:
+            i = self.indices[b] = len(self.partes)
+            self.partes.append(b)
+            self.off.append(self.off[-1] + len(b))
+        return i
+
+def codificar(data, maps=None):
+    """Buffer con los maps (los de build_maps si no se pasan) y los recursos del export."""
+    maps    = maps or build_maps(data)
+    textos  = _Textos()
+    arrays  = {}
+    for nombre, mapa in zip(MAPAS, maps):
+        filas = sorted((_hash(kb), textos.agregar(kb), textos.agregar(_json(v)))
+                       for kb, v in ((_clave(k), v) for k, v in mapa.items()))
+        arrays[nombre + "_h"] = array("q", (f[0] for f in filas))
+        arrays[nombre + "_k"] = array("I", (f[1] for f in filas))
+        arrays[nombre + "_v"] = array("I", (f[2] for f in filas))
+    resources = data.get('resources', [])
+    arrays["rec_k"] = array("I", (textos.agregar(_clave(r.get('export_id'))) for r in resources))
+    arrays["rec_v"] = array("I", (textos.agregar(canonical_json(r)) for r in resources))
+    nodes = textos.agregar(_json(data.get('nodes', [])))
+    extra = textos.agregar(_json({k: v for k, v in data.items() if k not in ('resources', 'nodes')}))
+    arrays = {"str_off": textos.off, "str_dat": array("B"), **arrays}
+
+    secciones, cuerpo = {}, bytearray()
+    for nombre, arr in arrays.items():
+        secciones[nombre] = [len(cuerpo), arr.typecode, len(arr)]
+        cuerpo += arr.tobytes() if nombre != "str_dat" else b"".join(textos.partes)
+        if nombre == "str_dat":
+            secciones[nombre][2] = len(cuerpo) - secciones[nombre][0]
+        cuerpo += b"\0" * (-len(cuerpo) % 8)
+    encabezado = _json({"secciones": secciones, "nodes": nodes, "extra": extra})
+    encabezado += b" " * (-(len(encabezado) + _CABECERA.size) % 8)
+    return _CABECERA.pack(MAGIC, VERSION, len(encabezado)) + encabezado + cuerpo
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# LECTURA
+# ══════════════════════════════════════════════════════════════════════════════
+class MapaPlano(Mapping):
+    """Uno de los maps de build_maps leído del buffer; mismas consultas que el dict."""
+
+    def __init__(self, modelo, nombre):
+        self._modelo = modelo
+        self._h, self._k, self._v = (modelo._seccion(nombre + s) for s in ("_h", "_k", "_v"))
+        self._memo = {}
+
+    def _buscar(self, key):
+        kb = _clave(key)
+        h  = _hash(kb)
+        i  = bisect_left(self._h, h)
+        while i < len(self._h) and self._h[i] == h:
+            if self._modelo._texto(self._k[i]) == kb:
+                return i
+            i += 1
+        return -1
+
+    def __getitem__(self, key):
+        try:
+            return self._memo[key]
+        except (KeyError, TypeError):
+            pass
+        i = self._buscar(key)
+        if i < 0:
+            raise KeyError(key)
+        valor = json.loads(self._modelo._texto(self._v[i]))
+        try:
+            self._memo[key] = valor
+        except TypeError:
+            pass
+        return valor
+
+    def __contains__(self, key):
+        try:
+            return key in self._memo or self._buscar(key) >= 0
+        except TypeError:
+            return self._buscar(key) >= 0
+
+    def __iter__(self):
+        for i in range(len(self._k)):
+            yield json.loads(self._modelo._texto(self._k[i]))
+
+    def __len__(self):
+        return len(self._k)
+
+class ModeloPlano:
+    """Lectura de un buffer de codificar() (bytes, mmap o el .buf de una SharedMemory)."""
+
+    def __init__(self, buffer, dueno=None):
+        self._dueno = dueno           # mmap o SharedMemory a cerrar junto con el modelo
+        self._buf   = memoryview(buffer)
+        magic, version, largo = _CABECERA.unpack_from(self._buf)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("No es un modelo plano de simetrik_docs (o es de otra versión)")
+        inicio = _CABECERA.size + largo
+        encabezado = json.loads(bytes(self._buf[_CABECERA.size:inicio]))
+        self._vistas = []
+        self._secciones = {}
+        for nombre, (off, tipo, n) in encabezado["secciones"].items():
+            vista = self._buf[inicio + off:inicio + off + n * array(tipo).itemsize]
+            if tipo != "B":
+                vista = vista.cast(tipo)
+            self._vistas.append(vista)
+            self._secciones[nombre] = vista
+        self._off, self._dat = self._secciones["str_off"], self._secciones["str_dat"]
+        self._nodes, self._extra = encabezado["nodes"], encabezado["extra"]
+        self.res_map, self.col_map, self.seg_map, self.meta_map, self.seg_usage = (
+            MapaPlano(self, m) for m in MAPAS)
+
+    def _seccion(self, nombre):
+        return self._secciones[nombre]
+
+    def _texto(self, i):
+        return bytes(self._dat[self._off[i]:self._off[i + 1]])
+
+    @property
+    def maps(self):
+        """Lo mismo que build_maps(data), para pasarlo a generar_excel(maps=…)."""
+        return self.res_map, self.col_map, self.seg_map, self.meta_map, self.seg_usage
+
+    def ids(self):
+        """export_id de cada recurso en el orden del export, sin decodificar los recursos."""
+        return [json.loads(self._texto(k)) for k in self._secciones["rec_k"]]
+
+    def recurso(self, eid):
+        """Primer recurso con ese export_id."""
+        kb = _clave(eid)
+        for k, v in zip(self._secciones["rec_k"], self._secciones["rec_v"]):
+            if self._texto(k) == kb:
+                return json.loads(self._texto(v))
+        raise KeyError(eid)
+
+    def hashes_recursos(self):
+        """content_hash de cada recurso, calculado sobre los bytes guardados."""
+        return [hashlib.blake2b(self._dat[self._off[v]:self._off[v + 1]], digest_size=16).hexdigest()
+                for v in self._secciones["rec_v"]]
+
+    def export(self, ids=None):
+        """El `data` del flujo; con ids, sólo esos recursos (los maps siguen siendo del flujo entero)."""
+        return ExportPlano(self, ids)
+
+    def cerrar(self):
+        # Las vistas sobre el buffer se liberan antes de cerrar el mmap o la memoria compartida
+        for v in self._vistas:
+            v.release()
+        self._buf.release()
+        if self._dueno is not None:
+            self._dueno.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class ExportPlano(Mapping):
+    """El `data` de un ModeloPlano: los recursos se decodifican recién al pedirlos.
+
+    Como ExportVersionado, se serializa como dict plano y huella() toma los hashes de
+    todo el flujo aunque sólo traiga una parte de los recursos.
+    """
+
+    def __init__(self, modelo, ids=None):
+        self.modelo = modelo
+        self.ids    = None if ids is None else {_clave(i) for i in ids}
+        self._cache = {}
+
+    def _keys(self):
+        return ['resources', 'nodes', *json.loads(self.modelo._texto(self.modelo._extra))]
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            m = self.modelo
+            if key == 'resources':
+                self._cache[key] = [json.loads(m._texto(v))
+                                    for k, v in zip(m._seccion("rec_k"), m._seccion("rec_v"))
+                                    if self.ids is None or m._texto(k) in self.ids]
+            elif key == 'nodes':
+                self._cache[key] = json.loads(m._texto(m._nodes))
+            else:
+                self._cache[key] = json.loads(m._texto(m._extra))[key]
+        return self._cache[key]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def hashes_recursos(self):
+        return self.modelo.hashes_recursos()
+
+    def materializar(self):
+        return {k: self[k] for k in self}
+
+    def __reduce__(self):
+        return (dict, (self.materializar(),))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# MEMORIA COMPARTIDA Y ARCHIVOS
+# ══════════════════════════════════════════════════════════════════════════════
+def publicar(data, maps=None):
+    """Codifica el flujo en una SharedMemory nueva; quien publica la cierra y la borra (unlink)."""
+    from multiprocessing import shared_memory
+    buf = codificar(data, maps)
+    shm = shared_memory.SharedMemory(create=True, size=len(buf))
+    shm.buf[:len(buf)] = buf
+    return shm
+
+def abrir_compartido(nombre):
+    """ModeloPlano sobre la SharedMemory `nombre` publicada por otro proceso."""
+    from multiprocessing import shared_memory
+    try:
+        shm = shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        # Antes de 3.13 abrirla la registra en el resource_tracker. Los workers del pool
+        # comparten el de quien la publicó: registrarla otra vez no cambia nada y el unlink
+        # de quien publica la da de baja. Un proceso independiente conviene que use un
+        # archivo de guardar_plano() con abrir_archivo().
+        shm = shared_memory.SharedMemory(name=nombre)
+    return ModeloPlano(shm.buf, dueno=shm)
+
+def guardar_plano(data, ruta, maps=None):
+    with open(ruta, "wb") as f:
+        f.write(codificar(data, maps))
+    return ruta
+
+def abrir_archivo(ruta):
+    """ModeloPlano sobre un archivo de guardar_plano(), mapeado en memoria de sólo lectura."""
+    with open(ruta, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return ModeloPlano(mm, dueno=mm)
@@ -0,0 +1,77 @@
+"""Destino de los archivos generados: en memoria mientras son chicos y en disco después.
+
+generar_excel, generar_zip y la normalización determinista escriben en un ArchivoGenerado
+(un SpooledTemporaryFile) que pasa a un temporal en disco al superar SPILL_MB. Quien lo
+entrega lo lee por bloques, así el pico de memoria por generación no crece con el tamaño
+del workbook. La excepción es el botón de descarga de la página: Streamlit necesita los
+bytes, así que al descargar se arma una copia completa (getvalue).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+SPILL_MB = float(os.environ.get("SIMETRIK_DOC_SPILL_MB", "8"))
+CHUNK    = 64 * 1024
+
+
+class ArchivoGenerado(tempfile.SpooledTemporaryFile):
+    """Archivo de salida (xlsx o zip); file-like para pandas, openpyxl y zipfile."""
+
+    def __init__(self, spill_mb=None):
+        super().__init__(max_size=int((SPILL_MB if spill_mb is None else spill_mb) * 1024 * 1024),
+                         mode='w+b')
+        self._sha256 = None
+
+    @property
+    def en_disco(self):
+        return self._rolled
+
+    @property
+    def tamano(self):
+        self.flush()
+        if self._rolled:
+            return os.fstat(self.fileno()).st_size
+        return self._file.getbuffer().nbytes
+
+    def bloques(self, chunk=CHUNK):
+        """Contenido completo por bloques, sin mover la posición: varios hilos pueden leerlo a la vez."""
+        self.flush()
+        if self._rolled:
+            fd, off = self.fileno(), 0
+            while True:
+                b = os.pread(fd, chunk, off)
+                if not b:
+                    return
+                off += len(b)
+                yield b
+        else:
+            view = self._file.getbuffer()
+            try:
+                for i in range(0, len(view), chunk):
+                    yield bytes(view[i:i + chunk])
+            finally:
+                view.release()
+
+    def getvalue(self):
+        """Todo el contenido en memoria; sólo para archivos chicos o entregas que igual lo copian."""
+        return b"".join(self.bloques())
+
+    def sha256(self):
+        if self._sha256 is None:
+            h = hashlib.sha256()
+            for b in self.bloques():
+                h.update(b)
+            self._sha256 = h.hexdigest()
+        return self._sha256
+
+    def guardar_en(self, ruta):
+        with open(ruta, "wb") as f:
+            for b in self.bloques():
+                f.write(b)
+        return ruta
+
+
+def copiar(origen, destino):
+    """Copia un archivo abierto a otro por bloques."""
+    shutil.copyfileobj(origen, destino, CHUNK)
@@ -0,0 +1,182 @@
+"""Contenido de la hoja de detalle de un recurso como bloques, sin formato.
+
+Lo que escribe generar_excel en cada hoja de detalle, con los mismos parsers y en el mismo
+orden; de acá lo toman también la vista previa HTML, el sitio estático y el Markdown.
+Cada bloque es un dict:
+
+    {'tipo': 'titulo', 'texto': …, 'nivel': 1 | 2}
+    {'tipo': 'meta',   'filas': [(etiqueta, valor), …]}
+    {'tipo': 'tabla',  'plantilla': Plantilla, 'encabezados': […], 'filas': [[…], …],
+                       'centrado': {índices}}
+
+Las celdas son textos (con saltos de línea donde el Excel usa wrap) o números. Cada tabla
+se declara una sola vez como Plantilla (columnas, cuántas columnas de la hoja ocupa cada
+una, alineación y color); el Excel la compila en un plan de filas y HTML/Markdown toman
+de ella los encabezados y el centrado.
+"""
+from .constants import RT_LABEL
+from .parsers import (parse_std_reconciliation, parse_adv_reconciliation, parse_segment_filters,
+                      parse_source_group, parse_union_segments, parse_union_mapping,
+                      parse_transformation_logic)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PLANTILLAS DE LAS TABLAS
+# ══════════════════════════════════════════════════════════════════════════════
+class Plantilla:
+    """Columnas de una tabla de detalle: (encabezado, ancho, alineación, color).
+
+    ancho es la cantidad de columnas de la hoja que ocupa (se combinan en cada fila) y color
+    el del texto: None para el de siempre o una función del valor de la celda. El alto de
+    los encabezados es fijo (`alto`); el de las filas lo calcula ajustar_hoja por el wrap.
+    paginable: en el Excel, pasado el tope de filas por sección el resto va a hojas de
+    continuación (las tablas que en un recurso pueden llegar a miles de filas).
+    """
+    __slots__ = ('nombre', 'columnas', 'alto', 'paginable')
+
+    def __init__(self, nombre, *columnas, alto=18, paginable=False):
+        self.nombre    = nombre
+        self.columnas  = tuple(c + (1, 'left', None)[len(c) - 1:] for c in columnas)
+        self.alto      = alto
+        self.paginable = paginable
+
+    @property
+    def encabezados(self):
+        return [c[0] for c in self.columnas]
+
+    @property
+    def centrado(self):
+        return {i for i, c in enumerate(self.columnas) if c[2] == 'center'}
+
+    def __repr__(self):
+        return f"Plantilla({self.nombre!r})"
+
+
+SIN_USO = "Sin uso en flujo activo"
+
+def _color_uso(valor):
+    return "4B5563" if valor == SIN_USO else "365C42"
+
+LADOS_STD    = Plantilla("lados_std", ("LADO", 1, 'center'), ("RECURSO",), ("GRUPO CONCILIABLE (ACTIVO)",),
+                         ("FILTROS DEL GRUPO", 2))
+REGLAS_STD   = Plantilla("reglas_std", ("POS.", 1, 'center'), ("NOMBRE DEL RULE SET",), ("REGLAS  (A vs B)", 3))
+GRUPOS_ADV   = Plantilla("grupos_adv", ("LADO", 1, 'center'), ("RECURSO",), ("GRUPO CONCILIABLE",),
+                         ("FILTROS DEL GRUPO",), ("SEGMENTOS INTERNOS",))
+REGLAS_ADV   = Plantilla("reglas_adv", ("POS.", 1, 'center'), ("NOMBRE / TIPO",), ("REGLAS  (A vs B)",),
+                         ("SEGMENTO LADO A",), ("SEGMENTO LADO B",))
+FUENTES_UNION = Plantilla("fuentes_union", ("FUENTE",), ("GRUPO CONCILIABLE",), ("ROL", 1, 'center'),
+                          ("FILTROS DEL GRUPO", 2))
+MAPEO_UNION  = Plantilla("mapeo_union", ("COLUMNA DESTINO (UNIÓN)",), ("FUENTE (RECURSO)",), ("COLUMNA ORIGEN",),
+                         ("ESTADO", 2), paginable=True)
+SEGMENTOS    = Plantilla("segmentos", ("NOMBRE DEL GRUPO",), ("FILTROS APLICADOS", 3),
+                         ("USADO EN", 1, 'left', _color_uso))
+COLUMNAS     = Plantilla("columnas", ("LABEL / NOMBRE",), ("TIPO DATO", 1, 'center'), ("TIPO COL.", 1, 'center'),
+                         ("LÓGICA · FÓRMULA · BUSCAR V", 2), paginable=True)
+
+
+def _titulo(texto, nivel=1):
+    return {'tipo': 'titulo', 'texto': texto, 'nivel': nivel}
+
+def _tabla(plantilla, filas):
+    return {'tipo': 'tabla', 'plantilla': plantilla, 'encabezados': plantilla.encabezados, 'filas': filas,
+            'centrado': plantilla.centrado}
+
+
+def secciones_recurso(res, maps, rels):
+    """Bloques de la hoja de `res`; maps es build_maps(data) y rels build_relations(...)."""
+    res_map, col_map, seg_map, meta_map, seg_usage = maps
+    eid = res.get('export_id')
+    rt  = res.get('resource_type', '')
+    rel = rels.get(eid, {"parents": [], "children": []})
+
+    bloques = [{'tipo': 'meta', 'filas': [
+        ("ID Recurso",  eid),
+        ("Tipo",        RT_LABEL.get(rt, rt)),
+        ("Proviene de", ", ".join(rel["parents"]) or "Origen"),
+        ("Alimenta a",  ", ".join(rel["children"]) or "Fin de flujo"),
+    ]}]
+
+    std = parse_std_reconciliation(res.get('reconciliation'), res_map, col_map, seg_map)
+    if std:
+        bloques += [
+            _titulo("⚖️  REGLAS DE CONCILIACIÓN ESTÁNDAR"),
+            _titulo("GRUPOS CONCILIABLES ACTIVOS", 2),
+            _tabla(LADOS_STD,
+                   [[s['prefix'] + ("  [TRIGGER]" if s['is_trigger'] else ""), s['resource_name'],
+                     s['group_name'], s['group_filters']] for s in std['sides']]),
+            {'tipo': 'meta', 'filas': [("Conciliación encadenada", "Sí" if std['is_chained'] else "No")]},
+            _titulo("RULE SETS DE MATCHING", 2),
+            _tabla(REGLAS_STD,
+                   [[rs['pos'], rs['name'], "\n".join(rs['rules'])] for rs in std['rule_sets']]),
+        ]
+
+    adv = parse_adv_reconciliation(res.get('advanced_reconciliation'), res_map, col_map, seg_map, meta_map)
+    if adv:
+        rule_sets = []
+        for rs in adv['rule_sets']:
+            nombre = rs['name']
+            if rs['cross_type']: nombre += "\n[" + rs['cross_type'] + "]"
+            if rs['new_ver']:    nombre += "  ✦ new version"
+            seg_a = next((s.replace("Lado A: ", "") for s in rs['sweep'] if s.startswith("Lado A")), "—")
+            seg_b = next((s.replace("Lado B: ", "") for s in rs['sweep'] if s.startswith("Lado B")), "—")
+            rule_sets.append([rs['pos'], nombre, "\n".join(rs['rules']), seg_a, seg_b])
+        bloques += [
+            _titulo("🔬  REGLAS DE CONCILIACIÓN AVANZADA"),
+            _titulo("GRUPOS CONCILIABLES Y SEGMENTOS INTERNOS", 2),
+            _tabla(GRUPOS_ADV,
+                   [[g['prefix'], g['resource_name'], g['group_name'], g['group_filters'],
+                     "\n".join(g['segments']) if g['segments'] else "(sin segmentación interna)"]
+                    for g in adv['groups']]),
+            _titulo("RULE SETS (SEGMENTO A vs SEGMENTO B)", 2),
+            _tabla(REGLAS_ADV, rule_sets),
+        ]
+
+    sg = res.get('source_group')
+    if sg:
+        group_cols, agg_vals = parse_source_group(sg, col_map)
+        bloques += [
+            _titulo("📊  CONFIGURACIÓN DE AGRUPACIÓN (GROUP BY)"),
+            {'tipo': 'meta', 'filas': [
+                ("GROUP BY (dimensiones)",  " | ".join(group_cols) or "—"),
+                ("Agregaciones (métricas)", "  |  ".join(f"{fn}( {col} )" for fn, col in agg_vals) or "—"),
+                ("Acumulativo",             "Sí" if sg.get('is_accumulative') else "No"),
+            ]},
+        ]
+
+    su = res.get('source_union')
+    if su:
+        bloques += [
+            _titulo("🔗  CONFIGURACIÓN DE UNIÓN DE FUENTES"),
+            _tabla(FUENTES_UNION,
+                   [[us['resource_name'], us['group_name'], us['rol'], us['filters']]
+                    for us in parse_union_segments(su, col_map, seg_map)]),
+        ]
+        mapeo = parse_union_mapping(su, col_map, seg_map)
+        if mapeo:
+            bloques += [
+                _titulo("🔀  MAPEO DE COLUMNAS DE UNIÓN"),
+                _tabla(MAPEO_UNION,
+                       [[dest, "\n".join(m['source'] for m in ms), "\n".join(m['orig_col'] for m in ms),
+                         "\n".join(m['active'] for m in ms)] for dest, ms in mapeo.items()]),
+            ]
+
+    segs = parse_segment_filters(res.get('segments', []), col_map)
+    if segs:
+        filas = []
+        for seg in segs:
+            usos = seg_usage.get(seg['seg_id'], [])
+            filas.append([seg['name'], "\n".join(seg['rules']),
+                          "\n".join(u[0] + " (" + u[1] + ")" for u in usos) if usos else SIN_USO])
+        bloques += [_titulo("🔍  GRUPOS CONCILIABLES DEL RECURSO"),
+                    _tabla(SEGMENTOS, filas)]
+
+    columns = sorted(res.get('columns') or [], key=lambda x: x.get('position', 0))
+    if columns:
+        bloques += [
+            _titulo("📋  CONFIGURACIÓN DE COLUMNAS"),
+            _tabla(COLUMNAS,
+                   [[col.get('label') or col.get('name', ''), col.get('data_format', ''),
+                     (col.get('column_type') or '').replace('_', ' ').upper(),
+                     parse_transformation_logic(col, res_map, col_map)] for col in columns]),
+        ]
+    return bloques
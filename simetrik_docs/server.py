@@ -0,0 +1,258 @@
+"""Servicio HTTP local (sólo stdlib) para generar la documentación sin navegador.
+
+    python -m simetrik_docs serve --port 8502
+
+Endpoints:
+    POST /flows                   cuerpo = export JSON  → {"flow": <sha256>, "resources": n}
+    GET  /flows/<hash>/index      Índice parseado como JSON
+    GET  /flows/<hash>/export     xlsx  (?ids=1,2,3  |  ?root=ID&direction=up|down|both)
+                                  con ?split=tipo|cadena devuelve un zip de varios xlsx
+                                  y con ?layout=sin_combinar los arma sin celdas combinadas
+    POST /export                  cuerpo = export JSON, mismos parámetros → xlsx / zip
+    GET  /health
+    GET  /metrics                 métricas en formato Prometheus (simetrik_docs.metricas)
+
+Los flujos se guardan por hash de contenido y los xlsx por (hash, selección, modo), así un
+pipeline que vuelve a pedir la misma documentación la recibe directo del cache. Los
+archivos se generan en modo determinista: el ETag es el sha256 del cuerpo y un
+If-None-Match que coincide responde 304 sin volver a enviarlo.
+"""
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .estimador import LAYOUTS
+from .integridad import es_export
+from .jobs import ColaGeneracion, ColaLlena
+from .lru import LRUCache
+from .metricas import PARSEO, REGISTRO
+from .parsers import build_index, lineage_ids, recursos_unicos
+from .split import MODOS_SPLIT
+from .salida import CHUNK
+
+XLSX_MIME   = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+ZIP_MIME    = "application/zip"
+MAX_FLUJOS  = int(os.environ.get("SIMETRIK_HTTP_FLOWS", "16"))
+MAX_MB_XLSX = int(os.environ.get("SIMETRIK_HTTP_CACHE_MB", "256"))
+
+
+def _parse_id(tok):
+    tok = tok.strip()
+    return int(tok) if tok.lstrip('-').isdigit() else tok
+
+def resolver_seleccion(data, query):
+    """Ids a documentar según la query: ?ids=…, ?root=…&direction=…, o todo el flujo."""
+    all_ids = {r.get('export_id') for r in data.get('resources', [])}
+    if query.get('ids'):
+        sel = {_parse_id(t) for v in query['ids'] for t in v.split(',') if t.strip()}
+    elif query.get('root'):
+        direction = query.get('direction', ['up'])[0]
+        if direction not in ("up", "down", "both"):
+            raise ValueError("direction debe ser up, down o both")
+        sel = lineage_ids(data.get('nodes', []), _parse_id(query['root'][0]), direction)
+    else:
+        sel = all_ids
+    return sel & all_ids
+
+
+class DocService:
+    """Estado compartido del servicio: flujos parseados, xlsx cacheados y la cola de generación."""
+
+    def __init__(self, cola=None):
+        self.cola   = cola or ColaGeneracion()
+        self.flujos = LRUCache(MAX_FLUJOS, nombre="flujos")
+        # Los archivos grandes viven en disco; el tope cuenta su tamaño esté donde esté
+        self.xlsx   = LRUCache(10_000, max_bytes=MAX_MB_XLSX * 1024 * 1024, size=lambda a: a.tamano,
+                               nombre="archivos")
+
+    def registrar(self, raw):
+        h = hashlib.sha256(raw).hexdigest()
+        data = self.flujos.get(h)
+        if data is None:
+            with PARSEO.medir(origen="http"):
+                data = json.loads(raw)
+            # Antes de cachearlo: un JSON que no es un export no queda guardado bajo su hash
+            if not es_export(data):
+                raise ValueError("El cuerpo no es un export de Simetrik: se espera un objeto con "
+                                 "'resources' (lista de objetos) y 'nodes' (lista)")
+            self.flujos.put(h, data)
+        return h, data
+
+    def exportar(self, h, data, selected_ids, modo="unico", layout="combinado"):
+        key = (h, frozenset(selected_ids), modo, layout)
+        cached = self.xlsx.get(key)
+        if cached is not None:
+            return cached
+        job = self.cola.enviar(data, selected_ids, modo, determinista=True, layout=layout)
+        job.future.result()
+        if job.estado != "listo":
+            raise RuntimeError(job.error or f"Generación {job.estado}")
+        self.xlsx.put(key, job.resultado)
+        return job.resultado
+
+
+class DocRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    timeout          = 30           # libera el thread de conexiones keep-alive ociosas
+    server_version   = "SimetrikDocs/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    # ── respuestas ────────────────────────────────────────────────────────────
+    def _send_json(self, status, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, archivo, nombre):
+        etag = '"' + archivo.sha256() + '"'
+        if etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", ZIP_MIME if nombre.endswith(".zip") else XLSX_MIME)
+        self.send_header("Content-Length", str(archivo.tamano))
+        self.send_header("Content-Disposition", f'attachment; filename="{nombre}"')
+        self.end_headers()
+        for bloque in archivo.bloques(CHUNK):
+            self.wfile.write(bloque)
+
+    def _descartar_body(self):
+        # En keep-alive un cuerpo sin leer se tomaría como la próxima request
+        n = int(self.headers.get("Content-Length") or 0)
+        while n > 0:
+            leido = len(self.rfile.read(min(n, CHUNK)))
+            if not leido:
+                break
+            n -= leido
+
+    def _read_body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if n <= 0:
+            raise ValueError("Falta el cuerpo con el export JSON")
+        return self.rfile.read(n)
+
+    def _export(self, h, data, query):
+        sel  = resolver_seleccion(data, query)
+        modo = query.get('split', ['unico'])[0]
+        layout = query.get('layout', ['combinado'])[0]
+        if not sel:
+            return self._send_json(400, {"error": "La selección no contiene recursos del flujo"})
+        if modo != "unico" and modo not in MODOS_SPLIT:
+            return self._send_json(400, {"error": "split debe ser " + " o ".join(MODOS_SPLIT)})
+        if layout not in LAYOUTS:
+            return self._send_json(400, {"error": "layout debe ser " + " o ".join(LAYOUTS)})
+        try:
+            archivo = self.service.exportar(h, data, sel, modo, layout)
+        except ColaLlena as e:
+            self.send_response(503)
+            self.send_header("Retry-After", "30")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.log_message("%s", e)
+            return
+        except RuntimeError as e:   # la generación falló o se canceló
+            # El traceback completo queda en el log del servidor; al cliente sólo la última línea
+            # (log_message escapa los saltos de línea, por eso va aparte a stderr)
+            error = str(e).strip().splitlines()[-1]
+            self.log_message("Generación fallida: %s", error)
+            sys.stderr.write(str(e).rstrip() + "\n")
+            return self._send_json(500, {"error": error})
+        self._send_file(archivo, f"skt_doc_{h[:12]}" + (".xlsx" if modo == "unico" else ".zip"))
+
+    # ── rutas ─────────────────────────────────────────────────────────────────
+    def do_GET(self):
+        url   = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        try:
+            if parts == ["metrics"]:
+                body = REGISTRO.texto().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if parts == ["health"]:
+                return self._send_json(200, {"ok": True, "flows": len(self.service.flujos),
+                                             "queued": self.service.cola.en_espera()})
+            if len(parts) == 3 and parts[0] == "flows":
+                data = self.service.flujos.get(parts[1])
+                if data is None:
+                    return self._send_json(404, {"error": "Flujo desconocido, súbelo con POST /flows"})
+                query = parse_qs(url.query)
+                if parts[2] == "index":
+                    sel = resolver_seleccion(data, query) if query else None
+                    return self._send_json(200, {"flow": parts[1], "index": build_index(data, sel)})
+                if parts[2] == "export":
+                    return self._export(parts[1], data, query)
+            self._send_json(404, {"error": "Ruta no encontrada"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+
+    def do_POST(self):
+        url   = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        try:
+            if parts not in (["flows"], ["export"]):
+                self._descartar_body()
+                return self._send_json(404, {"error": "Ruta no encontrada"})
+            h, data = self.service.registrar(self._read_body())
+            if parts == ["flows"]:
+                return self._send_json(200, {"flow": h,
+                                             "resources": len(recursos_unicos(data.get('resources', [])))})
+            return self._export(h, data, parse_qs(url.query))
+        except ValueError as e:   # incluye json.JSONDecodeError
+            self._send_json(400, {"error": str(e)})
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer que atiende cada conexión en un ThreadPoolExecutor acotado."""
+
+    def __init__(self, address, handler=DocRequestHandler, threads=8, service=None):
+        super().__init__(address, handler)
+        self.service = service or DocService()
+        self._pool   = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="simetrik-http")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+
+def serve(host="127.0.0.1", port=8502, threads=8, workers=None, metricas=None):
+    """metricas: archivo donde volcar además las métricas periódicamente (textfile collector)."""
+    from .metricas import iniciar_volcado
+    iniciar_volcado(metricas)
+    cola = ColaGeneracion(max_workers=workers) if workers else None
+    httpd = PooledHTTPServer((host, port), threads=threads, service=DocService(cola))
+    print(f"Simetrik Docs API escuchando en http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
@@ -0,0 +1,58 @@
+"""Flujos ya parseados que sobreviven a una recarga de la página.
+
+La página guarda cada export parseado (data, maps, relaciones y el resto de lo que
+precalcula) por el sha256 del archivo, y la selección de cada pestaña por un token de
+sesión; los dos viajan en la URL (?flujo=<hash>&sesion=<token>). Al recargar o al
+reconectarse el websocket la sesión nueva los encuentra acá sin volver a subir ni a
+parsear el export. Subir otra vez el mismo archivo tampoco lo vuelve a parsear.
+
+    SIMETRIK_DOC_SESIONES_MB   tope en MB de export de los flujos guardados (1024)
+    SIMETRIK_DOC_SESIONES      flujos guardados como máximo (8)
+
+Se descartan los usados hace más tiempo. Un flujo parseado ocupa en memoria varias veces
+el tamaño del export, por eso el tope se expresa en MB de export.
+"""
+import hashlib
+import os
+import uuid
+
+from .lru import LRUCache
+
+SESIONES_MB     = int(os.environ.get("SIMETRIK_DOC_SESIONES_MB", "1024"))
+MAX_SESIONES    = int(os.environ.get("SIMETRIK_DOC_SESIONES", "8"))
+MAX_SELECCIONES = 1000   # tokens de pestañas (cada uno guarda sólo un dict de ids)
+
+
+def hash_export(buffer):
+    """sha256 del export tal como se subió (bytes o memoryview, sin copiarlo)."""
+    return hashlib.sha256(buffer).hexdigest()
+
+def nuevo_token():
+    return uuid.uuid4().hex[:16]
+
+
+class SesionesFlujo:
+    """Flujos parseados por hash del export y selecciones por token de sesión."""
+
+    def __init__(self, max_mb=SESIONES_MB, max_flujos=MAX_SESIONES):
+        self.flujos      = LRUCache(max_flujos, max_bytes=max_mb * 1024 * 1024, size=lambda f: f['bytes'],
+                                    nombre="flujos_pagina")
+        self.selecciones = LRUCache(MAX_SELECCIONES)
+
+    def flujo(self, h):
+        return self.flujos.get(h) if h else None
+
+    def guardar(self, flujo):
+        """flujo: el dict que arma la página, con 'hash' y 'bytes' (tamaño del export)."""
+        self.flujos.put(flujo['hash'], flujo)
+
+    def seleccion(self, token, h):
+        """Selección guardada para el token, si es del mismo flujo (None si no hay)."""
+        guardada = self.selecciones.get(token) if token else None
+        if guardada is None or guardada[0] != h:
+            return None
+        return guardada[1]
+
+    def recordar(self, token, h, sel):
+        # Se guarda el mismo dict que la sesión modifica al tildar: no hace falta volver a guardarlo
+        self.selecciones.put(token, (h, sel))
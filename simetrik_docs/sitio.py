@@ -0,0 +1,276 @@
+"""Documentación estática: un sitio HTML (o Markdown) con una página por recurso.
+
+Mismo contenido que el Excel (secciones_recurso) sin pasar por openpyxl: cada página se
+escribe por fragmentos a medida que se arma, así el costo es el de los parsers más el de
+concatenar texto. El sitio lleva:
+
+    index.html      Índice con proviene de / alimenta a y un buscador
+    <id>.html       una página por recurso, con links a sus orígenes y destinos
+    estilos.css     la hoja de estilos compartida (la misma paleta que la vista previa)
+    diagrama.svg    el diagrama de linaje (simetrik_docs.diagrama) con links a cada página
+    busqueda.json   datos del buscador; busqueda.js los mismos datos para abrir el sitio
+                    con file:// (donde el navegador no deja leer un .json con fetch)
+
+En Markdown cambian las extensiones (index.md, <id>.md) y no hay css ni js.
+
+Generado sobre un directorio es incremental: cada página se escribe a un temporal
+calculando su hash y sólo reemplaza a la existente si cambió (las páginas sin cambios
+conservan su fecha de modificación), y las páginas de recursos que ya no están se borran.
+Los hashes de la última generación quedan en .sitio.json dentro del directorio.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import zipfile
+from datetime import datetime
+
+from .constants import C, RT_COLOR, RT_LABEL
+from .determinismo import fecha_determinista, zip_info
+from .diagrama import iter_svg, layout_linaje
+from .parsers import build_maps, build_relations, build_adjacency, recursos_unicos
+from .salida import ArchivoGenerado
+from .secciones import secciones_recurso
+from .vista import CSS, iter_html_bloques
+
+FORMATOS_SITIO = {
+    "html": "Sitio HTML",
+    "md":   "Markdown",
+}
+
+MANIFIESTO = ".sitio.json"
+
+CSS_SITIO = CSS + f"""
+body {{ margin: 0; background: #{C['white']}; }}
+.skd {{ max-width: 1200px; margin: 0 auto; padding: 16px 24px 48px; font-size: 0.85rem; }}
+.skd-nav {{ background: #{C['dark']}; padding: 8px 24px; font-family: Inter, Calibri, sans-serif; font-size: 0.8rem; }}
+.skd-nav a {{ color: #{C['white']}; text-decoration: none; font-weight: 700; }}
+.skd a {{ color: #{C['blue']}; }}
+.skd .skd-rel {{ margin: 4px 0 10px; }}
+.skd .skd-rel span {{ color: #{C['slate']}; font-weight: 700; margin-right: 4px; }}
+.skd h1 {{ background: #{C['red']}; color: #{C['white']}; font-size: 1.05rem; padding: 10px; margin: 0; text-align: center; }}
+.skd .skd-sello {{ background: #{C['dark']}; color: #{C['white']}; text-align: center; padding: 3px; margin-bottom: 12px; }}
+.skd input {{ width: 100%; box-sizing: border-box; padding: 6px 10px; margin-bottom: 10px; border: 1px solid #{C['border']}; }}
+.skd th.skd-idx {{ background: #{C['dark']}; }}
+"""
+
+_BUSCADOR = """
+var q = document.getElementById('q');
+var filas = document.querySelectorAll('tr[data-pagina]');
+var texto = {};
+SKD_BUSQUEDA.forEach(function (r) {
+  texto[r.pagina] = [r.id, r.nombre, r.tipo].concat(r.columnas).join(' ').toLowerCase();
+});
+q.addEventListener('input', function () {
+  var t = q.value.trim().toLowerCase();
+  filas.forEach(function (f) { f.hidden = t !== '' && texto[f.dataset.pagina].indexOf(t) < 0; });
+});
+""".strip()
+
+
+def _pagina(eid, formato):
+    return re.sub(r'[^\w.-]', '_', str(eid)) + "." + formato
+
+def _md(v):
+    return ("" if v is None else str(v)).replace("|", "\\|").replace("\n", "<br>")
+
+def _e(v):
+    return html.escape("" if v is None else str(v))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PÁGINAS (fragmentos de texto)
+# ══════════════════════════════════════════════════════════════════════════════
+def iter_md_bloques(bloques):
+    """Bloques de secciones_recurso() como Markdown (tablas GFM; los saltos de línea como <br>)."""
+    for b in bloques:
+        if b['tipo'] == 'titulo':
+            yield "#" * (b['nivel'] + 1) + " " + b['texto'] + "\n\n"
+        elif b['tipo'] == 'meta':
+            yield "| Campo | Valor |\n|---|---|\n"
+            for k, v in b['filas']:
+                yield f"| **{_md(k)}** | {_md(v)} |\n"
+            yield "\n"
+        else:
+            centrado = b['centrado']
+            yield "| " + " | ".join(_md(h) for h in b['encabezados']) + " |\n"
+            yield "|" + "|".join(":---:" if i in centrado else "---" for i in range(len(b['encabezados']))) + "|\n"
+            for fila in b['filas']:
+                yield "| " + " | ".join(_md(v) for v in fila) + " |\n"
+            yield "\n"
+
+class _Sitio:
+    """Lo que comparten las páginas de una generación: maps, relaciones y nombres de archivo."""
+
+    def __init__(self, data, selected_ids, formato):
+        if formato not in FORMATOS_SITIO:
+            raise ValueError(f"Formato de sitio desconocido: {formato}")
+        self.formato   = formato
+        self.maps      = build_maps(data)
+        self.resources = recursos_unicos(data.get('resources', []), selected_ids)
+        self.rels      = build_relations(self.resources, data.get('nodes', []), self.maps[0])
+        self.up, self.down = build_adjacency(data.get('nodes', []))
+        self.paginas   = {r.get('export_id'): _pagina(r.get('export_id'), formato) for r in self.resources}
+        self.indice    = "index." + formato
+        self.diagrama  = layout_linaje(data, selected_ids)
+
+    def _vecinos(self, ids):
+        """Links a los recursos documentados; los que no están en el sitio van como texto con ↗."""
+        res_map, vistos, out = self.maps[0], set(), []
+        for oid in ids:
+            if oid in vistos:
+                continue
+            vistos.add(oid)
+            nombre = res_map.get(oid, str(oid))
+            if oid not in self.paginas:
+                out.append(_e(nombre) + " ↗" if self.formato == "html" else _md(nombre) + " ↗")
+            elif self.formato == "html":
+                out.append(f"<a href='{self.paginas[oid]}'>{_e(nombre)}</a>")
+            else:
+                out.append(f"[{_md(nombre)}]({self.paginas[oid]})")
+        return out
+
+    def recurso(self, res):
+        eid    = res.get('export_id')
+        rt     = res.get('resource_type', '')
+        titulo = RT_LABEL.get(rt, rt) + "  ·  " + res.get('name', '')
+        padres = ", ".join(self._vecinos(self.up.get(eid, []))) or "Origen"
+        hijos  = ", ".join(self._vecinos(self.down.get(eid, []))) or "Fin de flujo"
+        bloques = secciones_recurso(res, self.maps, self.rels)
+        if self.formato == "md":
+            yield f"[📚 Índice]({self.indice})\n\n# {titulo}\n\n"
+            yield f"**Proviene de:** {padres}  \n**Alimenta a:** {hijos}\n\n"
+            yield from iter_md_bloques(bloques)
+            return
+        color = RT_COLOR.get(rt, C["dark"])
+        yield (f"<!DOCTYPE html>\n<html lang='es'><head><meta charset='utf-8'><title>{_e(titulo)}</title>"
+               f"<link rel='stylesheet' href='estilos.css'></head><body>"
+               f"<div class='skd-nav'><a href='{self.indice}'>📚 Índice</a></div>"
+               f"<div class='skd'><h4 style='color:#{color}'>{_e(titulo)}</h4>"
+               f"<div class='skd-rel'><span>Proviene de:</span>{padres}</div>"
+               f"<div class='skd-rel'><span>Alimenta a:</span>{hijos}</div>")
+        yield from iter_html_bloques(bloques, color)
+        yield "</div></body></html>\n"
+
+    def index(self):
+        rels = self.rels
+        if self.formato == "md":
+            yield f"# SIMETRIK DOCUMENTATION\n\nRecursos documentados: {len(self.resources)}\n\n"
+            yield "[🗺️ Diagrama de linaje](diagrama.svg)\n\n"
+            yield "| # | ID | NOMBRE DEL RECURSO | TIPO | PROVIENE DE | ALIMENTA A |\n|---|---|---|---|---|---|\n"
+            for n, res in enumerate(self.resources, 1):
+                eid = res.get('export_id')
+                yield (f"| {n} | {_md(eid)} | [{_md(res.get('name', ''))}]({self.paginas[eid]}) | "
+                       f"{_md(RT_LABEL.get(res.get('resource_type', ''), res.get('resource_type', '')))} | "
+                       f"{_md(', '.join(rels[eid]['parents']) or '— origen')} | "
+                       f"{_md(', '.join(rels[eid]['children']) or '— fin de flujo')} |\n")
+            return
+        yield ("<!DOCTYPE html>\n<html lang='es'><head><meta charset='utf-8'><title>📚 Índice</title>"
+               "<link rel='stylesheet' href='estilos.css'></head><body><div class='skd'>"
+               "<h1>SIMETRIK DOCUMENTATION  ·  PeYa Finance Operations &amp; Payments</h1>"
+               f"<div class='skd-sello'>Recursos documentados: {len(self.resources)}</div>"
+               "<div class='skd-rel'><a href='diagrama.svg'>🗺️ Diagrama de linaje</a></div>"
+               "<input id='q' type='search' placeholder='Buscar por nombre, id, tipo o columna…'>"
+               "<table><tr>" + "".join(f"<th class='skd-idx'>{h}</th>" for h in
+                                       ["#", "ID", "NOMBRE DEL RECURSO", "TIPO", "PROVIENE DE", "ALIMENTA A"]) + "</tr>")
+        for n, res in enumerate(self.resources, 1):
+            eid = res.get('export_id')
+            rt  = res.get('resource_type', '')
+            yield (f"<tr data-pagina='{self.paginas[eid]}'><td class='skd-c'>{n}</td><td>{_e(eid)}</td>"
+                   f"<td><a href='{self.paginas[eid]}'>{_e(res.get('name', ''))}</a></td>"
+                   f"<td style='color:#{RT_COLOR.get(rt, C['dark'])};font-weight:700'>{_e(RT_LABEL.get(rt, rt))}</td>"
+                   f"<td>{_e(', '.join(rels[eid]['parents']) or '— origen')}</td>"
+                   f"<td>{_e(', '.join(rels[eid]['children']) or '— fin de flujo')}</td></tr>")
+        yield f"</table></div><script src='busqueda.js'></script><script>{_BUSCADOR}</script></body></html>\n"
+
+    def busqueda(self):
+        return [{'id': res.get('export_id'), 'nombre': res.get('name', ''),
+                 'tipo': RT_LABEL.get(res.get('resource_type', ''), res.get('resource_type', '')),
+                 'pagina': self.paginas[res.get('export_id')],
+                 'columnas': [c.get('label') or c.get('name', '') for c in res.get('columns') or []]}
+                for res in self.resources]
+
+    def archivos(self):
+        """(nombre, fragmentos) de todo el sitio: primero los recursos, después índice y búsqueda."""
+        for res in self.resources:
+            yield self.paginas[res.get('export_id')], self.recurso(res)
+        yield self.indice, self.index()
+        busqueda = json.dumps(self.busqueda(), ensure_ascii=False)
+        yield "busqueda.json", [busqueda]
+        yield "diagrama.svg", iter_svg(self.diagrama, enlaces=self.paginas)
+        if self.formato == "html":
+            yield "busqueda.js", ["window.SKD_BUSQUEDA = ", busqueda, ";\n"]
+            yield "estilos.css", [CSS_SITIO]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DESTINOS: directorio (incremental) o zip
+# ══════════════════════════════════════════════════════════════════════════════
+def _escribir(f, fragmentos):
+    h = hashlib.blake2b(digest_size=16)
+    for t in fragmentos:
+        b = t.encode('utf-8')
+        h.update(b)
+        f.write(b)
+    return h.hexdigest()
+
+def generar_sitio(data, directorio, selected_ids=None, formato="html", progreso=None):
+    """Escribe el sitio en `directorio` reemplazando sólo las páginas que cambiaron.
+
+    Devuelve {'escritas', 'sin_cambios', 'eliminadas'} (cantidades de archivos).
+    """
+    sitio = _Sitio(data, selected_ids, formato)
+    os.makedirs(directorio, exist_ok=True)
+    ruta_man = os.path.join(directorio, MANIFIESTO)
+    try:
+        with open(ruta_man, encoding="utf-8") as f:
+            anterior = json.load(f).get('archivos', {})
+    except (OSError, ValueError):
+        anterior = {}
+
+    hashes, stats = {}, {'escritas': 0, 'sin_cambios': 0, 'eliminadas': 0}
+    total = len(sitio.resources)
+    if progreso:
+        progreso(0, total)
+    for n, (nombre, fragmentos) in enumerate(sitio.archivos(), 1):
+        ruta = os.path.join(directorio, nombre)
+        tmp  = os.path.join(directorio, f".{nombre}.tmp")
+        with open(tmp, "wb") as f:
+            hashes[nombre] = _escribir(f, fragmentos)
+        if anterior.get(nombre) == hashes[nombre] and os.path.exists(ruta):
+            os.remove(tmp)
+            stats['sin_cambios'] += 1
+        else:
+            os.replace(tmp, ruta)
+            stats['escritas'] += 1
+        if progreso and n <= total:
+            progreso(n, total)
+
+    # Sólo se borran archivos que generó una corrida anterior, nunca otros del directorio
+    for nombre in set(anterior) - set(hashes):
+        try:
+            os.remove(os.path.join(directorio, nombre))
+            stats['eliminadas'] += 1
+        except FileNotFoundError:
+            pass
+    with open(ruta_man, "w", encoding="utf-8") as f:
+        json.dump({'formato': formato, 'archivos': hashes}, f, ensure_ascii=False, indent=0, sort_keys=True)
+    return stats
+
+def generar_sitio_zip(data, selected_ids=None, formato="html", progreso=None, determinista=False):
+    """El sitio empaquetado en un zip (ArchivoGenerado), con las páginas escritas directo a sus entradas."""
+    sitio  = _Sitio(data, selected_ids, formato)
+    fecha  = fecha_determinista(data) if determinista else datetime.now()
+    total  = len(sitio.resources)
+    output = ArchivoGenerado()
+    if progreso:
+        progreso(0, total)
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+        for n, (nombre, fragmentos) in enumerate(sitio.archivos(), 1):
+            with zf.open(zip_info(nombre, fecha), "w") as dst:
+                _escribir(dst, fragmentos)
+            if progreso and n <= total:
+                progreso(n, total)
+    output.seek(0)
+    return output
@@ -0,0 +1,190 @@
+"""Modo dividido: un Excel por tipo de recurso o por cadena de conciliación, empaquetados en un zip.
+
+Cada parte es un generar_excel independiente (con su propio Índice) que se genera en un
+pool de procesos; los vecinos que quedan en otra parte se enlazan desde el Índice con
+links relativos al archivo correspondiente dentro del zip. El flujo se publica una sola vez
+como ModeloPlano en memoria compartida y cada worker decodifica sólo los recursos de su
+parte. Cada worker deja su parte en un directorio temporal y el zip se arma copiándolas por
+bloques, sin juntarlas en memoria.
+"""
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+from .constants import RT_ORDER
+from .determinismo import fecha_determinista, zip_info
+from .salida import ArchivoGenerado, copiar
+from .parsers import build_adjacency, lineage_ids, recursos_unicos
+
+MODOS_SPLIT = {
+    "tipo":   "Un Excel por tipo de recurso",
+    "cadena": "Un Excel por cadena de conciliación",
+}
+
+RECON_TYPES = ("reconciliation", "advanced_reconciliation")
+
+
+def _nombre_archivo(n, texto):
+    clean = re.sub(r'[\\/*?:"<>|\[\]]', '', str(texto)).strip()
+    return f"{n:02d}_{clean[:40]}.xlsx"
+
+def particionar(data, selected_ids, modo="tipo"):
+    """Lista de (nombre_archivo, ids) disjuntos que cubren la selección.
+
+    'tipo'   agrupa por resource_type en el orden de RT_ORDER.
+    'cadena' arma una parte por conciliación con todo su linaje aguas arriba; los recursos
+             compartidos quedan en la primera cadena que los usa y lo que no alimenta a
+             ninguna conciliación va a una parte final. Ninguna parte queda vacía y la
+             numeración es la de las partes que quedan.
+    """
+    resources = recursos_unicos(data.get('resources', []), selected_ids)
+    if modo == "tipo":
+        grupos = {}
+        for r in resources:
+            grupos.setdefault(r.get('resource_type', ''), []).append(r.get('export_id'))
+        return [(_nombre_archivo(RT_ORDER.get(rt, 99), rt), set(ids))
+                for rt, ids in sorted(grupos.items(), key=lambda x: RT_ORDER.get(x[0], 99))]
+
+    if modo != "cadena":
+        raise ValueError(f"Modo de división desconocido: {modo}")
+    sel       = {r.get('export_id') for r in resources}
+    adjacency = build_adjacency(data.get('nodes', []))
+    asignados, partes = set(), []
+    for r in resources:
+        # Una conciliación que ya entró en una cadena anterior no abre parte propia
+        if r.get('resource_type') not in RECON_TYPES or r.get('export_id') in asignados:
+            continue
+        ids = (lineage_ids(data.get('nodes', []), r.get('export_id'), "up", adjacency) & sel) - asignados
+        if not ids:
+            continue
+        asignados |= ids
+        partes.append((_nombre_archivo(len(partes) + 1, r.get('name', r.get('export_id'))), ids))
+    resto = sel - asignados
+    if resto:
+        partes.append((_nombre_archivo(len(partes) + 1, "sin_conciliacion"), resto))
+    return partes
+
+def _mp_context():
+    import multiprocessing
+    # fork desde un proceso con hilos (Streamlit, el servidor HTTP, el volcado de métricas) puede
+    # dejar al hijo con un lock tomado por otro hilo. El forkserver es un proceso aparte, de un
+    # solo hilo, que precarga el renderer (si puede importarlo) y forkea los workers.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["simetrik_docs.excel"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+_LANZANDO = threading.local()
+_ORIGINAL  = []   # spawn.get_preparation_data de la librería estándar
+
+def _preparacion(nombre):
+    datos = _ORIGINAL[0](nombre)
+    if getattr(_LANZANDO, "activo", False):
+        # Bajo Streamlit el __main__ es la página y cada worker la volvería a ejecutar entera;
+        # los workers sólo corren funciones de simetrik_docs, que se importan por nombre
+        datos.pop('init_main_from_path', None)
+        datos.pop('init_main_from_name', None)
+    return datos
+
+@contextmanager
+def _sin_main():
+    """Los procesos que arranca este hilo mientras tanto no re-ejecutan el __main__."""
+    from multiprocessing import spawn
+    if not _ORIGINAL:
+        _ORIGINAL.append(spawn.get_preparation_data)
+        spawn.get_preparation_data = _preparacion   # los demás hilos ven el comportamiento de siempre
+    _LANZANDO.activo = True
+    try:
+        yield
+    finally:
+        _LANZANDO.activo = False
+
+def _generar_parte(nombre_modelo, ids, enlaces, ruta, determinista=False, layout="combinado", epoch=None):
+    from .excel import generar_excel
+    from .plano import abrir_compartido
+    # El worker tiene el entorno del forkserver, de cuando arrancó: la fecha llega explícita
+    if epoch:
+        os.environ["SOURCE_DATE_EPOCH"] = epoch
+    else:
+        os.environ.pop("SOURCE_DATE_EPOCH", None)
+    # Sólo se decodifican los recursos de la parte y sus vecinos; los maps se leen del modelo
+    with abrir_compartido(nombre_modelo) as modelo, \
+         generar_excel(modelo.export(ids | set(enlaces)), ids, enlaces_externos=enlaces,
+                       determinista=determinista, maps=modelo.maps, layout=layout) as archivo:
+        return archivo.guardar_en(ruta)
+
+def generar_partes(data, partes, max_workers=None, determinista=False, directorio=None, layout="combinado"):
+    """Genera en paralelo las partes de particionar() y devuelve (nombre, ruta) a medida que terminan.
+
+    Cada parte queda en `directorio` (por defecto el temporal del sistema); borrarla es
+    responsabilidad de quien llama.
+    """
+    directorio = directorio or tempfile.gettempdir()
+    # multiprocessing pesa ~20 ms de import: sólo se carga al generar en modo dividido
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from .plano import publicar
+
+    archivo  = {eid: nombre for nombre, ids in partes for eid in ids}
+    up, down = build_adjacency(data.get('nodes', []))
+
+    def enlaces(ids):
+        # Los vecinos de la parte que viven en otro archivo (lo único que lee el Índice)
+        vecinos = {o for eid in ids for o in up.get(eid, []) + down.get(eid, [])} - ids
+        return {o: archivo[o] for o in vecinos if o in archivo}
+
+    # El flujo se publica una vez en memoria compartida: cada worker recibe sólo su nombre
+    modelo  = publicar(data)
+    workers = max(1, min(len(partes), max_workers or os.cpu_count() or 1))
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+    epoch    = os.environ.get("SOURCE_DATE_EPOCH")
+    completo = False
+    try:
+        # Las partes chicas primero: el primer archivo utilizable llega antes
+        # Los workers arrancan dentro de submit, en este hilo
+        with _sin_main():
+            futs = {pool.submit(_generar_parte, modelo.name, ids, enlaces(ids),
+                                os.path.join(directorio, f"{os.getpid()}_{nombre}"), determinista, layout,
+                                epoch): nombre
+                    for nombre, ids in sorted(partes, key=lambda p: len(p[1]))}
+        for fut in as_completed(futs):
+            yield futs[fut], fut.result()
+        completo = True
+    finally:
+        if not completo:
+            # Cancelación o error: las partes que ya corren se cortan; si no, seguirían gastando
+            # CPU y escribiendo en un directorio que quien llama está por borrar
+            for proceso in list((pool._processes or {}).values()):
+                proceso.terminate()
+        pool.shutdown(wait=True, cancel_futures=True)
+        modelo.close()
+        modelo.unlink()
+
+def generar_zip(data, selected_ids, modo="tipo", max_workers=None, progreso=None, determinista=False,
+                layout="combinado"):
+    partes = particionar(data, selected_ids, modo)
+    listos = {}
+    if progreso:
+        progreso(0, len(partes))
+    # En modo determinista ninguna entrada lleva la hora actual
+    fecha  = fecha_determinista(data) if determinista else datetime.now()
+    output = ArchivoGenerado()
+    # closing: si progreso corta (cancelación), los workers se detienen antes de borrar tmp
+    with tempfile.TemporaryDirectory(prefix="simetrik_split_") as tmp, \
+         closing(generar_partes(data, partes, max_workers, determinista, tmp, layout)) as generadas:
+        for nombre, ruta in generadas:
+            listos[nombre] = ruta
+            if progreso:
+                progreso(len(listos), len(partes))
+
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as zf:   # xlsx ya viene comprimido
+            for nombre in sorted(listos):
+                with open(listos[nombre], "rb") as src, \
+                     zf.open(zip_info(nombre, fecha, zipfile.ZIP_STORED), "w") as dst:
+                    copiar(src, dst)
+    output.seek(0)
+    return output
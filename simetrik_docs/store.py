@@ -0,0 +1,196 @@
+"""Almacén local de versiones de exports, direccionado por contenido.
+
+Cada export se parte en blobs canónicos por recurso (con sus columnas y segmentos, la
+unidad que recorre build_maps), más uno para los nodes. Los blobs se guardan una sola vez
+por hash, así dos versiones casi iguales comparten casi todo el disco; una versión es sólo
+un manifiesto con la lista de hashes y el nombre/tipo de cada recurso.
+
+    root/objects/ab/cdef…          blob zlib(canonical_json)
+    root/flows/<flujo>/<id>.json   manifiesto de la versión
+
+cargar() devuelve un ExportVersionado que resuelve los blobs recién al pedirlos, con un
+cache compartido entre versiones: abrir una versión vieja sólo decodifica lo que cambió.
+Los objetos del cache se comparten entre versiones, así que son de sólo lectura.
+"""
+import json
+import os
+import re
+import time
+import zlib
+from collections.abc import Mapping
+from functools import lru_cache
+
+from .hashing import canonical_json, content_hash
+
+STORE_DIR   = os.environ.get("SIMETRIK_DOC_STORE", "")
+CACHE_BLOBS = int(os.environ.get("SIMETRIK_DOC_STORE_CACHE", "20000"))
+
+
+def _nombre_flujo(flujo):
+    clean = re.sub(r'[^\w.-]+', '_', str(flujo)).strip('._')
+    if not clean:
+        raise ValueError("El nombre del flujo no puede quedar vacío")
+    return clean
+
+
+class VersionStore:
+    def __init__(self, root=None, cache_blobs=CACHE_BLOBS):
+        self.root = os.path.abspath(root or STORE_DIR or
+                                    os.path.join(os.path.expanduser("~"), ".simetrik_docs", "store"))
+        # Los blobs son inmutables: un lru_cache por hash nunca queda desactualizado
+        self._blob = lru_cache(maxsize=cache_blobs)(self._leer_blob)
+
+    # ── blobs ────────────────────────────────────────────────────────────────
+    def _ruta(self, h):
+        return os.path.join(self.root, "objects", h[:2], h[2:])
+
+    def _leer_blob(self, h):
+        with open(self._ruta(h), "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def _escribir(self, ruta, body):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, ruta)   # atómico: un lector nunca ve un blob a medio escribir
+
+    def _guardar_blob(self, obj, nuevos):
+        raw = canonical_json(obj)
+        h   = content_hash(obj)
+        ruta = self._ruta(h)
+        if not os.path.exists(ruta):
+            self._escribir(ruta, zlib.compress(raw, 6))
+            nuevos[0] += 1
+            nuevos[1] += len(raw)
+        return h
+
+    # ── versiones ────────────────────────────────────────────────────────────
+    def guardar(self, flujo, data):
+        """Guarda una versión del export y devuelve su id (idempotente: mismo contenido → mismo id).
+
+        La versión guardada queda como la última del flujo aunque ya existiera.
+        """
+        flujo  = _nombre_flujo(flujo)
+        nuevos = [0, 0]
+        recursos = []
+        for r in data.get('resources', []):
+            recursos.append({'export_id':     r.get('export_id'),
+                             'name':          r.get('name', ''),
+                             'resource_type': r.get('resource_type', ''),
+                             'blob':          self._guardar_blob(r, nuevos)})
+        extra = {k: v for k, v in data.items() if k not in ('resources', 'nodes')}
+        cuerpo = {
+            'resources': recursos,
+            'nodes':     self._guardar_blob(data.get('nodes', []), nuevos),
+            'extra':     self._guardar_blob(extra, nuevos),
+        }
+        # El id sale de los hashes del manifiesto, no de volver a serializar todo el export
+        version = content_hash(cuerpo)
+        ruta = os.path.join(self.root, "flows", flujo, version + ".json")
+        if os.path.exists(ruta):
+            # Volver a guardar una versión la hace la última: sólo se renueva 'guardado', los
+            # blobs_nuevos/bytes_nuevos siguen siendo los de la primera vez
+            manifiesto = self._manifiesto(flujo, version)
+            manifiesto['guardado'] = time.time()
+        else:
+            manifiesto = {'flow': flujo, 'version': version, 'guardado': time.time(),
+                          'blobs_nuevos': nuevos[0], 'bytes_nuevos': nuevos[1], **cuerpo}
+        self._escribir(ruta, json.dumps(manifiesto, ensure_ascii=False).encode('utf-8'))
+        return version
+
+    def flujos(self):
+        base = os.path.join(self.root, "flows")
+        return sorted(os.listdir(base)) if os.path.isdir(base) else []
+
+    def _manifiesto(self, flujo, version):
+        ruta = os.path.join(self.root, "flows", _nombre_flujo(flujo), version + ".json")
+        if not os.path.exists(ruta):
+            raise KeyError(f"Versión desconocida: {flujo}/{version}")
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+
+    def versiones(self, flujo):
+        """Versiones del flujo de la más nueva a la más vieja, sin tocar los blobs."""
+        base = os.path.join(self.root, "flows", _nombre_flujo(flujo))
+        if not os.path.isdir(base):
+            return []
+        out = []
+        for nombre in os.listdir(base):
+            if nombre.endswith(".json"):
+                m = self._manifiesto(flujo, nombre[:-5])
+                out.append({'version': m['version'], 'guardado': m['guardado'],
+                            'recursos': len(m['resources']), 'blobs_nuevos': m['blobs_nuevos'],
+                            'bytes_nuevos': m['bytes_nuevos']})
+        return sorted(out, key=lambda v: v['guardado'], reverse=True)
+
+    def cargar(self, flujo, version=None):
+        """ExportVersionado de la versión pedida (por defecto la última guardada)."""
+        if version is None:
+            vs = self.versiones(flujo)
+            if not vs:
+                raise KeyError(f"El flujo {flujo} no tiene versiones guardadas")
+            version = vs[0]['version']
+        return ExportVersionado(self, self._manifiesto(flujo, version))
+
+    def estadisticas(self):
+        base = os.path.join(self.root, "objects")
+        n = size = 0
+        for dirpath, _, files in os.walk(base):
+            for f in files:
+                n += 1
+                size += os.path.getsize(os.path.join(dirpath, f))
+        return {'blobs': n, 'bytes': size, 'flujos': len(self.flujos())}
+
+
+class ExportVersionado(Mapping):
+    """El `data` de una versión guardada; los recursos se arman desde los blobs al pedirlos.
+
+    Se comporta como el dict del export para build_maps, parsers y generar_excel, y al
+    serializarse (pickle para el pool de procesos) viaja como dict plano.
+    """
+
+    def __init__(self, store, manifiesto):
+        self.store      = store
+        self.manifiesto = manifiesto
+        self.version    = manifiesto['version']
+        self._cache     = {}
+
+    def _recurso(self, entrada):
+        return self.store._blob(entrada['blob'])
+
+    def recurso(self, eid):
+        """Un único recurso sin materializar el resto del export."""
+        for entrada in self.manifiesto['resources']:
+            if entrada['export_id'] == eid:
+                return self._recurso(entrada)
+        raise KeyError(eid)
+
+    def resumen(self):
+        """(export_id, name, resource_type) de cada recurso, directo del manifiesto."""
+        return [(e['export_id'], e['name'], e['resource_type']) for e in self.manifiesto['resources']]
+
+    def _keys(self):
+        return ['resources', 'nodes', *self.store._blob(self.manifiesto['extra'])]
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            if key == 'resources':
+                self._cache[key] = [self._recurso(e) for e in self.manifiesto['resources']]
+            elif key == 'nodes':
+                self._cache[key] = self.store._blob(self.manifiesto['nodes'])
+            else:
+                self._cache[key] = self.store._blob(self.manifiesto['extra'])[key]
+        return self._cache[key]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def materializar(self):
+        return {k: self[k] for k in self}
+
+    def __reduce__(self):
+        return (dict, (self.materializar(),))
@@ -0,0 +1,173 @@
+"""Modo streaming del renderer: workbook write_only armado hoja por hoja.
+
+Un workbook write_only sólo acepta filas en orden y no deja volver atrás, pero el renderer
+escribe celdas sueltas, combina rangos y ajusta altos al final. Cada hoja se arma entonces
+sobre una HojaDiferida (celdas livianas, sin estilos de openpyxl) y al terminarla se
+vuelca fila por fila al workbook real y se descarta: en memoria queda una sola hoja a la
+vez, y cada combinación de estilo se registra en el workbook una sola vez.
+"""
+from collections import defaultdict
+from copy import copy
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import MultiCellRange
+
+
+class _Dimension:
+    __slots__ = ('width', 'height')
+
+    def __init__(self):
+        self.width = self.height = None
+
+
+class _Vista:
+    showGridLines = True
+
+
+class _Filtro:
+    ref = None
+
+
+_SIN_ESTILO = (Alignment(), Font(), None)   # celdas que no pasan por sc()
+
+
+class CeldaDiferida:
+    """Celda de una HojaDiferida: valor, estilo base de sc() y los ajustes puntuales."""
+    __slots__ = ('row', 'column', 'value', 'hyperlink', 'estilo', 'objetos', '_font', '_alignment')
+
+    def __init__(self, row, column, value=None):
+        self.row, self.column, self.value = row, column, value
+        self.hyperlink = self.estilo = self.objetos = self._font = self._alignment = None
+
+    @property
+    def column_letter(self):
+        return get_column_letter(self.column)
+
+    # font y alignment se leen en ajustar_hoja; el resto del estilo sólo se escribe
+    @property
+    def font(self):
+        return self._font or (self.objetos or _SIN_ESTILO)[1]
+
+    @font.setter
+    def font(self, value):
+        self._font = value
+
+    @property
+    def alignment(self):
+        return self._alignment or (self.objetos or _SIN_ESTILO)[0]
+
+    @alignment.setter
+    def alignment(self, value):
+        self._alignment = value
+
+    @property
+    def border(self):
+        return None
+
+    @border.setter
+    def border(self, value):
+        pass   # en streaming no hay bordes por celda
+
+
+class HojaDiferida:
+    """Lo que el renderer usa de una Worksheet, guardado en estructuras livianas."""
+
+    def __init__(self, title):
+        self.title             = title
+        self.freeze_panes      = None
+        self.sheet_view        = _Vista()
+        self.auto_filter       = _Filtro()
+        self.merged_cells      = MultiCellRange()
+        self.row_dimensions    = defaultdict(_Dimension)
+        self.column_dimensions = defaultdict(_Dimension)
+        self._filas            = defaultdict(dict)
+
+    def cell(self, row, column, value=None):
+        fila = self._filas[row]
+        c = fila.get(column)
+        if c is None:
+            c = fila[column] = CeldaDiferida(row, column)
+        if value is not None:
+            c.value = value
+        return c
+
+    def escribir_fila(self, row, celdas):
+        """Fila entera de un plan: (columna, valor, clave de estilo, objetos de estilo) por celda."""
+        fila = self._filas[row]
+        for col, valor, estilo, objetos in celdas:
+            c = fila[col] = CeldaDiferida(row, col, valor)
+            c.estilo, c.objetos = estilo, objetos
+
+    def merge_cells(self, rango):
+        self.merged_cells.add(rango)
+
+    def iter_rows(self):
+        for row in sorted(self._filas):
+            fila = self._filas[row]
+            yield [fila[col] for col in sorted(fila)]
+
+
+class LibroStreaming:
+    """Workbook write_only con la interfaz que usa generar_excel (create_sheet / sheetnames)."""
+
+    def __init__(self):
+        self.wb       = Workbook(write_only=True)
+        self._estilos = {}   # estilo de sc() → StyleArray ya registrado en el workbook
+
+    @property
+    def sheetnames(self):
+        return self.wb.sheetnames
+
+    def create_sheet(self, title, index=None):
+        # El orden final es el de volcado; generar_excel termina el Índice antes que el detalle
+        return HojaDiferida(title)
+
+    def volcar(self, hoja):
+        ws = self.wb.create_sheet(hoja.title)
+        ws.sheet_view.showGridLines = hoja.sheet_view.showGridLines
+        if hoja.freeze_panes:
+            ws.freeze_panes = hoja.freeze_panes
+        for letra, dim in hoja.column_dimensions.items():
+            if dim.width:
+                ws.column_dimensions[letra].width = dim.width
+        for rango in hoja.merged_cells.ranges:
+            ws.merged_cells.add(rango)
+        if hoja.auto_filter.ref:
+            ws.auto_filter.ref = hoja.auto_filter.ref
+
+        ultima = max(hoja._filas, default=0)
+        for row in range(1, ultima + 1):
+            dim = hoja.row_dimensions.get(row)
+            if dim is not None and dim.height:
+                ws.row_dimensions[row].height = dim.height
+            celdas = hoja._filas.get(row, {})
+            fila = [None] * max(celdas, default=0)
+            for col, c in celdas.items():
+                fila[col - 1] = self._celda(ws, c)
+            ws.append(fila)
+
+    def _celda(self, ws, c):
+        out = WriteOnlyCell(ws, c.value)
+        if c.estilo is not None:
+            base = self._estilos.get(c.estilo)
+            if base is None:
+                alignment, font, fill = c.objetos
+                out.alignment, out.font = alignment, font
+                if fill is not None:
+                    out.fill = fill
+                base = self._estilos[c.estilo] = copy(out._style)
+            else:
+                out._style = copy(base)
+        if c._font is not None:
+            out.font = c._font
+        if c._alignment is not None:
+            out.alignment = c._alignment
+        if c.hyperlink:
+            out.hyperlink = c.hyperlink
+        return out
+
+    def save(self, destino):
+        self.wb.save(destino)
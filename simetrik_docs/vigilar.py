@@ -0,0 +1,176 @@
+"""Modo vigilancia: regenera la documentación cuando llega o cambia un export en una carpeta.
+
+    python -m simetrik_docs vigilar exports/ -o docs/
+    python -m simetrik_docs vigilar exports/ -o docs/ --modo html --una-vez   # para cron
+
+Sondea la carpeta cada `intervalo` segundos con os.scandir: sólo stat, no se lee ningún
+archivo que no cambió. Un export cuyo (mtime, tamaño) cambió se procesa recién cuando
+queda quieto `espera` segundos, así una copia en curso no se toma a medias. Entonces se
+hashea: si los bytes son los de la última generación no se hace nada, y si cambiaron se
+parsea y se compara el hash de contenido (un export reformateado o con las claves en otro
+orden no regenera). Los flujos que sí cambiaron se encolan en una ColaGeneracion con pocos
+workers y el resultado reemplaza de forma atómica a <salida>/<nombre>.xlsx (o .zip).
+
+Los hashes de lo generado quedan en <salida>/.vigilar.json: al reiniciar no se vuelve a
+generar lo que ya estaba al día. Si un export se borra, su documentación se conserva.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .hashing import content_hash
+from .integridad import es_export
+from .jobs import ColaGeneracion, ColaLlena
+from .metricas import PARSEO
+
+ESTADO = ".vigilar.json"
+
+
+class Vigilante:
+    def __init__(self, directorio, salida, modo="unico", intervalo=2.0, espera=1.0, workers=2, cola=None,
+                 bloquear=False):
+        self.directorio = directorio
+        self.salida     = salida
+        self.modo       = modo
+        self.intervalo  = intervalo
+        self.espera     = espera
+        self.bloquear   = bloquear       # los exports con errores de integridad no se generan
+        self.cola       = cola or ColaGeneracion(max_workers=workers)
+        os.makedirs(salida, exist_ok=True)
+        self._estado   = self._leer_estado()   # nombre → {'bytes', 'contenido'} de la última generación
+        self._stat     = {}                    # nombre → (mtime_ns, tamaño) visto en el último sondeo
+        self._quietos  = {}                    # nombre → instante del último cambio (pendientes)
+        self._trabajos = {}                    # nombre → (trabajo, hashes, inicio)
+        self._fin      = threading.Event()
+
+    def _leer_estado(self):
+        try:
+            with open(os.path.join(self.salida, ESTADO), encoding="utf-8") as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Otro modo de salida genera otros archivos: lo anterior no sirve de referencia
+        return estado.get('flujos', {}) if estado.get('modo') == self.modo else {}
+
+    def _guardar_estado(self):
+        ruta = os.path.join(self.salida, ESTADO)
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({'modo': self.modo, 'flujos': self._estado}, f, indent=1, sort_keys=True)
+        os.replace(ruta + ".tmp", ruta)
+
+    def destino(self, nombre):
+        return os.path.join(self.salida, os.path.splitext(nombre)[0] + (".xlsx" if self.modo == "unico" else ".zip"))
+
+    @property
+    def ocupado(self):
+        """Hay exports esperando a quedar quietos o generaciones en curso."""
+        return bool(self._quietos or self._trabajos)
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # SONDEO
+    # ══════════════════════════════════════════════════════════════════════════
+    def sondear(self, ahora=None):
+        """Una pasada sobre la carpeta; devuelve los eventos [(evento, nombre, detalle)]."""
+        ahora   = time.monotonic() if ahora is None else ahora
+        eventos = []
+
+        vistos = set()
+        with os.scandir(self.directorio) as it:
+            for e in it:
+                if not e.name.endswith(".json") or e.name.startswith(".") or not e.is_file():
+                    continue
+                st = e.stat()
+                vistos.add(e.name)
+                firma = (st.st_mtime_ns, st.st_size)
+                if self._stat.get(e.name) != firma:
+                    self._stat[e.name]    = firma
+                    self._quietos[e.name] = ahora
+        for nombre in set(self._stat) - vistos:
+            del self._stat[nombre]
+            self._quietos.pop(nombre, None)
+            eventos.append(("eliminado", nombre, "se conserva la documentación"))
+
+        eventos += self._terminados(ahora)
+
+        for nombre, desde in list(self._quietos.items()):
+            # Un flujo que se está generando espera a que termine esa generación
+            if ahora - desde < self.espera or nombre in self._trabajos:
+                continue
+            del self._quietos[nombre]
+            try:
+                evento = self._procesar(nombre, ahora)
+            except Exception as e:   # la carpeta es compartida: un archivo raro no corta el sondeo
+                evento = ("error", nombre, f"{type(e).__name__}: {e}")
+            if evento is None:
+                self._quietos[nombre] = desde   # cola llena: se reintenta en el próximo sondeo
+            elif evento[0] != "igual":
+                eventos.append(evento)
+        return eventos
+
+    def _procesar(self, nombre, ahora):
+        try:
+            with open(os.path.join(self.directorio, nombre), "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            return ("error", nombre, str(e))
+        previo  = self._estado.get(nombre, {})
+        h_bytes = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        if previo.get('bytes') == h_bytes and os.path.exists(self.destino(nombre)):
+            return ("igual", nombre, "")
+        try:
+            with PARSEO.medir(origen="vigilar"):
+                data = json.loads(raw)
+        except ValueError as e:
+            return ("error", nombre, f"JSON inválido ({e})")
+        if not es_export(data):
+            return ("error", nombre, "no es un export")
+        del raw
+        hashes = {'bytes': h_bytes, 'contenido': content_hash(data)}
+        if previo.get('contenido') == hashes['contenido'] and os.path.exists(self.destino(nombre)):
+            self._estado[nombre] = hashes
+            self._guardar_estado()
+            return ("sin_cambios", nombre, "mismo contenido")
+        ids = {r.get('export_id') for r in data.get('resources', [])}
+        try:
+            job = self.cola.enviar(data, ids, self.modo, determinista=True, bloquear=self.bloquear)
+        except ColaLlena:
+            return None
+        self._trabajos[nombre] = (job, hashes, ahora)
+        return ("encolado", nombre, f"{len(ids)} recursos")
+
+    def _terminados(self, ahora):
+        eventos = []
+        for nombre, (job, hashes, inicio) in list(self._trabajos.items()):
+            if job.activo:
+                continue
+            del self._trabajos[nombre]
+            if job.estado == "listo":
+                ruta = self.destino(nombre)
+                with job.resultado as archivo:
+                    archivo.guardar_en(ruta + ".tmp")
+                os.replace(ruta + ".tmp", ruta)
+                self._estado[nombre] = hashes
+                self._guardar_estado()
+                eventos.append(("generado", nombre, f"{ruta} en {ahora - inicio:.1f} s"))
+            elif job.estado == "error":
+                eventos.append(("error", nombre, job.error.strip().splitlines()[-1]))
+        return eventos
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # BUCLE
+    # ══════════════════════════════════════════════════════════════════════════
+    def correr(self, notificar=None, una_vez=False):
+        """Sondea hasta detener(); con una_vez termina cuando no queda nada pendiente."""
+        while True:
+            for evento in self.sondear():
+                if notificar:
+                    notificar(*evento)
+            if una_vez and not self.ocupado:
+                return
+            if self._fin.wait(self.intervalo):
+                return
+
+    def detener(self):
+        self._fin.set()
@@ -0,0 +1,58 @@
+"""HTML de la documentación de un recurso a partir de secciones_recurso().
+
+Misma paleta que el Excel: títulos con el color del tipo de recurso, zebra gris/blanco y
+saltos de línea donde el Excel usa wrap. El estilo va en clases (CSS), así una tabla de
+cientos de filas no repite los estilos celda por celda.
+"""
+import html
+
+from .constants import C, RT_COLOR, RT_LABEL
+from .secciones import secciones_recurso
+
+CSS = f"""
+.skd {{ font-family: Inter, Calibri, sans-serif; font-size: 0.8rem; color: #{C['dark']}; }}
+.skd h4 {{ margin: 0 0 8px; font-size: 0.95rem; }}
+.skd .skd-t1, .skd .skd-t2 {{ color: #{C['white']}; font-weight: 700; padding: 5px 10px; margin-top: 14px; }}
+.skd .skd-t2 {{ margin-top: 4px; padding-left: 20px; opacity: 0.85; }}
+.skd table {{ border-collapse: collapse; width: 100%; margin: 0; }}
+.skd th {{ color: #{C['white']}; text-align: center; padding: 4px 8px; font-size: 0.75rem; }}
+.skd td {{ border: 1px solid #{C['border']}; padding: 4px 8px; vertical-align: top; }}
+.skd tr:nth-child(even) td {{ background: #{C['grey']}; }}
+.skd td.skd-c {{ text-align: center; }}
+.skd td.skd-l {{ color: #{C['white']}; font-weight: 700; width: 26%; white-space: nowrap; }}
+""".strip()
+
+
+def _texto(v):
+    return html.escape("" if v is None else str(v)).replace("\n", "<br>")
+
+def iter_html_bloques(bloques, color):
+    """Bloques de secciones_recurso() como fragmentos HTML; color es el hex (sin #) del tipo."""
+    for b in bloques:
+        if b['tipo'] == 'titulo':
+            yield f"<div class='skd-t{b['nivel']}' style='background:#{color}'>{_texto(b['texto'])}</div>"
+        elif b['tipo'] == 'meta':
+            yield "<table>"
+            for k, v in b['filas']:
+                yield f"<tr><td class='skd-l' style='background:#{color}'>{_texto(k)}</td><td>{_texto(v)}</td></tr>"
+            yield "</table>"
+        else:
+            centrado = b['centrado']
+            yield "<table><tr>" + "".join(f"<th style='background:#{color}'>{_texto(h)}</th>"
+                                          for h in b['encabezados']) + "</tr>"
+            for fila in b['filas']:
+                yield "<tr>" + "".join(f"<td class='skd-c'>{_texto(v)}</td>" if i in centrado else f"<td>{_texto(v)}</td>"
+                                       for i, v in enumerate(fila)) + "</tr>"
+            yield "</table>"
+
+def html_bloques(bloques, color):
+    return "".join(iter_html_bloques(bloques, color))
+
+def vista_recurso(res, maps, rels, estilos=True):
+    """Documentación de un recurso como un bloque HTML autocontenido."""
+    rt    = res.get('resource_type', '')
+    color = RT_COLOR.get(rt, C["dark"])
+    cuerpo = html_bloques(secciones_recurso(res, maps, rels), color)
+    titulo = _texto(RT_LABEL.get(rt, '') + "  ·  " + res.get('name', ''))
+    return ((f"<style>{CSS}</style>" if estilos else "") +
+            f"<div class='skd'><h4 style='color:#{color}'>{titulo}</h4>{cuerpo}</div>")
@@ -0,0 +1,23 @@
+import copy
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from sintetico import export_sintetico  # noqa: E402
+
+
+@pytest.fixture
+def export():
+    """Export sintético con todos los tipos de recurso y una clave extra a nivel flujo."""
+    data = export_sintetico(40)
+    data['flow'] = {'name': "Flujo de prueba", 'version': 3}
+    return data
+
+@pytest.fixture
+def otro(export):
+    return copy.deepcopy(export)
@@ -0,0 +1,86 @@
+import io
+import time
+import zipfile
+from datetime import datetime, timezone
+
+import pytest
+
+from simetrik_docs import ESTRATEGIAS, generar_excel
+from simetrik_docs.determinismo import FECHA_FIJA
+from simetrik_docs.split import generar_zip
+
+EPOCH = 1700000000   # 2023-11-14 22:13:20 UTC
+
+
+@pytest.fixture(autouse=True)
+def _sin_epoch(monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+
+
+def _ids(data):
+    return [r['export_id'] for r in data['resources']]
+
+def _generar(data):
+    """{salida: bytes} de cada estrategia y del zip dividido, todo en modo determinista."""
+    salidas = {}
+    for e in ESTRATEGIAS:
+        with generar_excel(data, _ids(data), determinista=True, estrategia=e) as f:
+            salidas[e] = f.read()
+    with generar_zip(data, _ids(data), "tipo", max_workers=2, determinista=True) as f:
+        salidas["zip"] = f.read()
+    return salidas
+
+def _entradas(blob):
+    """[(nombre, date_time, metadatos, contenido)] del zip; los xlsx de adentro se abren también."""
+    with zipfile.ZipFile(io.BytesIO(blob)) as zf:
+        return [(i.filename, i.date_time, (i.compress_type, i.create_system, i.external_attr),
+                 _entradas(zf.read(i)) if i.filename.endswith(".xlsx") else zf.read(i))
+                for i in zf.infolist()]
+
+def _fechas(entradas):
+    for nombre, fecha, _, contenido in entradas:
+        yield fecha
+        if isinstance(contenido, list):
+            yield from _fechas(contenido)
+
+
+def test_mismos_bytes_en_otro_segundo(export):
+    antes = _generar(export)
+    time.sleep(1.1 - time.time() % 1)   # la segunda vuelta cae en otro segundo del reloj
+    despues = _generar(export)
+    assert set(antes) == set(ESTRATEGIAS) | {"zip"}
+    for salida in antes:
+        assert antes[salida] == despues[salida], salida
+
+
+@pytest.mark.parametrize("salida", ["xlsx", "zip"])
+def test_source_date_epoch_solo_cambia_fechas(export, monkeypatch, salida):
+    def generar():
+        if salida == "zip":
+            f = generar_zip(export, _ids(export), "tipo", max_workers=2, determinista=True)
+        else:
+            f = generar_excel(export, _ids(export), determinista=True)
+        with f:
+            return _entradas(f.read())
+
+    fijo = generar()
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", str(EPOCH))
+    con_epoch = generar()
+
+    fecha = datetime.fromtimestamp(EPOCH, tz=timezone.utc).replace(tzinfo=None)
+    assert set(_fechas(fijo)) == {FECHA_FIJA.timetuple()[:6]}
+    # zip guarda los segundos de a dos
+    assert set(_fechas(con_epoch)) == {fecha.replace(second=fecha.second // 2 * 2).timetuple()[:6]}
+
+    def comparar(a, b):
+        assert [e[0] for e in a] == [e[0] for e in b]
+        for (nombre, _, meta_a, cont_a), (_, _, meta_b, cont_b) in zip(a, b):
+            assert meta_a == meta_b, nombre
+            if isinstance(cont_a, list):
+                comparar(cont_a, cont_b)
+            elif nombre == "docProps/core.xml":
+                assert cont_a != cont_b
+                assert fecha.strftime('%Y-%m-%dT%H:%M:%SZ').encode() in cont_b
+            else:
+                assert cont_a == cont_b, nombre
+    comparar(fijo, con_epoch)
@@ -0,0 +1,37 @@
+from simetrik_docs.diff import CAMPOS_CAMBIO, diff_exports
+
+
+def test_sin_cambios(export, otro):
+    d = diff_exports(export, otro)
+    assert d['cambios'] == []
+    assert d['resumen']['sin_cambios'] == len(export['resources'])
+
+
+def test_orden_de_claves_no_es_cambio(export, otro):
+    otro['resources'] = [dict(reversed(list(r.items()))) for r in otro['resources']]
+    assert diff_exports(export, otro)['cambios'] == []
+
+
+def test_columna_modificada(export, otro):
+    col = otro['resources'][0]['columns'][0]
+    antes, col['label'] = col.get('label'), "renombrada"
+    d = diff_exports(export, otro)
+    assert d['resumen']['modificados'] == 1
+    fila, = [f for f in d['cambios'] if f['seccion'] == "Columnas"]
+    assert set(fila) == set(CAMPOS_CAMBIO)
+    assert fila['recurso_id'] == otro['resources'][0]['export_id']
+    assert fila['cambio'] == "modificado"
+    assert "renombrada" in str(fila['despues']) and str(antes) in str(fila['antes'])
+
+
+def test_recursos_agregados_y_eliminados(export, otro):
+    quitado = otro['resources'].pop(3)
+    nuevo   = dict(otro['resources'][0], export_id=99999, name="Nuevo")
+    otro['resources'].append(nuevo)
+    d = diff_exports(export, otro)
+    assert d['resumen']['agregados'] == 1 and d['resumen']['eliminados'] == 1
+    assert {(f['recurso_id'], f['cambio']) for f in d['cambios']} == {
+        (99999, "agregado"), (quitado['export_id'], "eliminado")}
+    # Al revés los papeles se invierten
+    r = diff_exports(otro, export)['resumen']
+    assert (r['agregados'], r['eliminados']) == (1, 1)
@@ -0,0 +1,89 @@
+import copy
+
+import pytest
+
+from simetrik_docs.integridad import FlujoInvalido, resumen, validar, verificar
+
+
+def _tipos(hallazgos, nivel=None):
+    return [h['tipo'] for h in hallazgos if nivel is None or h['nivel'] == nivel]
+
+def _recurso(data, rt):
+    return next(r for r in data['resources'] if r['resource_type'] == rt)
+
+
+def test_export_sano_solo_info(export):
+    n = resumen(validar(export))
+    assert n['error'] == n['aviso'] == 0
+    assert verificar(export) == validar(export)
+
+
+def test_recurso_duplicado(export):
+    doble = copy.deepcopy(export['resources'][2])
+    doble['name'] = "Copia"
+    export['resources'].append(doble)
+    h, = [h for h in validar(export) if h['tipo'] == "recurso_duplicado"]
+    assert (h['nivel'], h['id'], h['nombre']) == ("error", doble['export_id'], "Copia")
+    # La copia se descarta entera: sus columnas no cuentan como duplicadas
+    assert "columna_duplicada" not in _tipos(validar(export))
+
+
+def test_columna_duplicada(export):
+    r0, r1 = export['resources'][:2]
+    cid = r0['columns'][0]['export_id']
+    r1['columns'][-1]['export_id'] = cid
+    h, = [h for h in validar(export) if h['tipo'] == "columna_duplicada"]
+    assert (h['id'], h['recurso']) == (cid, r1['export_id'])
+
+
+@pytest.mark.parametrize("tipo", ["columna_inexistente", "segmento_inexistente", "metadato_inexistente"])
+def test_referencia_colgada(export, tipo):
+    if tipo == "columna_inexistente":
+        r = _recurso(export, "source_group")
+        r['source_group']['columns'][0]['column_id'] = 1
+        donde = "Agrupación · GROUP BY"
+    elif tipo == "segmento_inexistente":
+        r = _recurso(export, "reconciliation")
+        r['reconciliation']['segment_b_id'] = 1
+        donde = "Conciliación · grupo lado B"
+    else:
+        r = _recurso(export, "advanced_reconciliation")
+        sw = r['advanced_reconciliation']['reconciliation_rule_sets'][0]['sweep_sides'][0]
+        sw['input_sweep_resource']['segmentation_metadata_id'] = 1
+        donde = "segmento lado A"
+    h, = [h for h in validar(export) if h['tipo'] == tipo]
+    assert (h['nivel'], h['id'], h['recurso']) == ("error", 1, r['export_id'])
+    assert donde in h['donde']
+
+
+def test_ciclo(export):
+    n = export['nodes'][0]
+    export['nodes'].append({'source': [n['target']], 'target': n['source'][0]})
+    hallazgos = validar(export)
+    ciclos = [h for h in hallazgos if h['tipo'] == "ciclo"]
+    assert ciclos and all(h['nivel'] == "error" for h in ciclos)
+    # Errores primero
+    assert hallazgos[0]['nivel'] == "error"
+
+
+def test_nodo_externo_va_al_recurso_conectado(export):
+    destino = export['nodes'][0]['target']
+    origen  = export['nodes'][0]['source'][0]
+    export['nodes'] += [{'source': [7, origen], 'target': destino},   # origen fuera del export
+                        {'source': [origen], 'target': 8}]            # destino fuera del export
+    externos = {h['id']: h for h in validar(export) if h['tipo'] == "nodo_externo"}
+    assert set(externos) == {7, 8}
+    assert all(h['nivel'] == "aviso" for h in externos.values())
+    assert externos[7]['recurso'] == destino
+    assert externos[8]['recurso'] == origen
+
+
+def test_verificar_solo_falla_con_errores(export):
+    export['nodes'].append({'source': [7], 'target': export['nodes'][0]['target']})
+    assert "nodo_externo" in _tipos(verificar(export), "aviso")
+
+    export['resources'][0]['columns'][0]['uniqueness'] = {'order_keys': [{'column_id': 1}]}
+    with pytest.raises(FlujoInvalido) as e:
+        verificar(export)
+    assert _tipos(e.value.hallazgos) == ["columna_inexistente"]
+    assert isinstance(e.value, ValueError)
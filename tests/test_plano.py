@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from simetrik_docs.hashing import content_hash
+from simetrik_docs.parsers import build_maps
+from simetrik_docs.plano import (MAPAS, ModeloPlano, abrir_archivo, abrir_compartido, codificar,
+                                 guardar_plano, publicar)
+
+
+def _json(v):
+    # El buffer guarda JSON: las tuplas vuelven como listas
+    return json.loads(json.dumps(v))
+
+
+def test_maps_iguales_al_dict(export):
+    modelo = ModeloPlano(codificar(export))
+    for nombre, plano, dic in zip(MAPAS, modelo.maps, build_maps(export)):
+        assert len(plano) == len(dic), nombre
+        assert set(plano) == set(dic), nombre   # el orden es el de los hashes
+        for k, v in dic.items():
+            assert k in plano
+            assert plano[k] == _json(v), (nombre, k)
+            assert plano.get(k) == _json(v)
+
+
+def test_maps_claves_ausentes(export):
+    modelo = ModeloPlano(codificar(export))
+    eid = next(iter(modelo.res_map))
+    assert str(eid) not in modelo.res_map   # 123 y "123" son claves distintas
+    assert -1 not in modelo.res_map
+    assert modelo.res_map.get(-1, "x") == "x"
+    with pytest.raises(KeyError):
+        modelo.res_map[-1]
+
+
+def test_export_igual_al_dict(export):
+    modelo = ModeloPlano(codificar(export))
+    plano  = modelo.export()
+    assert plano.materializar() == _json(export)
+    assert modelo.ids() == [r['export_id'] for r in export['resources']]
+    assert modelo.hashes_recursos() == [content_hash(r) for r in export['resources']]
+    r = export['resources'][7]
+    assert modelo.recurso(r['export_id']) == _json(r)
+
+
+def test_export_parcial(export):
+    ids = [r['export_id'] for r in export['resources'][3:9]]
+    plano = ModeloPlano(codificar(export)).export(ids)
+    assert plano['resources'] == _json(export['resources'][3:9])
+    assert plano['nodes'] == _json(export['nodes'])
+    assert plano['flow'] == export['flow']
+
+
+def test_archivo_y_memoria_compartida(export, tmp_path):
+    esperado = _json(export)
+    with abrir_archivo(guardar_plano(export, tmp_path / "flujo.skdp")) as modelo:
+        assert modelo.export().materializar() == esperado
+    shm = publicar(export)
+    try:
+        with abrir_compartido(shm.name) as modelo:
+            assert modelo.export().materializar() == esperado
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_buffer_ajeno():
+    with pytest.raises(ValueError):
+        ModeloPlano(b"XXXX" + bytes(20))
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from simetrik_docs.store import VersionStore
+
+
+def _json(v):
+    return json.loads(json.dumps(v))
+
+
+def test_guardar_y_cargar(export, tmp_path):
+    store = VersionStore(tmp_path)
+    v = store.guardar("flujo", export)
+    cargado = store.cargar("flujo", v)
+    assert cargado.materializar() == _json(export)
+    r = export['resources'][5]
+    assert cargado.recurso(r['export_id']) == _json(r)
+    assert cargado.resumen()[0] == (export['resources'][0]['export_id'], export['resources'][0]['name'],
+                                    export['resources'][0]['resource_type'])
+
+
+def test_mismo_contenido_misma_version(export, otro, tmp_path):
+    store = VersionStore(tmp_path)
+    v = store.guardar("flujo", export)
+    blobs = store.estadisticas()['blobs']
+    otro['resources'] = [dict(reversed(list(r.items()))) for r in otro['resources']]
+    assert store.guardar("flujo", otro) == v
+    assert store.estadisticas()['blobs'] == blobs
+    assert len(store.versiones("flujo")) == 1
+
+
+def test_versiones_comparten_blobs(export, otro, tmp_path):
+    store = VersionStore(tmp_path)
+    store.guardar("flujo", export)
+    otro['resources'][0]['name'] = "Cambiado"
+    store.guardar("flujo", otro)
+    ultima = store.versiones("flujo")[0]
+    assert ultima['blobs_nuevos'] == 1   # sólo el recurso que cambió
+    assert store.cargar("flujo").materializar() == _json(otro)
+
+
+def test_volver_a_guardar_la_hace_ultima(export, otro, tmp_path):
+    store = VersionStore(tmp_path)
+    otro['resources'][0]['name'] = "Cambiado"
+    v1 = store.guardar("flujo", export)
+    v2 = store.guardar("flujo", otro)
+    assert store.versiones("flujo")[0]['version'] == v2
+    assert store.guardar("flujo", export) == v1
+    assert [v['version'] for v in store.versiones("flujo")] == [v1, v2]
+    assert store.cargar("flujo").version == v1
+
+
+def test_version_desconocida(tmp_path):
+    store = VersionStore(tmp_path)
+    with pytest.raises(KeyError):
+        store.cargar("flujo")
+    with pytest.raises(KeyError):
+        store.cargar("flujo", "0" * 32)